@@ -5,7 +5,7 @@
 # regenerated.
 # --------------------------------------------------------------------------
 
-from .account import Account
+from .account import Account, get_codecs
 from .version import VERSION
 
-__all__ = ['Account']
+__all__ = ['Account', 'get_codecs']
@@ -1,12 +1,32 @@
 
 from __future__ import print_function
+import threading
 from sys import stderr
+from concurrent.futures import ThreadPoolExecutor
 from msrest.service_client import ServiceClient
-from msrest import Configuration, Deserializer
+from msrest import Configuration, Serializer, Deserializer
 from msrest.exceptions import HttpOperationError
 from .version import VERSION
 from . import models
 
+_codecs = None
+_codecs_lock = threading.Lock()
+
+
+def get_codecs():
+    """Builds the model registry, Serializer and Deserializer of this package on first use and
+    shares them between all client instances. Thread-safe.
+
+    :rtype: tuple of (:class:`Serializer<msrest.Serializer>`, :class:`Deserializer<msrest.Deserializer>`)
+    """
+    global _codecs  # pylint: disable=global-statement
+    if _codecs is None:
+        with _codecs_lock:
+            if _codecs is None:
+                client_models = {k: v for k, v in models.__dict__.items() if isinstance(v, type)}
+                _codecs = (Serializer(client_models), Deserializer(client_models))
+    return _codecs
+
 class AccountConfiguration(Configuration):
 
     def __init__(self, api_version, base_url=None):
@@ -20,11 +40,10 @@ class Account(object):
 
         self.config = AccountConfiguration(api_version, base_url)
         self._client = ServiceClient(creds, self.config)
-        client_models = {k: v for k, v in models.__dict__.items() if isinstance(v, type)}
-        self._deserialize = Deserializer(client_models)
+        self._serialize, self._deserialize = get_codecs()
         self.api_version = api_version
 
-    def create_account(self, collection_name, preferred_region):
+    def create_account(self, collection_name, preferred_region, custom_headers=None):
 
         # Construct URL
         url = '/_apis/hostacquisition/collections'
@@ -37,7 +56,7 @@ class Account(object):
 
         # Construct and send request
         request = self._client.post(url, query_parameters)
-        response = self._client.send(request)
+        response = self._client.send(request, custom_headers)
 
         # Handle Response
         deserialized = None
@@ -70,4 +89,56 @@ class Account(object):
         else:
             deserialized = self._deserialize('Regions', response)
 
-        return deserialized
\ No newline at end of file
+        return deserialized
+
+    def get_name_availability(self, collection_name):
+
+        # Construct URL
+        url = '/_apis/hostacquisition/nameavailability/{collectionName}'
+        path_format_arguments = {
+            'collectionName': self._serialize.url("collection_name", collection_name, 'str')
+        }
+        url = self._client.format_url(url, **path_format_arguments)
+
+        # Construct parameters
+        query_parameters = {}
+        query_parameters["api-version"] = self.api_version
+
+        # Construct and send request
+        request = self._client.get(url, query_parameters)
+        response = self._client.send(request)
+
+        # Handle Response
+        deserialized = None
+        if response.status_code not in [200]:
+            print("GET", request.url, file=stderr)
+            print("response:", response.status_code, file=stderr)
+            print(response.text, file=stderr)
+            raise HttpOperationError(self._deserialize, response)
+        else:
+            deserialized = self._deserialize('NameAvailability', response)
+
+        return deserialized
+
+    def get_names_availability(self, collection_names, max_workers=8):
+        """Checks the availability of many collection names concurrently.
+
+        :param collection_names: candidate collection names
+        :param max_workers: maximum number of concurrent requests
+        :return: dict of collection name to NameAvailability
+        """
+        collection_names = list(collection_names)
+        if not collection_names:
+            return {}
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(collection_names)))) as executor:
+            availabilities = executor.map(self.get_name_availability, collection_names)
+            return dict(zip(collection_names, availabilities))
+
+    def account_exists(self, collection_name):
+        """Returns True when the collection name is already taken by an account."""
+        return is_name_taken(self.get_name_availability(collection_name))
+
+
+def is_name_taken(name_availability):
+    # is_available is declared as a string by the service model; an unknown value is not treated as taken
+    return str(name_availability.is_available).lower() == 'false'
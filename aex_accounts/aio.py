@@ -0,0 +1,117 @@
+# coding=utf-8
+# --------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+# Requires Python 3.5+ and msrest 0.6.0+
+import asyncio
+from sys import stderr
+from msrest.async_client import ServiceClientAsync
+from msrest.exceptions import HttpOperationError
+from .account import AccountConfiguration, get_codecs, is_name_taken
+
+
+class AsyncAccount(object):
+    """Asynchronous counterpart of Account. It shares the models, the Serializer and the Deserializer
+    with the synchronous client.
+    """
+
+    def __init__(self, api_version, base_url=None, creds=None):
+
+        self.config = AccountConfiguration(api_version, base_url)
+        self.config.credentials = creds
+        self._client = ServiceClientAsync(self.config)
+        self._serialize, self._deserialize = get_codecs()
+        self.api_version = api_version
+
+    async def create_account(self, collection_name, preferred_region, custom_headers=None):
+
+        # Construct URL
+        url = '/_apis/hostacquisition/collections'
+
+        # Construct parameters
+        query_parameters = {}
+        query_parameters["api-version"] = self.api_version
+        query_parameters["collectionName"] = collection_name
+        query_parameters["preferredRegion"] = preferred_region
+
+        # Construct and send request
+        request = self._client.post(url, query_parameters)
+        if custom_headers:
+            request.headers.update(custom_headers)
+        response = await self._client.async_send(request, stream=False)
+
+        # Handle Response
+        return self._handle_response(request, response, 'Collection')
+
+    async def regions(self):
+
+        # Construct URL
+        url = '/_apis/hostacquisition/regions'
+
+        # Construct and send request
+        request = self._client.get(url)
+        response = await self._client.async_send(request, stream=False)
+
+        # Handle Response
+        return self._handle_response(request, response, 'Regions')
+
+    async def get_name_availability(self, collection_name):
+
+        # Construct URL
+        url = '/_apis/hostacquisition/nameavailability/{collectionName}'
+        path_format_arguments = {
+            'collectionName': self._serialize.url("collection_name", collection_name, 'str')
+        }
+        url = self._client.format_url(url, **path_format_arguments)
+
+        # Construct parameters
+        query_parameters = {}
+        query_parameters["api-version"] = self.api_version
+
+        # Construct and send request
+        request = self._client.get(url, query_parameters)
+        response = await self._client.async_send(request, stream=False)
+
+        # Handle Response
+        return self._handle_response(request, response, 'NameAvailability')
+
+    async def get_names_availability(self, collection_names, max_workers=8):
+        """Checks the availability of many collection names concurrently.
+
+        :param collection_names: candidate collection names
+        :param max_workers: maximum number of concurrent requests
+        :return: dict of collection name to NameAvailability
+        """
+        collection_names = list(collection_names)
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+
+        async def _get_name_availability(collection_name):
+            async with semaphore:
+                return await self.get_name_availability(collection_name)
+        availabilities = await asyncio.gather(*[_get_name_availability(name) for name in collection_names])
+        return dict(zip(collection_names, availabilities))
+
+    async def account_exists(self, collection_name):
+        """Returns True when the collection name is already taken by an account."""
+        return is_name_taken(await self.get_name_availability(collection_name))
+
+    async def close(self):
+        """Closes the HTTP session of the client."""
+        await self._client.__aexit__()
+
+    async def __aenter__(self):
+        await self._client.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_details):
+        await self._client.__aexit__(*exc_details)
+
+    def _handle_response(self, request, response, model_name):
+        if response.status_code not in [200]:
+            print(request.method, request.url, file=stderr)
+            print("response:", response.status_code, file=stderr)
+            print(response.text(), file=stderr)
+            raise HttpOperationError(self._deserialize, response)
+        return self._deserialize(model_name, response)
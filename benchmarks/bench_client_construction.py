@@ -0,0 +1,57 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+"""
+Micro-benchmark for the construction cost of the REST clients.
+It compares building the model registry and the Serializer/Deserializer per client instance,
+as the clients used to do, with the codecs that are now shared per package.
+
+    python -m benchmarks.bench_client_construction
+"""
+from __future__ import print_function
+import timeit
+import warnings
+
+from msrest import Serializer, Deserializer
+import continuous_delivery
+import aex_accounts
+import vsts_info_provider
+from continuous_delivery import ContinuousDelivery
+from aex_accounts import Account
+from vsts_info_provider import VstsInfoProvider
+
+ITERATIONS = 2000
+
+
+def _per_instance_codecs(models):
+    client_models = {k: v for k, v in models.__dict__.items() if isinstance(v, type)}
+    return Serializer(client_models), Deserializer(client_models)
+
+
+def _report(name, seconds):
+    print('{:<45} {:>10.1f} us/op'.format(name, seconds / ITERATIONS * 1e6))
+
+
+def main():
+    warnings.simplefilter('ignore', DeprecationWarning)
+    for package, module in [(continuous_delivery, continuous_delivery.continuous_delivery),
+                            (vsts_info_provider, vsts_info_provider.vsts_info_provider),
+                            (aex_accounts, aex_accounts.account)]:
+        _report(package.__name__ + ' codecs per instance',
+                timeit.timeit(lambda: _per_instance_codecs(package.models), number=ITERATIONS))
+        _report(package.__name__ + ' codecs shared',
+                timeit.timeit(module.get_codecs, number=ITERATIONS))
+
+    _report('ContinuousDelivery()', timeit.timeit(
+        lambda: ContinuousDelivery('3.2-preview.1', 'https://account1.portalext.visualstudio.com', None),
+        number=ITERATIONS))
+    _report('VstsInfoProvider()', timeit.timeit(
+        lambda: VstsInfoProvider('3.2-preview', 'https://account1.visualstudio.com/project/_git/repo', None),
+        number=ITERATIONS))
+    _report('Account()', timeit.timeit(
+        lambda: Account('4.0-preview.1', 'https://app.vsaex.visualstudio.com', None), number=ITERATIONS))
+
+
+if __name__ == '__main__':
+    main()
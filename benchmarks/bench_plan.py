@@ -0,0 +1,49 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+"""
+Benchmark of ContinuousDeliveryManager.plan_continuous_delivery: builds and serializes the provisioning
+configurations of a fleet of web sites without any service call. The Team Services repositories are answered by
+a stub lookup.
+
+    python -m benchmarks.bench_plan --sites 10000
+"""
+from __future__ import print_function
+import argparse
+import time
+
+from vsts_info_provider.models import RepositoryInfo, TeamProjectInfo, VstsInfo
+from vsts_cd_manager.continuous_delivery_manager import ContinuousDeliveryManager
+from .bench_setup import get_site_spec
+
+
+def get_stub_vsts_info(repo_url, creds):  # pylint: disable=unused-argument
+    """
+    :return: a VstsInfo named after the repository of repo_url
+    """
+    name = repo_url.rstrip('/').rsplit('/', 1)[-1]
+    return VstsInfo(repository_info=RepositoryInfo(name + '-id', name,
+                                                   project_info=TeamProjectInfo(name + '-project-id', name)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sites', type=int, default=10000, help='number of web sites to plan')
+    parser.add_argument('--repositories', type=int, default=50, help='number of distinct repositories')
+    args = parser.parse_args()
+
+    cdman = ContinuousDeliveryManager(None)
+    specs = (get_site_spec(index, args.repositories) for index in range(args.sites))
+    started = time.time()
+    failures = 0
+    for _, body in cdman.plan_continuous_delivery(specs, get_stub_vsts_info):
+        failures += isinstance(body, Exception)
+    elapsed = time.time() - started
+    print('sites:        {} ({} failed)'.format(args.sites, failures))
+    print('elapsed:      {:.2f} s'.format(elapsed))
+    print('sites/second: {:.0f}'.format(args.sites / elapsed if elapsed else 0))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+"""
+Micro-benchmark for the serialization of ProvisioningConfiguration request bodies and the decoding of
+provisioning status polls. It compares msrest's Serializer.body with the CompiledSerializer used by the
+ContinuousDelivery client, and the full deserialization of a pending poll response with the status only one.
+
+    python -m benchmarks.bench_serialization
+"""
+from __future__ import print_function
+import json
+import timeit
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from msrest import Deserializer, Serializer
+from continuous_delivery import models
+from continuous_delivery.continuous_delivery import deserialize_status_only
+from continuous_delivery.compiled_serializer import CompiledSerializer
+from continuous_delivery.models import (AuthorizationInfo, AuthorizationInfoParameters, BuildConfiguration,
+                                        CiArtifact, CiConfiguration, CreateOptions, ProvisioningConfiguration,
+                                        ProvisioningConfigurationSource, ProvisioningConfigurationTarget,
+                                        SlotSwapConfiguration, SourceRepository)
+
+ITERATIONS = 5000
+
+
+def get_payload():
+    """
+    :return: a ProvisioningConfiguration as sent for a Python web site with a load test target
+    """
+    auth_info = AuthorizationInfo('Headers', AuthorizationInfoParameters('Bearer token'))
+    source = ProvisioningConfigurationSource(
+        'codeRepository',
+        SourceRepository('Github', 'org/repo', 'master',
+                         AuthorizationInfo('PersonalAccessToken', AuthorizationInfoParameters(None, 'pat'))),
+        BuildConfiguration('Python', None, None, 'Django', 'Python353x64', 'DjangoProjectName.settings',
+                           'FlaskProjectName'))
+    targets = [
+        ProvisioningConfigurationTarget('azure', 'windowsAppService', 'production', 'Production', 'sub1',
+                                        'subname1', 'tenant1', 'web1', 'group1', 'South Central US', auth_info,
+                                        SlotSwapConfiguration('staging')),
+        ProvisioningConfigurationTarget('azure', 'windowsAppService', 'test', 'Load Test', 'sub1', 'subname1',
+                                        'tenant1', 'test1', 'group1', 'South Central US', auth_info, None,
+                                        CreateOptions('ServicePlan1', 'Standard', 'web1'))]
+    return ProvisioningConfiguration(None, source, targets, CiConfiguration(CiArtifact(name='project1')))
+
+
+def main():
+    client_models = {k: v for k, v in models.__dict__.items() if isinstance(v, type)}
+    payload = get_payload()
+    results = []
+    for name, serializer in [('msrest Serializer', Serializer(client_models)),
+                             ('CompiledSerializer', CompiledSerializer(client_models))]:
+        seconds = timeit.timeit(lambda: serializer.body(payload, 'ProvisioningConfiguration'), number=ITERATIONS)
+        results.append(json.dumps(serializer.body(payload, 'ProvisioningConfiguration')))
+        print('{:<25} {:>10.0f} payloads/s {:>8.1f} us/payload'.format(
+            name, ITERATIONS / seconds, seconds / ITERATIONS * 1e6))
+    print('identical JSON: {}'.format(results[0] == results[1]))
+
+    # A pending poll response echoes the whole configuration
+    response = json.loads(results[0])
+    response['id'] = 'abcd'
+    response['ciConfiguration']['result'] = {'status': 'inProgress', 'statusMessage': None}
+    deserializer = Deserializer(client_models)
+    for name, decode in [('full poll decode', lambda: deserializer('ProvisioningConfiguration', response)),
+                         ('status only poll decode', lambda: deserialize_status_only(deserializer, response))]:
+        seconds = timeit.timeit(decode, number=ITERATIONS)
+        allocated = 'n/a'
+        if tracemalloc is not None:
+            tracemalloc.start()
+            decode()
+            allocated = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        print('{:<25} {:>10.0f} polls/s {:>11.1f} us/poll {:>8} bytes peak'.format(
+            name, ITERATIONS / seconds, seconds / ITERATIONS * 1e6, allocated))
+
+
+if __name__ == '__main__':
+    main()
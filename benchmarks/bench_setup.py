@@ -0,0 +1,164 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+"""
+End-to-end benchmark of ContinuousDeliveryManager against the local stand-in server.
+It sets up many sites concurrently over real HTTP and reports the throughput, the number of
+requests per site, the bytes sent by the server, the share of status polls answered with
+304 Not Modified, the waits of the client rate limiter, the setup latency percentiles and the percentiles of
+the setup phases.
+
+    python -m benchmarks.bench_setup --sites 200 --workers 16 --latency 0.02
+"""
+from __future__ import print_function
+import argparse
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+from vsts_cd_manager.caching import TTLCache
+from vsts_cd_manager.client_registry import ClientRegistry
+from vsts_cd_manager.continuous_delivery_manager import ContinuousDeliveryManager
+from vsts_cd_manager.polling import PollingStrategy
+from vsts_cd_manager.rate_limiter import RateLimiter
+from vsts_cd_manager.setup_spec import ContinuousDeliverySetupSpec
+from vsts_cd_manager.timings import PHASES
+from vsts_cd_manager.vsts_info_cache import VstsInfoCache
+from .fake_vsts_server import FakeVstsServer, get_local_endpoints
+
+APP_TYPE_DETAILS = {'cd_app_type': 'AspNet', 'app_working_dir': None}
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of a list of values.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class SetupBenchmark(object):
+    def __init__(self, server, workers, repositories, polling_strategy, rate_limiter=None):
+        self._server = server
+        self._workers = workers
+        self._repositories = repositories
+        self._registry = ClientRegistry(transport_retries=0)
+        # The stand-in serves every host from one address, by default the client limit stays out of the way
+        self._rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter(rate=1000, burst=100)
+        # One manager serves every site, the per-site inputs travel in the setup specs
+        self._manager = ContinuousDeliveryManager(None, polling_strategy, client_registry=self._registry,
+                                                  vsts_info_cache=VstsInfoCache(), regions_cache=TTLCache(3600),
+                                                  name_availability_cache=TTLCache(300),
+                                                  endpoints=get_local_endpoints(server.url),
+                                                  rate_limiter=self._rate_limiter)
+
+    def run(self, sites):
+        """
+        Sets up the given number of sites and returns a dict with the measurements.
+        """
+        self._server.reset_counters()
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            outcomes = list(executor.map(self._setup_site, range(sites)))
+        elapsed = time.time() - started
+        self._registry.close()
+        status_polls = self._server.request_counts['provisioning_get']
+        latencies = [latency for latency, error, _ in outcomes if error is None]
+        phases = {}
+        for _, _, timings in outcomes:
+            for phase, times in (timings['phases'].items() if timings else ()):
+                phases.setdefault(phase, []).append(times['duration'] or 0.0)
+        limiter_statistics = list(self._rate_limiter.get_statistics().values())
+        return {
+            'sites': sites,
+            'failures': sum(1 for _, error, _ in outcomes if error is not None),
+            'elapsed': elapsed,
+            'sites_per_minute': sites / elapsed * 60 if elapsed else 0.0,
+            'requests_per_site': self._server.total_requests / float(sites) if sites else 0.0,
+            'connections': self._server.connection_count,
+            'request_counts': dict(self._server.request_counts),
+            'bytes_per_site': self._server.bytes_sent / float(sites) if sites else 0.0,
+            'not_modified_rate': self._server.not_modified_count / float(status_polls) if status_polls else 0.0,
+            'throttled': self._server.request_counts['throttled'],
+            'limiter_max_wait': max([stats['max_wait'] for stats in limiter_statistics] or [0.0]),
+            'limiter_pauses': sum(stats['pauses'] for stats in limiter_statistics),
+            'p50': percentile(latencies, 0.50),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'phases': dict((phase, (percentile(durations, 0.50), percentile(durations, 0.95)))
+                           for phase, durations in phases.items()),
+        }
+
+    def _setup_site(self, index):
+        spec = get_site_spec(index, self._repositories)
+        started = time.time()
+        try:
+            result = self._manager.setup_continuous_delivery(spec=spec)
+        except Exception as ex:  # pylint: disable=broad-except
+            return time.time() - started, ex, None
+        return time.time() - started, None, result.timings
+
+
+def get_site_spec(index, repositories):
+    """
+    :return: the ContinuousDeliverySetupSpec of the benchmark site with the given index
+    """
+    return ContinuousDeliverySetupSpec(
+        resource_group_name='group1', website_name='web{}'.format(index),
+        repo_url='https://bench.visualstudio.com/project{0}/_git/repo{0}'.format(index % repositories),
+        app_type_details=APP_TYPE_DETAILS, cd_project_url='https://bench.visualstudio.com',
+        vsts_app_auth_token='token', subscription_id='sub1', subscription_name='subname1', tenant_id='tenant1',
+        webapp_location='South Central US', branch='master', create_account=True)
+
+
+def print_report(report):
+    print('sites:             {sites} ({failures} failed)'.format(**report))
+    print('elapsed:           {elapsed:.2f} s'.format(**report))
+    print('sites/minute:      {sites_per_minute:.1f}'.format(**report))
+    print('requests/site:     {requests_per_site:.2f}'.format(**report))
+    print('connections:       {connections}'.format(**report))
+    print('bytes/site:        {bytes_per_site:.0f}'.format(**report))
+    print('304 rate:          {not_modified_rate:.1%}'.format(**report))
+    print('throttled (429):   {throttled}'.format(**report))
+    print('limiter:           {limiter_max_wait:.3f} s max wait, {limiter_pauses} pauses'.format(**report))
+    print('latency p50/p95/p99: {p50:.3f} / {p95:.3f} / {p99:.3f} s'.format(**report))
+    for route, count in sorted(report['request_counts'].items()):
+        print('  {:<20} {}'.format(route, count))
+    print('phase p50/p95:')
+    for phase in PHASES:
+        if phase in report['phases']:
+            print('  {:<20} {:.3f} / {:.3f} s'.format(phase, *report['phases'][phase]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sites', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--repositories', type=int, default=5, help='number of distinct repositories')
+    parser.add_argument('--latency', type=float, default=0.01, help='server latency per request in seconds')
+    parser.add_argument('--queued-time', type=float, default=0.2)
+    parser.add_argument('--in-progress-time', type=float, default=0.5)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--no-compress', action='store_true', help='do not gzip the server responses')
+    parser.add_argument('--rate', type=float, default=1000, help='client requests per second per host')
+    parser.add_argument('--burst', type=int, default=100, help='client burst per host')
+    parser.add_argument('--server-rate', type=float, default=None,
+                        help='requests per second the server answers before throttling with 429')
+    parser.add_argument('--poll-interval', type=float, default=0.1, help='initial polling interval in seconds')
+    args = parser.parse_args()
+
+    warnings.simplefilter('ignore', DeprecationWarning)
+    polling_strategy = PollingStrategy(initial_interval=args.poll_interval, max_interval=args.poll_interval * 8)
+    with FakeVstsServer(args.latency, args.queued_time, args.in_progress_time, args.failure_rate,
+                        compress=not args.no_compress, max_requests_per_second=args.server_rate) as server:
+        benchmark = SetupBenchmark(server, args.workers, args.repositories, polling_strategy,
+                                   RateLimiter(rate=args.rate, burst=args.burst))
+        print_report(benchmark.run(args.sites))
+
+
+if __name__ == '__main__':
+    main()
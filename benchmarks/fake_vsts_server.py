@@ -0,0 +1,380 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+"""
+A local stand-in for the Team Services services used by ContinuousDeliveryManager.
+It implements just enough of the REST APIs to drive a full setup over real HTTP:
+
+- POST /_apis/continuousdelivery/provisioningconfigurations
+- GET /_apis/continuousdelivery/provisioningconfigurations/{id}, moving from queued to inProgress
+  to succeeded or failed as time passes. It answers with ETag and Last-Modified headers and
+  honors If-None-Match and If-Modified-Since with 304 Not Modified.
+- GET /vsts/info
+- GET /_apis/hostacquisition/regions
+- POST /_apis/hostacquisition/collections
+- GET /_apis/hostacquisition/nameavailability/{name}
+
+Every route matches on the end of the path, so any prefix (account name, repository path) is accepted.
+Responses are gzip compressed when the request accepts it. Like the real services, it ignores the
+X-Idempotency-Key header: every POST creates a new resource. inject_faults makes routes fail on demand.
+Use get_local_endpoints to point a ContinuousDeliveryManager at the server.
+"""
+from __future__ import print_function
+import gzip
+import hashlib
+import io
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from email.utils import formatdate, parsedate_tz, mktime_tz
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs, urlsplit
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer  #pylint: disable=import-error
+    from SocketServer import ThreadingMixIn  #pylint: disable=import-error
+    from urlparse import parse_qs, urlsplit  #pylint: disable=import-error
+from vsts_cd_manager.endpoints import ServiceEndpoints
+
+_PROVISIONING = re.compile(r'/_apis/continuousdelivery/provisioningconfigurations/?$', re.IGNORECASE)
+_PROVISIONING_BY_ID = re.compile(r'/_apis/continuousdelivery/provisioningconfigurations/([^/]+)$', re.IGNORECASE)
+_VSTS_INFO = re.compile(r'^(.*)/vsts/info$', re.IGNORECASE)
+_REGIONS = re.compile(r'/_apis/hostacquisition/regions$', re.IGNORECASE)
+_COLLECTIONS = re.compile(r'/_apis/hostacquisition/collections$', re.IGNORECASE)
+_NAME_AVAILABILITY = re.compile(r'/_apis/hostacquisition/nameavailability/([^/]+)$', re.IGNORECASE)
+
+
+class FakeVstsServer(object):
+    def __init__(self, latency=0.0, queued_time=0.2, in_progress_time=0.5, failure_rate=0.0, seed=0,
+                 port=0, compress=True, max_requests_per_second=None):
+        """
+        :param latency: seconds every request is delayed before it is answered
+        :param queued_time: seconds a provisioning configuration stays queued
+        :param in_progress_time: seconds a provisioning configuration stays inProgress after being queued
+        :param failure_rate: fraction of the provisioning configurations that end as failed
+        :param seed: seed deciding which provisioning configurations fail
+        :param port: port to listen on, 0 picks a free port
+        :param compress: whether responses are gzip compressed for clients accepting it
+        :param max_requests_per_second: requests per second above which requests are answered with 429 and
+         Retry-After, counted as the route 'throttled'. None for no limit.
+        """
+        self.latency = latency
+        self.queued_time = queued_time
+        self.in_progress_time = in_progress_time
+        self.failure_rate = failure_rate
+        self.compress = compress
+        self.max_requests_per_second = max_requests_per_second
+        self.request_counts = Counter()
+        self.connection_count = 0
+        self.bytes_sent = 0
+        self.not_modified_count = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._provisionings = {}
+        self._collections = set()
+        self._faults = {}
+        self._allowance = None
+        self._allowance_updated = 0.0
+        self._server = _ThreadingHTTPServer(('127.0.0.1', port), _FakeVstsRequestHandler)
+        self._server.fake = self
+        self._thread = None
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self._server.server_address[1])
+
+    @property
+    def provisioning_count(self):
+        with self._lock:
+            return len(self._provisionings)
+
+    @property
+    def total_requests(self):
+        with self._lock:
+            return sum(self.request_counts.values())
+
+    def reset_counters(self):
+        with self._lock:
+            self.request_counts.clear()
+            self.connection_count = 0
+            self.bytes_sent = 0
+            self.not_modified_count = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='FakeVstsServer')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_details):
+        self.stop()
+
+    def inject_faults(self, route, status_codes, processed=False):
+        """
+        Answers the next requests of a route with the given status codes, one per request.
+        :param route: name of the route as counted in request_counts, e.g. 'provisioning_post'
+        :param status_codes: list of HTTP status codes
+        :param processed: whether the requests take effect before the error is returned
+        """
+        with self._lock:
+            self._faults.setdefault(route, []).extend((status_code, processed) for status_code in status_codes)
+
+    def count(self, route):
+        """
+        Counts a request of a route.
+        :return: the injected fault for the request as (status code, processed), or None
+        """
+        with self._lock:
+            self.request_counts[route] += 1
+            faults = self._faults.get(route)
+            return faults.pop(0) if faults else None
+
+    def throttle(self):
+        """
+        Takes a request from the allowance of max_requests_per_second, which refills in one second.
+        :return: seconds until the next request is allowed if this one is throttled, else None
+        """
+        rate = self.max_requests_per_second
+        if not rate:
+            return None
+        with self._lock:
+            now = time.time()
+            if self._allowance is None:
+                self._allowance = float(rate)
+            self._allowance = min(float(rate), self._allowance + (now - self._allowance_updated) * rate)
+            self._allowance_updated = now
+            if self._allowance >= 1:
+                self._allowance -= 1
+                return None
+            self.request_counts['throttled'] += 1
+            return (1 - self._allowance) / rate
+
+    def count_connection(self):
+        with self._lock:
+            self.connection_count += 1
+
+    def count_response(self, status_code, body_size):
+        with self._lock:
+            self.bytes_sent += body_size
+            if status_code == 304:
+                self.not_modified_count += 1
+
+    def create_provisioning(self, body):
+        provisioning_id = str(uuid.uuid4())
+        with self._lock:
+            failed = self._random.random() < self.failure_rate
+            self._provisionings[provisioning_id] = (time.time(), failed, body)
+        return provisioning_id, self._get_provisioning_document(provisioning_id, 'queued', body)
+
+    def get_provisioning(self, provisioning_id):
+        """
+        :return: tuple of the document and the time of its last change, (None, None) for an unknown id
+        """
+        with self._lock:
+            entry = self._provisionings.get(provisioning_id)
+        if entry is None:
+            return None, None
+        created, failed, body = entry
+        elapsed = time.time() - created
+        if elapsed < self.queued_time:
+            status, modified = 'queued', created
+        elif elapsed < self.queued_time + self.in_progress_time:
+            status, modified = 'inProgress', created + self.queued_time
+        else:
+            status = 'failed' if failed else 'succeeded'
+            modified = created + self.queued_time + self.in_progress_time
+        return self._get_provisioning_document(provisioning_id, status, body), modified
+
+    def create_collection(self, name):
+        with self._lock:
+            self._collections.add(name.lower())
+        return {'id': str(uuid.uuid4()), 'name': name}
+
+    def is_name_available(self, name):
+        with self._lock:
+            return name.lower() not in self._collections
+
+    def _get_provisioning_document(self, provisioning_id, status, body):
+        ci_configuration = dict(body.get('ciConfiguration') or {})
+        project_name = (ci_configuration.get('project') or {}).get('name') or 'project'
+        ci_configuration['project'] = {'id': _stable_id(project_name), 'name': project_name}
+        if status == 'succeeded':
+            ci_configuration['buildDefinition'] = {'id': _stable_id('build' + provisioning_id)[:8], 'name': 'build'}
+            ci_configuration['releaseDefinition'] = {'id': _stable_id('release' + provisioning_id)[:8],
+                                                     'name': 'release'}
+        message = 'Provisioning failed.' if status == 'failed' else None
+        ci_configuration['result'] = {'status': status, 'statusMessage': message}
+        document = dict(body)
+        document['id'] = provisioning_id
+        document['ciConfiguration'] = ci_configuration
+        return document
+
+
+def get_local_endpoints(base_url):
+    """
+    :return: ServiceEndpoints that send every request of a ContinuousDeliveryManager to the fake server at base_url
+    """
+    return ServiceEndpoints(account_url_format=base_url + '/{}', portalext_url_format=base_url + '/{}',
+                            aex_url=base_url + '/_aex',
+                            vsts_info_url=lambda repo_url: base_url + urlsplit(repo_url).path)
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+class _FakeVstsRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.fake.count_connection()
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        return
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self._handle('GET')
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        self._handle('POST')
+
+    def _handle(self, method):
+        fake = self.server.fake
+        parts = urlsplit(self.path)
+        path = parts.path.rstrip('/') if parts.path != '/' else parts.path
+        query = parse_qs(parts.query)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length).decode('utf-8')) if length else {}
+        if fake.latency:
+            time.sleep(fake.latency)
+
+        retry_after = fake.throttle()
+        if retry_after is not None:
+            return self._send(429, {'message': 'Too many requests.'}, {'Retry-After': '{:.3f}'.format(retry_after)})
+        route, process = self._get_route(method, path, query, body)
+        fault = fake.count(route)
+        if fault is not None and not fault[1]:
+            return self._send(fault[0], {'message': 'Injected fault.'})
+        status_code, document, modified = process()
+        if fault is not None:
+            return self._send(fault[0], {'message': 'Injected fault.'})
+        if modified is not None:
+            return self._send_conditional(document, modified)
+        return self._send(status_code, document)
+
+    def _get_route(self, method, path, query, body):
+        # Returns the route name and a method processing the request. It returns the status code, the document
+        # and, for documents answering conditional requests, the time of their last change.
+        fake = self.server.fake
+        if method == 'POST' and _PROVISIONING.search(path):
+            return 'provisioning_post', lambda: (200, fake.create_provisioning(body)[1], None)
+        match = _PROVISIONING_BY_ID.search(path)
+        if method == 'GET' and match:
+            def _get_provisioning():
+                document, modified = fake.get_provisioning(match.group(1))
+                if document is None:
+                    return 404, {'message': 'Not found.'}, None
+                return 200, document, modified
+            return 'provisioning_get', _get_provisioning
+        match = _VSTS_INFO.search(path)
+        if method == 'GET' and match:
+            return 'vsts_info', lambda: (200, _get_vsts_info(fake.url + match.group(1)), None)
+        if method == 'GET' and _REGIONS.search(path):
+            return 'regions', lambda: (200, {'count': 2, 'value': [
+                {'name': 'CUS', 'displayName': 'Central US', 'is_default': 'false'},
+                {'name': 'SCUS', 'displayName': 'South Central US', 'is_default': 'true'}]}, None)
+        if method == 'POST' and _COLLECTIONS.search(path):
+            name = query.get('collectionName', [''])[0]
+            return 'collections', lambda: (200, fake.create_collection(name), None)
+        match = _NAME_AVAILABILITY.search(path)
+        if method == 'GET' and match:
+            def _get_name_availability():
+                name = match.group(1)
+                available = fake.is_name_available(name)
+                return 200, {'name': name, 'isAvailable': available,
+                             'unavailabilityReason': None if available else 'Taken'}, None
+            return 'name_availability', _get_name_availability
+        return 'unknown', lambda: (404, {'message': 'Unknown route {} {}'.format(method, path)}, None)
+
+    def _send(self, status_code, document, headers=None):
+        content = json.dumps(document, sort_keys=True).encode('utf-8')
+        compress = self.server.fake.compress and 'gzip' in (self.headers.get('Accept-Encoding') or '')
+        if compress:
+            content = _gzip(content)
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        if compress:
+            self.send_header('Content-Encoding', 'gzip')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+        self.server.fake.count_response(status_code, len(content))
+
+    def _send_conditional(self, document, modified):
+        # The ETag changes with the document, Last-Modified with the status
+        etag = '"{}"'.format(hashlib.md5(json.dumps(document, sort_keys=True).encode('utf-8')).hexdigest())
+        headers = {'ETag': etag, 'Last-Modified': formatdate(modified, usegmt=True)}
+        if_none_match = self.headers.get('If-None-Match')
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_none_match is not None:
+            not_modified = etag in [tag.strip() for tag in if_none_match.split(',')]
+        elif if_modified_since is not None:
+            since = parsedate_tz(if_modified_since)
+            not_modified = since is not None and int(modified) <= mktime_tz(since)
+        else:
+            not_modified = False
+        if not not_modified:
+            return self._send(200, document, headers)
+        self.send_response(304)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.server.fake.count_response(304, 0)
+
+
+def _get_vsts_info(repo_url):
+    # /{project}/_git/{repository} gives stable ids for the same repository
+    segments = [segment for segment in urlsplit(repo_url).path.split('/') if segment]
+    repository_name = segments[-1] if segments else 'repository'
+    project_name = segments[-3] if len(segments) >= 3 else 'project'
+    return {
+        'serverUrl': repo_url,
+        'collection': {'id': _stable_id('collection'), 'name': 'DefaultCollection'},
+        'repository': {
+            'id': _stable_id(repo_url.lower()),
+            'name': repository_name,
+            'url': repo_url,
+            'project': {'id': _stable_id(project_name), 'name': project_name, 'state': 1, 'revision': 1},
+        },
+    }
+
+
+def _gzip(content):
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb') as compressed:
+        compressed.write(content)
+    return buffer.getvalue()
+
+
+def _stable_id(value):
+    return str(uuid.UUID(hashlib.md5(value.encode('utf-8')).hexdigest()))
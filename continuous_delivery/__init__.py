@@ -5,10 +5,10 @@
 # regenerated.
 # --------------------------------------------------------------------------
 
-from .continuous_delivery import ContinuousDelivery
+from .continuous_delivery import ContinuousDelivery, get_codecs
 from .version import VERSION
 
-__all__ = ['ContinuousDelivery']
+__all__ = ['ContinuousDelivery', 'get_codecs']
 
 __version__ = VERSION
 
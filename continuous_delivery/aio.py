@@ -0,0 +1,173 @@
+# coding=utf-8
+# --------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+# Requires Python 3.5+ and msrest 0.6.0+
+
+from sys import stderr
+from msrest.async_client import ServiceClientAsync
+from msrest.pipeline import ClientRawResponse
+from msrest.exceptions import HttpOperationError
+from .continuous_delivery import (ContinuousDeliveryConfiguration, get_codecs, _get_response_json,
+                                  deserialize_status_only, is_pending)
+from .poll_cache import PollStatistics, ProvisioningPollCache
+
+
+class AsyncContinuousDelivery(object):
+    """Asynchronous counterpart of ContinuousDelivery. It shares the models,
+    the Serializer and the Deserializer with the synchronous client.
+
+    :ivar config: Configuration for client.
+    :vartype config: ContinuousDeliveryConfiguration
+
+    :param api_version: Version of the API to use.  This should be set to
+     '3.2-preview' to use this version of the api.
+    :type api_version: str
+    :param str base_url: Service URL
+    :param Credentials creds: credentials for vsts
+    """
+
+    def __init__(
+            self, api_version, base_url=None, creds=None):
+        self.config = ContinuousDeliveryConfiguration(api_version, base_url)
+        self.config.credentials = creds
+        self._client = ServiceClientAsync(self.config)
+
+        self.api_version = '3.2' if not api_version else api_version
+        self._serialize, self._deserialize = get_codecs()
+        self.poll_cache = ProvisioningPollCache()
+        self.poll_statistics = PollStatistics()
+
+    async def provisioning_configuration(
+            self, body, custom_headers=None, raw=False, **operation_config):
+        """ProvisioningConfiguration.
+
+        :param body:
+        :type body: :class:`ProvisioningConfiguration
+         <continuous_delivery.models.ProvisioningConfiguration>`
+        :param dict custom_headers: headers that will be added to the request
+        :param bool raw: returns the direct response alongside the
+         deserialized response
+        :rtype: :class:`ProvisioningConfiguration
+         <continuous_delivery.models.ProvisioningConfiguration>`
+        :rtype: :class:`ClientRawResponse<msrest.pipeline.ClientRawResponse>`
+         if raw=true
+        :raises:
+         :class:`HttpOperationError<msrest.exceptions.HttpOperationError>`
+        """
+        # Construct URL
+        url = '/_apis/continuousdelivery/provisioningconfigurations'
+
+        # Construct parameters
+        query_parameters = {}
+        if self.api_version:
+            query_parameters["api-version"] = self.api_version
+
+        # Construct headers
+        header_parameters = {}
+        header_parameters['Content-Type'] = 'application/json; charset=utf-8'
+        if custom_headers:
+            header_parameters.update(custom_headers)
+
+        # Construct body
+        body_content = self._serialize.body(body, 'ProvisioningConfiguration')
+
+        # Construct and send request
+        request = self._client.post(url, query_parameters)
+        request.headers.update(header_parameters)
+        request.add_content(body_content)
+        response = await self._client.async_send(request, stream=False, **operation_config)
+        if response.status_code not in [200, 202]:
+            print("POST", request.url, file=stderr)
+            print("response:", response.status_code, file=stderr)
+            print(response.text(), file=stderr)
+            raise HttpOperationError(self._deserialize, response)
+
+        deserialized = self._deserialize('ProvisioningConfiguration', response)
+
+        if raw:
+            client_raw_response = ClientRawResponse(deserialized, response)
+            return client_raw_response
+
+        return deserialized
+
+    async def get_provisioning_configuration(
+            self, provisioning_configuration_id, custom_headers=None, raw=False, status_only=False,
+            **operation_config):
+        """GetProvisioningConfiguration.
+
+        :param provisioning_configuration_id:
+        :type provisioning_configuration_id: str
+        :param dict custom_headers: headers that will be added to the request
+        :param bool raw: returns the direct response alongside the
+         deserialized response
+        :param bool status_only: while the provisioning is pending, only read
+         the id, status and status message from the response, see
+         ContinuousDelivery.get_provisioning_configuration. Polls of a pending
+         provisioning are conditional GETs.
+        :rtype: :class:`ProvisioningConfiguration
+         <continuous_delivery.models.ProvisioningConfiguration>`
+        :rtype: :class:`ClientRawResponse<msrest.pipeline.ClientRawResponse>`
+         if raw=true
+        :raises:
+         :class:`HttpOperationError<msrest.exceptions.HttpOperationError>`
+        """
+        # Construct URL
+        url = '/_apis/continuousdelivery/provisioningconfigurations/{provisioningConfigurationId}'
+        path_format_arguments = {
+            'provisioningConfigurationId': self._serialize.url("provisioning_configuration_id", provisioning_configuration_id, 'str')
+        }
+        url = self._client.format_url(url, **path_format_arguments)
+
+        # Construct parameters
+        query_parameters = {}
+
+        # Construct headers
+        poll_key = (provisioning_configuration_id, status_only)
+        conditional_headers, cached = self.poll_cache.get_conditional_request(poll_key)
+        header_parameters = {}
+        header_parameters['Content-Type'] = 'application/json; charset=utf-8'
+        header_parameters['Accept-Encoding'] = 'gzip'
+        header_parameters.update(conditional_headers)
+        if custom_headers:
+            header_parameters.update(custom_headers)
+
+        # Construct and send request
+        request = self._client.get(url, query_parameters)
+        request.headers.update(header_parameters)
+        response = await self._client.async_send(request, stream=False, **operation_config)
+        if response.status_code not in [200, 304] or (response.status_code == 304 and cached is None):
+            print("GET", request.url, file=stderr)
+            print("response:", response.status_code, file=stderr)
+            print(response.text(), file=stderr)
+            raise HttpOperationError(self._deserialize, response)
+        self.poll_statistics.record(response.status_code, response.headers, len(response.body() or b''))
+
+        if response.status_code == 304:
+            # Not modified, the provisioning is still pending
+            deserialized = cached
+        else:
+            if status_only:
+                deserialized = deserialize_status_only(self._deserialize, _get_response_json(response))
+            else:
+                deserialized = self._deserialize('ProvisioningConfiguration', response)
+            self.poll_cache.update(poll_key, response.headers, deserialized, is_pending(deserialized))
+
+        if raw:
+            client_raw_response = ClientRawResponse(deserialized, response)
+            return client_raw_response
+
+        return deserialized
+
+    async def close(self):
+        """Closes the HTTP session of the client."""
+        await self._client.__aexit__()
+
+    async def __aenter__(self):
+        await self._client.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_details):
+        await self._client.__aexit__(*exc_details)
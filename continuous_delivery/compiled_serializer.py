@@ -0,0 +1,118 @@
+# coding=utf-8
+# --------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+from enum import Enum
+from msrest import Serializer
+from msrest.serialization import Model
+
+
+def _encode_str(value):
+    # serialize_unicode returns plain strings unchanged, after probing them for an enum value
+    return value if type(value) is str else Serializer.serialize_unicode(value)  # pylint: disable=unidiomatic-typecheck
+
+
+_BASIC_ENCODERS = {
+    'str': _encode_str,
+    'int': int,
+    'float': float,
+    'bool': bool,
+}
+
+
+class CompiledSerializer(Serializer):
+    """Serializer whose body() encodes model trees with encoders compiled once
+    per model class from its _attribute_map, instead of walking the attribute
+    maps and round-tripping the body through a Deserializer on every call.
+
+    The output is the same as msrest's. Bodies the compiled encoders do not
+    cover (dicts in place of models, validation rules, flattened or xml
+    models, serialization options) are handed to the msrest implementation.
+
+    :param dict classes: the model classes, by name
+    """
+
+    def __init__(self, classes=None):
+        super(CompiledSerializer, self).__init__(classes)
+        self._encoders = {}
+
+    def body(self, data, data_type, **kwargs):
+        """Serialize data intended for a request body.
+
+        :param data: The data to be serialized.
+        :param str data_type: The type to be serialized from.
+        :rtype: dict
+        :raises: SerializationError if serialization fails.
+        """
+        if not kwargs and isinstance(data, Model) and data_type in self.dependencies:
+            try:
+                return self._encode_model(data)
+            except (_NotCompiled, AttributeError, TypeError, ValueError):
+                # msrest reports the error or handles the case
+                pass
+        return super(CompiledSerializer, self).body(data, data_type, **kwargs)
+
+    def _encode_model(self, model):
+        model_class = type(model)
+        encoder = self._encoders.get(model_class)
+        if encoder is None:
+            # Compiling twice under a race is harmless, the encoders are equal
+            encoder = self._encoders.setdefault(model_class, self._compile(model_class))
+        return encoder(model)
+
+    def _compile(self, model_class):
+        if getattr(model_class, '_validation', None) or getattr(model_class, '_xml_map', None):
+            return _raise_not_compiled
+        fields = []
+        for attr, attr_desc in model_class._attribute_map.items():
+            key = attr_desc['key']
+            if not key or '.' in key or 'xml' in attr_desc:
+                return _raise_not_compiled
+            fields.append((attr, key, self._get_value_encoder(attr_desc['type'])))
+
+        def _encode(model):
+            serialized = {}
+            for attr, key, encode_value in fields:
+                value = getattr(model, attr)
+                if value is not None:
+                    serialized[key] = encode_value(value)
+            return serialized
+        return _encode
+
+    def _get_value_encoder(self, data_type):
+        basic_encoder = _BASIC_ENCODERS.get(data_type)
+        if basic_encoder is not None:
+            return basic_encoder
+        if data_type.startswith('[') and data_type.endswith(']'):
+            return self._get_list_encoder(self._get_value_encoder(data_type[1:-1]))
+        dependency = self.dependencies.get(data_type)
+        if isinstance(dependency, type) and issubclass(dependency, Model):
+            return self._encode_nested_model
+        if isinstance(dependency, type) and issubclass(dependency, Enum):
+            return lambda value: Serializer.serialize_enum(value, enum_obj=dependency)
+        return lambda value: self.serialize_data(value, data_type)
+
+    def _encode_nested_model(self, value):
+        # msrest turns dicts given in place of models into models first
+        if not isinstance(value, Model):
+            raise _NotCompiled()
+        return self._encode_model(value)
+
+    @staticmethod
+    def _get_list_encoder(encode_item):
+        def _encode(value):
+            if isinstance(value, str):
+                raise _NotCompiled()
+            return [None if item is None else encode_item(item) for item in value]
+        return _encode
+
+
+class _NotCompiled(Exception):
+    pass
+
+
+def _raise_not_compiled(model):
+    raise _NotCompiled()
@@ -6,14 +6,40 @@
 # --------------------------------------------------------------------------
 
 from __future__ import print_function
+import threading
+import json
 from sys import stderr
 from msrest.service_client import ServiceClient
-from msrest import Configuration, Serializer, Deserializer
+from msrest import Configuration, Deserializer
 from msrest.pipeline import ClientRawResponse
 from msrest.exceptions import HttpOperationError
+from .compiled_serializer import CompiledSerializer
+from .poll_cache import PollStatistics, ProvisioningPollCache
 from .version import VERSION
 from . import models
 
+# Provisioning configurations in these states are still being set up
+PENDING_STATUSES = ('queued', 'inProgress')
+
+_codecs = None
+_codecs_lock = threading.Lock()
+
+
+def get_codecs():
+    """Builds the model registry, CompiledSerializer and Deserializer of this package on first use and
+    shares them between all client instances. Thread-safe.
+
+    :rtype: tuple of (:class:`CompiledSerializer<continuous_delivery.compiled_serializer.CompiledSerializer>`,
+     :class:`Deserializer<msrest.Deserializer>`)
+    """
+    global _codecs  # pylint: disable=global-statement
+    if _codecs is None:
+        with _codecs_lock:
+            if _codecs is None:
+                client_models = {k: v for k, v in models.__dict__.items() if isinstance(v, type)}
+                _codecs = (CompiledSerializer(client_models), Deserializer(client_models))
+    return _codecs
+
 
 class ContinuousDeliveryConfiguration(Configuration):
     """Configuration for Continuous Delivery
@@ -61,10 +87,10 @@ class ContinuousDelivery(object):
         self.config = ContinuousDeliveryConfiguration(api_version, base_url)
         self._client = ServiceClient(creds, self.config)
 
-        client_models = {k: v for k, v in models.__dict__.items() if isinstance(v, type)}
         self.api_version = '3.2' if not api_version else api_version
-        self._serialize = Serializer(client_models)
-        self._deserialize = Deserializer(client_models)
+        self._serialize, self._deserialize = get_codecs()
+        self.poll_cache = ProvisioningPollCache()
+        self.poll_statistics = PollStatistics()
 
     def provisioning_configuration(
             self, body, custom_headers=None, raw=False, **operation_config):
@@ -126,7 +152,8 @@ class ContinuousDelivery(object):
         return deserialized
 
     def get_provisioning_configuration(
-            self, provisioning_configuration_id, custom_headers=None, raw=False, **operation_config):
+            self, provisioning_configuration_id, custom_headers=None, raw=False, status_only=False,
+            **operation_config):
         """GetContinuousDeploymentOperation.
 
         :param provisioning_configuration_id:
@@ -134,6 +161,12 @@ class ContinuousDelivery(object):
         :param dict custom_headers: headers that will be added to the request
         :param bool raw: returns the direct response alongside the
          deserialized response
+        :param bool status_only: while the provisioning is pending, only read
+         the id, status and status message from the response. The returned
+         ProvisioningConfiguration then has only id and
+         ci_configuration.result set. Terminal states are fully deserialized.
+         Polls of a pending provisioning are conditional GETs, a 304 Not
+         Modified answer returns the previous result again.
         :param operation_config: :ref:`Operation configuration
          overrides<msrest:optionsforoperations>`.
         :rtype: :class:`ContinuousDeploymentOperation
@@ -154,27 +187,80 @@ class ContinuousDelivery(object):
         query_parameters = {}
 
         # Construct headers
+        poll_key = (provisioning_configuration_id, status_only)
+        conditional_headers, cached = self.poll_cache.get_conditional_request(poll_key)
         header_parameters = {}
         header_parameters['Content-Type'] = 'application/json; charset=utf-8'
+        header_parameters['Accept-Encoding'] = 'gzip'
+        header_parameters.update(conditional_headers)
         if custom_headers:
             header_parameters.update(custom_headers)
 
         # Construct and send request
         request = self._client.get(url, query_parameters)
         response = self._client.send(request, header_parameters, **operation_config)
-        if response.status_code not in [200]:
+        if response.status_code not in [200, 304] or (response.status_code == 304 and cached is None):
             print("GET", request.url, file=stderr)
             print("response:", response.status_code, file=stderr)
             print(response.text, file=stderr)
             raise HttpOperationError(self._deserialize, response)
+        self.poll_statistics.record(response.status_code, response.headers, len(response.content or b''))
 
         deserialized = None
 
         if response.status_code == 200:
-            deserialized = self._deserialize('ProvisioningConfiguration', response)
+            if status_only:
+                deserialized = deserialize_status_only(self._deserialize, _get_response_json(response))
+            else:
+                deserialized = self._deserialize('ProvisioningConfiguration', response)
+            self.poll_cache.update(poll_key, response.headers, deserialized, is_pending(deserialized))
+        if response.status_code == 304:
+            # Not modified, the provisioning is still pending
+            deserialized = cached
 
         if raw:
             client_raw_response = ClientRawResponse(deserialized, response)
             return client_raw_response
 
         return deserialized
+
+
+def _get_response_json(response):
+    # The msrest pipeline has usually parsed the body already
+    context = getattr(response, 'context', None)
+    if context and context.get('deserialized_data') is not None:
+        return context['deserialized_data']
+    text = response.text() if callable(response.text) else response.text
+    return json.loads(text)
+
+
+def is_pending(provisioning_configuration):
+    """Tells whether a provisioning configuration is still being set up.
+
+    :param provisioning_configuration: a ProvisioningConfiguration, or None
+    :rtype: bool
+    """
+    ci_configuration = getattr(provisioning_configuration, 'ci_configuration', None)
+    result = getattr(ci_configuration, 'result', None)
+    return getattr(result, 'status', None) in PENDING_STATUSES
+
+
+def deserialize_status_only(deserialize, data):
+    """Decodes a ProvisioningConfiguration response for polling. Pending
+    provisionings give a ProvisioningConfiguration with only the id and the
+    result, without walking the rest of the document. Other states, and
+    documents without a recognizable status, are fully deserialized.
+
+    :param deserialize: the Deserializer of the client
+    :param dict data: the parsed JSON document
+    :rtype: :class:`ProvisioningConfiguration
+     <continuous_delivery.models.ProvisioningConfiguration>`
+    """
+    ci_configuration = data.get('ciConfiguration') if isinstance(data, dict) else None
+    result = ci_configuration.get('result') if isinstance(ci_configuration, dict) else None
+    status = result.get('status') if isinstance(result, dict) else None
+    if status not in PENDING_STATUSES:
+        return deserialize('ProvisioningConfiguration', data)
+    return models.ProvisioningConfiguration(
+        id=data.get('id'),
+        ci_configuration=models.CiConfiguration(result=models.CiResult(status, result.get('statusMessage'))))
@@ -0,0 +1,110 @@
+# coding=utf-8
+# --------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+import threading
+from collections import OrderedDict
+
+DEFAULT_POLL_CACHE_SIZE = 4096
+
+
+class ProvisioningPollCache(object):
+    """Remembers the validators (ETag, Last-Modified) and the decoded
+    document of pending provisioning configurations, so later polls can be
+    conditional GETs. Entries are dropped once a provisioning leaves the
+    pending states, and the least recently polled entry is evicted when
+    max_size is exceeded. Thread-safe.
+
+    :param int max_size: maximum number of provisionings remembered
+    """
+
+    def __init__(self, max_size=DEFAULT_POLL_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_conditional_request(self, key):
+        """Returns the headers of a conditional GET and the document they
+        validate, to be used if the service answers 304 Not Modified.
+
+        :param key: hashable identity of the poll
+        :rtype: tuple of (dict, document), ({}, None) if nothing is cached
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return {}, None
+            self._entries[key] = entry
+        etag, last_modified, document = entry
+        if etag:
+            return {'If-None-Match': etag}, document
+        return {'If-Modified-Since': last_modified}, document
+
+    def update(self, key, headers, document, pending):
+        """Stores the validators of a 200 response while the provisioning is
+        pending, and forgets them otherwise.
+
+        :param key: hashable identity of the poll
+        :param headers: response headers
+        :param document: the decoded response
+        :param bool pending: whether the provisioning is still pending
+        """
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        with self._lock:
+            self._entries.pop(key, None)
+            if pending and (etag or last_modified):
+                self._entries[key] = (etag, last_modified, document)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class PollStatistics(object):
+    """Thread-safe counters of the provisioning status polls of a client.
+
+    :ivar int polls: number of status requests answered
+    :ivar int not_modified: number of 304 Not Modified answers
+    :ivar int bytes_received: response body bytes as sent on the wire,
+     compressed when the service compressed them
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.polls = 0
+        self.not_modified = 0
+        self.bytes_received = 0
+
+    @property
+    def not_modified_rate(self):
+        """Fraction of the polls answered with 304 Not Modified."""
+        with self._lock:
+            return float(self.not_modified) / self.polls if self.polls else 0.0
+
+    def record(self, status_code, headers, body_size):
+        """Counts one answered poll.
+
+        :param int status_code: HTTP status code of the answer
+        :param headers: response headers
+        :param int body_size: decoded body size, used when the answer has no
+         Content-Length
+        """
+        content_length = headers.get('Content-Length')
+        size = int(content_length) if content_length is not None else body_size
+        with self._lock:
+            self.polls += 1
+            self.bytes_received += size
+            if status_code == 304:
+                self.not_modified += 1
+
+    def reset(self):
+        with self._lock:
+            self.polls = 0
+            self.not_modified = 0
+            self.bytes_received = 0
@@ -16,8 +16,9 @@ VERSION = "1.0.2"
 # prerequisite: setuptools
 # http://pypi.python.org/pypi/setuptools
 
-REQUIRES = ["msrest>=0.2.0"]
-TEST_REQUIRES = ["msrest>=0.2.0", 'mock']
+REQUIRES = ["msrest>=0.6.0", "futures;python_version<'3.2'"]
+TEST_REQUIRES = ["msrest>=0.6.0", 'mock']
+EXTRAS_REQUIRE = {'async': ["msrest[async]>=0.6.0"], 'yaml': ["PyYAML"]}
 
 setup(
     name=NAME,
@@ -28,6 +29,7 @@ setup(
     keywords=["Microsoft", "VSTS", "Team Services", "SDK", "AzureTfs"],
     install_requires=REQUIRES,
     tests_require=TEST_REQUIRES,
+    extras_require=EXTRAS_REQUIRE,
     packages=find_packages(),
     include_package_data=True,
     long_description="""\
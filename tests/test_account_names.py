@@ -0,0 +1,60 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+from __future__ import print_function
+import unittest
+
+from aex_accounts import Account
+from aex_accounts.models import NameAvailability
+from mock import Mock, patch
+from vsts_cd_manager.account_names import get_accounts_existence, invalidate_account_existence
+from vsts_cd_manager.caching import TTLCache
+
+AEX_URL = 'https://app.vsaex.visualstudio.com'
+
+
+class TestAccountNames(unittest.TestCase):
+    def test_get_names_availability(self):
+        account = Account('4.0-preview.1', AEX_URL, None)
+        with patch.object(account, 'get_name_availability',
+                          side_effect=lambda name: NameAvailability(name, 'true' if name.startswith('free') else 'false')):
+            availabilities = account.get_names_availability(['free1', 'taken1', 'free2'], max_workers=2)
+            self.assertEqual(['free1', 'free2', 'taken1'], sorted(availabilities))
+            self.assertEqual('false', availabilities['taken1'].is_available)
+            self.assertTrue(account.account_exists('taken2'))
+            self.assertFalse(account.account_exists('free3'))
+        self.assertEqual({}, account.get_names_availability([]))
+
+    def test_get_accounts_existence(self):
+        cache = TTLCache(60)
+        account_client = Mock()
+        account_client.account_exists.return_value = True
+        account_client.get_names_availability.return_value = {
+            'account2': NameAvailability('account2', False, 'taken'),
+            'account3': NameAvailability('account3', True)}
+
+        self.assertEqual({'Account1': True}, get_accounts_existence(account_client, AEX_URL, ['Account1'], cache))
+        account_client.account_exists.assert_called_once_with('Account1')
+        existence = get_accounts_existence(account_client, AEX_URL, ['account1', 'account2', 'account3'], cache)
+        self.assertEqual({'account1': True, 'account2': True, 'account3': False}, existence)
+        account_client.get_names_availability.assert_called_once_with(['account2', 'account3'], 8)
+
+        # everything is cached now
+        get_accounts_existence(account_client, AEX_URL, ['account1', 'account2', 'account3'], cache)
+        self.assertEqual(1, account_client.account_exists.call_count)
+        self.assertEqual(1, account_client.get_names_availability.call_count)
+
+        invalidate_account_existence(AEX_URL, 'ACCOUNT3', cache)
+        call = Mock(side_effect=lambda operation, cost: operation())
+        get_accounts_existence(account_client, AEX_URL, ['account3'], cache, call=call)
+        self.assertEqual(2, account_client.account_exists.call_count)
+        self.assertEqual(1, call.call_args[0][1])
+
+        # nothing to check
+        get_accounts_existence(account_client, AEX_URL, ['account3'], cache, call=call)
+        self.assertEqual(1, call.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,221 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import warnings
+
+from benchmarks.fake_vsts_server import FakeVstsServer, get_local_endpoints
+from vsts_cd_manager.caching import TTLCache
+from vsts_cd_manager.circuit_breaker import CircuitBreaker
+from vsts_cd_manager.continuous_delivery_manager import ContinuousDeliveryManager
+from vsts_cd_manager.exceptions import CircuitOpenError
+from vsts_cd_manager.journal import ProvisioningJournal
+from vsts_cd_manager.polling import PollingStrategy
+from vsts_cd_manager.rate_limiter import RateLimiter
+from vsts_cd_manager.retry import RetryPolicy
+from vsts_cd_manager.setup_spec import ContinuousDeliverySetupSpec
+from vsts_cd_manager.vsts_info_cache import VstsInfoCache
+
+if sys.version_info >= (3, 5):
+    import asyncio
+    from msrest.exceptions import HttpOperationError
+    from aex_accounts.aio import AsyncAccount
+    from continuous_delivery.aio import AsyncContinuousDelivery
+    from vsts_cd_manager.aio import AsyncClientRegistry, AsyncContinuousDeliveryManager
+
+
+@unittest.skipIf(sys.version_info < (3, 5), 'asyncio clients need Python 3.5+')
+class TestAsyncContinuousDeliveryManager(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter('ignore', DeprecationWarning)
+        self.server = FakeVstsServer(queued_time=0.05, in_progress_time=0.05).start()
+        self.loop = asyncio.new_event_loop()
+        self.strategy = PollingStrategy(initial_interval=0.02, max_interval=0.05, timeout=10)
+
+    def tearDown(self):
+        self.loop.close()
+        self.server.stop()
+
+    def _get_manager(self, client_registry=None, circuit_breaker=None, **kwargs):
+        return AsyncContinuousDeliveryManager(None, self.strategy, client_registry,
+                                              vsts_info_cache=VstsInfoCache(), regions_cache=TTLCache(60),
+                                              name_availability_cache=TTLCache(60),
+                                              endpoints=get_local_endpoints(self.server.url),
+                                              retry_policy=RetryPolicy(initial_backoff=0.01),
+                                              rate_limiter=RateLimiter(rate=1000, burst=100),
+                                              circuit_breaker=circuit_breaker or CircuitBreaker(), **kwargs)
+
+    def _get_spec(self, index):
+        return ContinuousDeliverySetupSpec(
+            resource_group_name='group1', website_name='web{}'.format(index),
+            repo_url='https://account1.visualstudio.com/project1/_git/repo1',
+            app_type_details={'cd_app_type': 'AspNet'}, cd_project_url='https://account1.visualstudio.com',
+            vsts_app_auth_token='token1', subscription_id='sub1', subscription_name='subname1',
+            tenant_id='tenant1', webapp_location='South Central US', create_account=True)
+
+    def test_setup_continuous_delivery(self):
+        async def _setup():
+            async with self._get_manager() as cdman:
+                cdman.set_azure_web_info('group1', 'web1', None, 'sub1', 'subname1', 'tenant1', 'South Central US')
+                cdman.set_repository_info('https://account1.visualstudio.com/project1/_git/repo1', None, None, None,
+                                          None)
+                return await cdman.setup_continuous_delivery('staging', {'cd_app_type': 'AspNet'},
+                                                             'https://account1.visualstudio.com', True, 'token1',
+                                                             None, None)
+        result = self.loop.run_until_complete(_setup())
+        self.assertEqual('SUCCESS', result.status)
+        self.assertTrue(result.vsts_account_created)
+        self.assertEqual('project1', result.status_details.ci_configuration.project.name)
+        self.assertTrue('definitionId=' in result.vsts_release_def_url)
+        self.assertEqual(1, self.server.request_counts['collections'])
+        self.assertEqual(['validate', 'vsts_info', 'account', 'submit', 'queued', 'in_progress'],
+                         list(result.timings['phases']))
+        self.assertEqual(self.server.request_counts['provisioning_get'], result.timings['polls'])
+
+    def test_no_blocking_methods(self):
+        # Only the methods without service calls are shared, the async manager defines all others itself
+        self.assertFalse(issubclass(AsyncContinuousDeliveryManager, ContinuousDeliveryManager))
+        for name in vars(ContinuousDeliveryManager):
+            if not name.startswith('__') and hasattr(AsyncContinuousDeliveryManager, name):
+                self.assertTrue(name in vars(AsyncContinuousDeliveryManager), name)
+        self.assertFalse(hasattr(AsyncContinuousDeliveryManager, '_get_source_repository'))
+
+    def test_retries(self):
+        self.server.inject_faults('provisioning_post', [429])
+        self.server.inject_faults('provisioning_get', [502])
+        self.server.inject_faults('collections', [500], processed=True)
+
+        async def _setup():
+            async with self._get_manager() as cdman:
+                return await cdman.setup_continuous_delivery(spec=self._get_spec(0))
+        result = self.loop.run_until_complete(_setup())
+        self.assertTrue(result.vsts_account_created)
+        counts = self.server.request_counts
+        self.assertEqual(2, counts['provisioning_post'])
+        self.assertEqual(1, self.server.provisioning_count)
+        self.assertEqual(1, counts['collections'])
+
+    def test_circuit_breaker(self):
+        self.server.inject_faults('vsts_info', [503] * 10)
+        self.server.inject_faults('name_availability', [503] * 10)
+
+        async def _setup():
+            async with self._get_manager(circuit_breaker=CircuitBreaker(failure_threshold=2)) as cdman:
+                return await cdman.setup_continuous_delivery(spec=self._get_spec(0))
+        with self.assertRaises(CircuitOpenError):
+            self.loop.run_until_complete(_setup())
+        self.assertTrue(self.server.total_requests <= 3)
+
+    def test_resume_from_journal(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        async def _setup(journal, resume):
+            async with self._get_manager(journal=journal, resume=resume) as cdman:
+                return await cdman.setup_continuous_delivery(spec=self._get_spec(0))
+        with ProvisioningJournal(os.path.join(directory, 'journal.jsonl')) as journal:
+            first = self.loop.run_until_complete(_setup(journal, False))
+            resumed = self.loop.run_until_complete(_setup(journal, True))
+        self.assertEqual(1, self.server.request_counts['provisioning_post'])
+        self.assertEqual(first.vsts_build_def_url, resumed.vsts_build_def_url)
+        self.assertTrue(resumed.vsts_account_created)
+
+    def test_setup_continuous_delivery_batch(self):
+        async def _setup():
+            async with AsyncClientRegistry() as registry:
+                cdman = self._get_manager(registry)
+                outcomes = await cdman.setup_continuous_delivery_batch([self._get_spec(i) for i in range(6)], 3)
+                return outcomes, len(registry)
+        self.server.failure_rate = 0
+        outcomes, client_count = self.loop.run_until_complete(_setup())
+        self.assertEqual(['web{}'.format(i) for i in range(6)], [outcome.azure_website_name for outcome in outcomes])
+        # only the setup that created the account reports it
+        self.assertEqual(1, sum(outcome.vsts_account_created for outcome in outcomes))
+        counts = self.server.request_counts
+        self.assertEqual(6, counts['provisioning_post'])
+        self.assertEqual(1, counts['vsts_info'])
+        self.assertEqual(1, counts['regions'])
+        # the first wave shares one check and one creation, the creation invalidates the cached check once
+        self.assertEqual(1, counts['collections'])
+        self.assertEqual(2, counts['name_availability'])
+        self.assertEqual(3, client_count)
+
+    def test_iter_setup_continuous_delivery(self):
+        read = []
+
+        def _specs():
+            for i in range(6):
+                read.append(i)
+                yield self._get_spec(i)
+
+        async def _setup():
+            async with AsyncClientRegistry() as registry:
+                cdman = self._get_manager(registry)
+                outcomes = []
+                async for spec, outcome in cdman.iter_setup_continuous_delivery(_specs(), 2):
+                    # only the setups in flight and the one handed out are read ahead
+                    self.assertTrue(len(read) - len(outcomes) <= 3)
+                    outcomes.append((spec, outcome))
+                return outcomes
+        self.server.failure_rate = 0
+        outcomes = self.loop.run_until_complete(_setup())
+        self.assertEqual(6, len(outcomes))
+        for spec, outcome in outcomes:
+            self.assertEqual(spec.website_name, outcome.azure_website_name)
+        self.assertRaises(ValueError, self._get_manager().iter_setup_continuous_delivery, [], 0)
+
+    def test_failed_provisioning(self):
+        async def _setup():
+            async with self._get_manager() as cdman:
+                cdman.set_azure_web_info('group1', 'web1', None, 'sub1', 'subname1', 'tenant1', 'South Central US')
+                cdman.set_repository_info('https://github.com/org/repo', None, 'token1', None, None)
+                return await cdman.setup_continuous_delivery(None, {'cd_app_type': 'AspNet'},
+                                                             'https://account1.visualstudio.com', False, 'token1',
+                                                             None, None)
+        self.server.failure_rate = 1
+        with self.assertRaises(RuntimeError) as context:
+            self.loop.run_until_complete(_setup())
+        self.assertEqual('Provisioning failed.', str(context.exception))
+        self.assertEqual(0, self.server.request_counts['vsts_info'])
+
+    def test_clients(self):
+        async def _call():
+            async with AsyncAccount('4.0-preview.1', self.server.url + '/_aex') as account:
+                regions = await account.regions()
+                created = await account.create_account('account2', 'CUS')
+                exists = await account.account_exists('account2')
+            async with AsyncContinuousDelivery('3.2-preview.1', self.server.url + '/account2') as cd:
+                with self.assertRaises(HttpOperationError):
+                    await cd.get_provisioning_configuration('unknown')
+            return regions, created, exists
+        regions, created, exists = self.loop.run_until_complete(_call())
+        self.assertEqual(['CUS', 'SCUS'], [region.name for region in regions.value])
+        self.assertEqual('account2', created.name)
+        self.assertTrue(exists)
+
+    def test_names_availability_concurrency(self):
+        running = []
+        peak = []
+
+        async def _get_name_availability(name):
+            running.append(name)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(name)
+            return name
+
+        account = AsyncAccount('4.0-preview.1', self.server.url + '/_aex')
+        account.get_name_availability = _get_name_availability
+        names = ['name{}'.format(i) for i in range(20)]
+        availabilities = self.loop.run_until_complete(account.get_names_availability(names, max_workers=3))
+        self.assertEqual(dict(zip(names, names)), availabilities)
+        self.assertEqual(3, max(peak))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+from __future__ import print_function
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from vsts_info_provider.models import TeamProjectInfo, RepositoryInfo, CollectionInfo, VstsInfo
+from vsts_cd_manager.caching import FileCacheBackend, MemoryCacheBackend, TTLCache
+from vsts_cd_manager.vsts_info_cache import VstsInfoCache, create_vsts_info_file_backend, normalize_repo_url
+
+
+class TestCaching(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_ttl_and_lru(self):
+        clock = [0]
+        cache = TTLCache(10, MemoryCacheBackend(max_size=2), clock=lambda: clock[0])
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(1, cache.get('a'))
+        cache.set('c', 3)
+        # 'b' was the least recently used entry
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(2, len(cache))
+        clock[0] = 10
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual('x', cache.get('a', 'x'))
+        with self.assertRaises(ValueError):
+            TTLCache(0)
+
+    def test_get_or_load_single_flight(self):
+        cache = TTLCache(60)
+        calls = []
+        started = threading.Event()
+
+        def loader():
+            calls.append(1)
+            started.set()
+            time.sleep(0.05)
+            return 'value'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('key', loader)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(['value'] * 8, results)
+        self.assertEqual(1, len(calls))
+        self.assertEqual('value', cache.get_or_load('key', loader))
+        self.assertEqual(1, len(calls))
+
+    def test_get_or_load_errors_are_not_cached(self):
+        cache = TTLCache(60)
+
+        def failing_loader():
+            raise RuntimeError('boom')
+
+        with self.assertRaises(RuntimeError):
+            cache.get_or_load('key', failing_loader)
+        self.assertEqual(5, cache.get_or_load('key', lambda: 5))
+
+    def test_file_backend(self):
+        path = os.path.join(self.temp_dir, 'cache.json')
+        cache = TTLCache(60, FileCacheBackend(path))
+        cache.set(('url', 1), {'id': 'abc'})
+        reloaded = TTLCache(60, FileCacheBackend(path))
+        self.assertEqual({'id': 'abc'}, reloaded.get(('url', 1)))
+
+    def test_vsts_info_cache(self):
+        calls = []
+
+        def loader(repo_url, creds):
+            calls.append(repo_url)
+            return self._get_vsts_info()
+
+        cache = VstsInfoCache()
+        creds = object()
+        info = cache.get_vsts_info('https://Account1.visualstudio.com/project1/_git/repo222/', creds, loader)
+        self.assertEqual('222', info.repository_info.id)
+        cache.get_vsts_info('https://user@account1.visualstudio.com/project1/_git/repo222', creds, loader)
+        self.assertEqual(1, len(calls))
+        cache.get_vsts_info('https://account1.visualstudio.com/project1/_git/repo222', object(), loader)
+        self.assertEqual(2, len(calls))
+        self.assertEqual(1, cache.hits)
+        # the entries keep their credentials alive, so a later object cannot reuse their id
+        key = cache.get_key('https://account1.visualstudio.com/project1/_git/repo222', object())
+        self.assertIsNone(cache.get(key))
+        self.assertRaises(ValueError, VstsInfoCache, backend=create_vsts_info_file_backend(
+            os.path.join(self.temp_dir, 'unkeyed.json')))
+
+        path = os.path.join(self.temp_dir, 'vsts_info.json')
+        cache = VstsInfoCache(backend=create_vsts_info_file_backend(path), credential_key=lambda creds: 'user1')
+        cache.get_vsts_info('https://account1.visualstudio.com/project1/_git/repo222', creds, loader)
+        cache = VstsInfoCache(backend=create_vsts_info_file_backend(path), credential_key=lambda creds: 'user1')
+        info = cache.get_vsts_info('https://account1.visualstudio.com/project1/_git/repo222', creds, loader)
+        self.assertEqual(3, len(calls))
+        self.assertEqual('project1', info.repository_info.project_info.name)
+
+    def test_normalize_repo_url(self):
+        self.assertEqual('https://account1.visualstudio.com/project1/_git/repo',
+                         normalize_repo_url(' https://me@Account1.visualstudio.com/Project1/_git/Repo/?a=b#c'))
+
+    def _get_vsts_info(self):
+        collection_info = CollectionInfo('111', 'collection111', 'https://collection111.visualstudio.com')
+        project_info = TeamProjectInfo('333', 'project1', 'https://collection111.visualstudio.com/project1', 1, 1)
+        repository_info = RepositoryInfo('222', 'repo222', 'https://collection111.visualstudio.com/project1/_git/repo222',
+                                         project_info=project_info)
+        return VstsInfo('server1', collection_info, repository_info)
+
+
+if __name__ == '__main__':
+    unittest.main()
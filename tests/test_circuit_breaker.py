@@ -0,0 +1,91 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+from __future__ import print_function
+import unittest
+
+from mock import Mock
+from msrest.exceptions import ClientRequestError, HttpOperationError
+from requests import Response
+from requests.exceptions import ReadTimeout
+from vsts_cd_manager.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from vsts_cd_manager.exceptions import CircuitOpenError
+
+
+class _FakeClock(object):
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _http_error(status_code):
+    response = Response()
+    response.status_code = status_code
+    response._content = b'{}'
+    return HttpOperationError(Mock(), response)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = _FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=self.clock)
+        self.url = 'https://app.vsaex.visualstudio.com/_apis'
+
+    def _fail(self, error):
+        with self.assertRaises(type(error)):
+            self.breaker.call(self.url, Mock(side_effect=error))
+
+    def test_opens_after_consecutive_failures(self):
+        self._fail(_http_error(500))
+        self.assertEqual('ok', self.breaker.call(self.url, lambda: 'ok'))
+        # the success reset the count, client errors and throttling do not count
+        self._fail(_http_error(502))
+        self._fail(_http_error(404))
+        self._fail(_http_error(429))
+        self.assertEqual(CLOSED, self.breaker.get_circuit(self.url).state)
+        self._fail(ClientRequestError('timeout', ReadTimeout()))
+        self._fail(_http_error(503))
+        circuit = self.breaker.get_circuit(self.url)
+        self.assertEqual(OPEN, circuit.state)
+
+        operation = Mock()
+        with self.assertRaises(CircuitOpenError) as context:
+            self.breaker.call('https://APP.vsaex.visualstudio.com/other', operation)
+        self.assertEqual('app.vsaex.visualstudio.com', context.exception.host)
+        self.assertEqual(10, context.exception.retry_in)
+        self.assertEqual(0, operation.call_count)
+        # other hosts are not affected
+        self.assertEqual('ok', self.breaker.call('https://account1.portalext.visualstudio.com', lambda: 'ok'))
+
+    def test_half_open_probe(self):
+        self._fail(_http_error(500))
+        self._fail(_http_error(500))
+        self.clock.now += 10
+        circuit = self.breaker.get_circuit(self.url)
+        self.assertEqual(HALF_OPEN, circuit.state)
+
+        # a failed probe opens the circuit again
+        self._fail(_http_error(500))
+        self.assertEqual(OPEN, circuit.state)
+        self.clock.now += 10
+
+        # only one probe at a time
+        def _probe():
+            self.assertRaises(CircuitOpenError, self.breaker.call, self.url, lambda: 'second')
+            return 'probe'
+        self.assertEqual('probe', self.breaker.call(self.url, _probe))
+        self.assertEqual(CLOSED, circuit.state)
+        statistics = self.breaker.get_statistics()['app.vsaex.visualstudio.com']
+        self.assertEqual(2, statistics['opened'])
+        self.assertEqual(1, statistics['rejected'])
+
+    def test_invalid_arguments(self):
+        self.assertRaises(ValueError, CircuitBreaker, failure_threshold=0)
+        self.assertRaises(ValueError, CircuitBreaker, reset_timeout=-1)
+
+
+if __name__ == '__main__':
+    unittest.main()
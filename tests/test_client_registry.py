@@ -0,0 +1,96 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+from __future__ import print_function
+import unittest
+
+from continuous_delivery import ContinuousDelivery
+from aex_accounts import Account
+from mock import Mock
+from vsts_cd_manager.client_registry import ClientRegistry, get_default_client_registry, get_origin
+
+
+class TestClientRegistry(unittest.TestCase):
+    def test_get_client(self):
+        creds = Mock()
+        with ClientRegistry() as registry:
+            cd = registry.get_client(ContinuousDelivery, '3.2-preview.1', 'https://account1.portalext.visualstudio.com', creds)
+            self.assertTrue(cd.config.keep_alive)
+            self.assertIs(cd, registry.get_client(ContinuousDelivery, '3.2-preview.1',
+                                                  'https://account1.portalext.visualstudio.com', creds))
+            self.assertIsNot(cd, registry.get_client(ContinuousDelivery, '3.2-preview.1',
+                                                     'https://account2.portalext.visualstudio.com', creds))
+            self.assertIsNot(cd, registry.get_client(ContinuousDelivery, '3.2-preview.1',
+                                                     'https://account1.portalext.visualstudio.com', Mock()))
+            account = registry.get_client(Account, '4.0-preview.1', 'https://app.vsaex.visualstudio.com', creds)
+            self.assertIsInstance(account, Account)
+            self.assertEqual(4, len(registry))
+        self.assertEqual(0, len(registry))
+        self.assertFalse(cd.config.keep_alive)
+        with self.assertRaises(RuntimeError):
+            registry.get_client(Account, '4.0-preview.1', 'https://app.vsaex.visualstudio.com', creds)
+
+    def test_close(self):
+        client_class = Mock()
+        registry = ClientRegistry()
+        client = registry.get_client(client_class, '1.0', 'https://example.visualstudio.com', None)
+        client_class.assert_called_once_with('1.0', 'https://example.visualstudio.com', None)
+        registry.close()
+        client._client.close.assert_called_once_with()
+
+    def test_eviction(self):
+        now = [0.0]
+        client_class = Mock(side_effect=lambda *args: Mock())
+        registry = ClientRegistry(max_clients=2, idle_timeout=60, clock=lambda: now[0])
+        first = registry.get_client(client_class, '1.0', 'https://account1.visualstudio.com', Mock())
+        creds = Mock()
+        second = registry.get_client(client_class, '1.0', 'https://account2.visualstudio.com', creds)
+        # the least recently used client is closed beyond max_clients
+        registry.get_client(client_class, '1.0', 'https://account3.visualstudio.com', Mock())
+        self.assertEqual(2, len(registry))
+        first._client.close.assert_called_once_with()
+        self.assertEqual(0, second._client.close.call_count)
+        # as is a client not handed out for idle_timeout
+        now[0] = 50
+        self.assertIs(second, registry.get_client(client_class, '1.0', 'https://account2.visualstudio.com', creds))
+        now[0] = 100
+        self.assertIs(second, registry.get_client(client_class, '1.0', 'https://account2.visualstudio.com', creds))
+        self.assertEqual(1, len(registry))
+        self.assertRaises(ValueError, ClientRegistry, max_clients=0)
+
+    def test_checked_out_clients_close_on_release(self):
+        client_class = Mock(side_effect=lambda *args: Mock())
+        registry = ClientRegistry(max_clients=1)
+        with registry.client(client_class, '1.0', 'https://account1.visualstudio.com', None) as first:
+            # evicted while checked out, it stays open until released
+            registry.get_client(client_class, '1.0', 'https://account2.visualstudio.com', None)
+            self.assertEqual(1, len(registry))
+            self.assertEqual(0, first._client.close.call_count)
+        first._client.close.assert_called_once_with()
+        second = registry.checkout_client(client_class, '1.0', 'https://account2.visualstudio.com', None)
+        registry.close()
+        second._client.close.assert_called_once_with()
+        registry.release_client(second)
+        second._client.close.assert_called_once_with()
+
+    def test_get_origin(self):
+        self.assertEqual('https://account1.visualstudio.com',
+                         get_origin('https://Account1.visualstudio.com/project1/_git/repo1'))
+        self.assertEqual('http://127.0.0.1:8080', get_origin('http://127.0.0.1:8080/account1/project1/_git/repo1'))
+
+    def test_clients_share_codecs(self):
+        first = Account('4.0-preview.1', 'https://app.vsaex.visualstudio.com', None)
+        second = Account('4.0-preview.1', 'https://app.vsaex.visualstudio.com', None)
+        self.assertIs(first._deserialize, second._deserialize)
+        first = ContinuousDelivery('3.2-preview.1', 'https://account1.portalext.visualstudio.com', None)
+        second = ContinuousDelivery('3.2-preview.1', 'https://account2.portalext.visualstudio.com', None)
+        self.assertIs(first._serialize, second._serialize)
+        self.assertIs(first._deserialize, second._deserialize)
+
+    def test_default_registry(self):
+        self.assertIs(get_default_client_registry(), get_default_client_registry())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+import json
+import unittest
+
+from mock import patch
+from msrest import Serializer
+from msrest.exceptions import SerializationError
+from continuous_delivery import models
+from continuous_delivery.compiled_serializer import CompiledSerializer
+from continuous_delivery.continuous_delivery import get_codecs
+from continuous_delivery.models import (AuthorizationInfo, AuthorizationInfoParameters, BuildConfiguration,
+                                        CiArtifact, CiConfiguration, CreateOptions, ProvisioningConfiguration,
+                                        ProvisioningConfigurationSource, ProvisioningConfigurationTarget,
+                                        SlotSwapConfiguration, SourceRepository)
+
+CLIENT_MODELS = {k: v for k, v in models.__dict__.items() if isinstance(v, type)}
+
+
+def _get_target(name, auth_info, slot_swap=None, create_options=None):
+    return ProvisioningConfigurationTarget('azure', 'windowsAppService', 'production', 'Production', 'sub1',
+                                           'subname1', 'tenant1', name, 'group1', 'South Central US', auth_info,
+                                           slot_swap, create_options)
+
+
+def _get_payloads():
+    # Factories, since msrest may change the bodies it serializes
+    headers = lambda: AuthorizationInfo('Headers', AuthorizationInfoParameters('Bearer token'))
+    return [
+        lambda: ProvisioningConfiguration(),
+        lambda: ProvisioningConfiguration(
+            None,
+            ProvisioningConfigurationSource('codeRepository', SourceRepository('TfsGit', '222', 'refs/heads/master'),
+                                            BuildConfiguration('AspNetWap', None)),
+            [_get_target('web1', headers(), SlotSwapConfiguration('staging'))],
+            CiConfiguration(CiArtifact(name='project1'))),
+        lambda: ProvisioningConfiguration(
+            'abcd',
+            ProvisioningConfigurationSource(
+                'codeRepository',
+                SourceRepository('Github', 'org/repo', 'master',
+                                 AuthorizationInfo('PersonalAccessToken', AuthorizationInfoParameters(None, 'pat'))),
+                BuildConfiguration('Python', 'src', None, 'Django', 'Python353x64', 'Mod.settings', 'Flask')),
+            [_get_target('web1', headers()),
+             _get_target(u'tëst', headers(), None, CreateOptions('ServicePlan1', 'Standard', 'web1'))],
+            CiConfiguration(CiArtifact('1', 'project1', 'https://url'), CiArtifact('2', 'build'),
+                            CiArtifact('3', 'release'), models.CiResult('queued', u'mëssage'))),
+        # non str values in str fields, empty and sparse lists
+        lambda: ProvisioningConfiguration(
+            123, ProvisioningConfigurationSource('Git', SourceRepository('Git', 456, True,
+                AuthorizationInfo('UsernamePassword', AuthorizationInfoParameters(None, None, 'user', 'pw')))),
+            [None, _get_target('web2', None)], CiConfiguration()),
+        lambda: ProvisioningConfiguration(targets=[]),
+        # dicts in place of models are turned into models by msrest
+        lambda: ProvisioningConfiguration(targets=[{'provider': 'azure', 'resourceIdentifier': 'web3'}]),
+    ]
+
+
+class TestCompiledSerializer(unittest.TestCase):
+    def test_equivalent_to_msrest(self):
+        compiled = CompiledSerializer(CLIENT_MODELS)
+        reference = Serializer(CLIENT_MODELS)
+        for get_payload in _get_payloads():
+            expected = reference.body(get_payload(), 'ProvisioningConfiguration')
+            for _ in range(2):
+                actual = compiled.body(get_payload(), 'ProvisioningConfiguration')
+                self.assertEqual(json.dumps(expected), json.dumps(actual))
+
+    def test_models_skip_msrest(self):
+        compiled = CompiledSerializer(CLIENT_MODELS)
+        with patch.object(Serializer, 'body', side_effect=AssertionError('msrest used')):
+            for get_payload in _get_payloads()[:-1]:
+                compiled.body(get_payload(), 'ProvisioningConfiguration')
+            with self.assertRaises(AssertionError):
+                compiled.body(_get_payloads()[-1](), 'ProvisioningConfiguration')
+
+    def test_other_types_use_msrest(self):
+        compiled = CompiledSerializer(CLIENT_MODELS)
+        reference = Serializer(CLIENT_MODELS)
+        targets = [_get_target('web1', None), _get_target('web2', None)]
+        self.assertEqual(reference.body(targets, '[ProvisioningConfigurationTarget]'),
+                         compiled.body(targets, '[ProvisioningConfigurationTarget]'))
+        self.assertEqual(reference.body({'id': 'abcd'}, 'ProvisioningConfiguration'),
+                         compiled.body({'id': 'abcd'}, 'ProvisioningConfiguration'))
+        with self.assertRaises(SerializationError):
+            compiled.body(ProvisioningConfiguration(targets='web1'), 'ProvisioningConfiguration')
+
+    def test_client_uses_compiled_serializer(self):
+        self.assertIsInstance(get_codecs()[0], CompiledSerializer)
+
+
+if __name__ == '__main__':
+    unittest.main()
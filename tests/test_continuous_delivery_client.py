@@ -0,0 +1,108 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+import time
+import unittest
+
+from mock import Mock
+from benchmarks.fake_vsts_server import FakeVstsServer
+from continuous_delivery import ContinuousDelivery
+from continuous_delivery.continuous_delivery import get_codecs, deserialize_status_only
+from continuous_delivery.models import CiArtifact, CiConfiguration, ProvisioningConfiguration
+from continuous_delivery.poll_cache import ProvisioningPollCache
+
+
+class TestContinuousDeliveryClient(unittest.TestCase):
+    def test_deserialize_status_only(self):
+        deserialize = Mock()
+        config = deserialize_status_only(deserialize, {
+            'id': 'abcd', 'source': {'type': 'codeRepository'},
+            'ciConfiguration': {'project': {'id': '1'}, 'result': {'status': 'inProgress', 'statusMessage': 'm'}}})
+        self.assertEqual('abcd', config.id)
+        self.assertEqual('inProgress', config.ci_configuration.result.status)
+        self.assertEqual('m', config.ci_configuration.result.status_message)
+        self.assertEqual(None, config.source)
+        self.assertEqual(None, config.ci_configuration.project)
+        self.assertEqual(0, deserialize.call_count)
+
+        # terminal and unrecognized documents are fully deserialized
+        for data in [{'ciConfiguration': {'result': {'status': 'succeeded'}}}, {'ciConfiguration': None}, {}]:
+            self.assertEqual(deserialize.return_value, deserialize_status_only(deserialize, data))
+            deserialize.assert_called_with('ProvisioningConfiguration', data)
+
+        config = deserialize_status_only(get_codecs()[1], {'id': 'abcd', 'ciConfiguration': {
+            'project': {'id': '1'}, 'result': {'status': 'failed', 'statusMessage': 'bad things'}}})
+        self.assertEqual('1', config.ci_configuration.project.id)
+        self.assertEqual('bad things', config.ci_configuration.result.status_message)
+
+    def test_get_provisioning_configuration_status_only(self):
+        with FakeVstsServer(queued_time=0.05, in_progress_time=0) as server:
+            cd = ContinuousDelivery('3.2-preview.1', server.url + '/account1')
+            created = cd.provisioning_configuration(
+                ProvisioningConfiguration(ci_configuration=CiConfiguration(CiArtifact(name='project1'))))
+            raw_response = cd.get_provisioning_configuration(created.id, raw=True, status_only=True)
+            self.assertEqual(200, raw_response.response.status_code)
+            self.assertEqual(created.id, raw_response.output.id)
+            self.assertEqual('queued', raw_response.output.ci_configuration.result.status)
+            self.assertEqual(None, raw_response.output.ci_configuration.project)
+
+            time.sleep(0.1)
+            config = cd.get_provisioning_configuration(created.id, status_only=True)
+            self.assertEqual('succeeded', config.ci_configuration.result.status)
+            self.assertEqual('project1', config.ci_configuration.project.name)
+            self.assertTrue(config.ci_configuration.build_definition.id)
+
+    def test_get_provisioning_configuration_not_modified(self):
+        with FakeVstsServer(queued_time=0.3, in_progress_time=0) as server:
+            cd = ContinuousDelivery('3.2-preview.1', server.url + '/account1')
+            created = cd.provisioning_configuration(
+                ProvisioningConfiguration(ci_configuration=CiConfiguration(CiArtifact(name='project1'))))
+            first = cd.get_provisioning_configuration(created.id, raw=True, status_only=True)
+            self.assertEqual(200, first.response.status_code)
+            self.assertEqual('gzip', first.response.headers['Content-Encoding'])
+            self.assertTrue(first.response.headers['ETag'])
+
+            # nothing changed, the service answers 304 and the previous result is returned
+            second = cd.get_provisioning_configuration(created.id, raw=True, status_only=True)
+            self.assertEqual(304, second.response.status_code)
+            self.assertIs(first.output, second.output)
+            self.assertEqual(1, server.not_modified_count)
+
+            time.sleep(0.35)
+            final = cd.get_provisioning_configuration(created.id, raw=True, status_only=True)
+            self.assertEqual(200, final.response.status_code)
+            self.assertEqual('succeeded', final.output.ci_configuration.result.status)
+            # terminal states are not remembered
+            self.assertEqual(0, len(cd.poll_cache))
+
+            stats = cd.poll_statistics
+            self.assertEqual(3, stats.polls)
+            self.assertEqual(1, stats.not_modified)
+            self.assertAlmostEqual(1.0 / 3, stats.not_modified_rate)
+            # the creation answer is the rest of the bytes sent
+            self.assertTrue(0 < stats.bytes_received < server.bytes_sent)
+
+    def test_poll_cache(self):
+        cache = ProvisioningPollCache(max_size=2)
+        self.assertEqual(({}, None), cache.get_conditional_request('a'))
+        cache.update('a', {'ETag': '"1"', 'Last-Modified': 'date'}, 'doc a', True)
+        self.assertEqual(({'If-None-Match': '"1"'}, 'doc a'), cache.get_conditional_request('a'))
+        cache.update('b', {'Last-Modified': 'date'}, 'doc b', True)
+        self.assertEqual(({'If-Modified-Since': 'date'}, 'doc b'), cache.get_conditional_request('b'))
+
+        # without validators or once terminal, nothing is remembered
+        cache.update('c', {}, 'doc c', True)
+        cache.update('b', {'ETag': '"2"'}, 'doc b', False)
+        self.assertEqual(1, len(cache))
+
+        # the least recently polled entry is evicted
+        cache.update('b', {'ETag': '"2"'}, 'doc b', True)
+        cache.get_conditional_request('a')
+        cache.update('d', {'ETag': '"3"'}, 'doc d', True)
+        self.assertEqual(({}, None), cache.get_conditional_request('b'))
+        self.assertEqual('doc a', cache.get_conditional_request('a')[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@
 # --------------------------------------------------------------------------------------------
 from __future__ import print_function
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
 from continuous_delivery.models import CiResult
 
@@ -15,9 +16,15 @@ from continuous_delivery.models import ProvisioningConfigurationSource
 
 from continuous_delivery.models import ProvisioningConfiguration
 from mock import patch, Mock
+from msrest.pipeline import ClientRawResponse
+from requests import Response
 from aex_accounts.models import Collection
 from vsts_info_provider.models import TeamProjectInfo, RepositoryInfo, CollectionInfo, VstsInfo
-from vsts_cd_manager.continuous_delivery_manager import ContinuousDeliveryManager
+from vsts_cd_manager.continuous_delivery_manager import ContinuousDeliveryManager, ContinuousDeliverySetupSpec
+from vsts_cd_manager.exceptions import ProvisioningTimeoutError
+from vsts_cd_manager.polling import PollingStrategy
+from vsts_cd_manager.status_poller import ProvisioningStatusPoller
+from vsts_cd_manager.vsts_info_cache import VstsInfoCache
 
 
 class TestContinousDeliveryManager(unittest.TestCase):
@@ -71,10 +78,12 @@ class TestContinousDeliveryManager(unittest.TestCase):
     def test_setup_continuous_delivery___create_account(self, mock_account, mock_cd):
         # Mock the CD Client
         mocked_cd = mock_cd.return_value
+        mocked_cd.config.base_url = 'https://account1.portalext.visualstudio.com'
         mocked_cd.provisioning_configuration.return_value = self._get_provisioning_config('queued', '')
-        mocked_cd.get_provisioning_configuration.return_value = self._get_provisioning_config('succeeded', '')
+        mocked_cd.get_provisioning_configuration.return_value = self._get_raw_provisioning_config('succeeded', '')
         # Mock the Account Client
         mocked_account = mock_account.return_value
+        mocked_account.config.base_url = 'https://app.vssps.visualstudio.com'
         mocked_account.create_account.return_value = Collection('111', 'collection111')
         mocked_account.account_exists.return_value = False
         # create CD manager
@@ -107,6 +116,253 @@ class TestContinousDeliveryManager(unittest.TestCase):
             cdman.setup_continuous_delivery('staging', app_type_details, "https://account1.visualstudio.com", True, 'token2', None, None)
         self.assertTrue('Account creation failed' in str(context.exception))
 
+        # existing accounts are not created again
+        mocked_account.account_exists.return_value = True
+        mocked_account.create_account.reset_mock()
+        result = cdman.setup_continuous_delivery('staging', app_type_details, "https://account1.visualstudio.com", True, 'token2', None, None)
+        self.assertEqual(False, result.vsts_account_created)
+        self.assertTrue("The Team Services account 'https://account1.visualstudio.com' was updated" in result.status_message)
+        self.assertEqual(0, mocked_account.create_account.call_count)
+
+    @patch("vsts_cd_manager.continuous_delivery_manager.ContinuousDelivery")
+    def test_setup_continuous_delivery_batch(self, mock_cd):
+        # Mock the CD Client
+        mocked_cd = mock_cd.return_value
+        mocked_cd.config.base_url = 'https://account1.portalext.visualstudio.com'
+        mocked_cd.provisioning_configuration.return_value = self._get_provisioning_config('queued', '')
+        mocked_cd.get_provisioning_configuration.return_value = self._get_raw_provisioning_config('succeeded', '')
+        cdman = ContinuousDeliveryManager(None)
+        good_details = self.create_cd_app_type_details_map('AspNet', None, None, None, None)
+        bad_details = self.create_cd_app_type_details_map('UnacceptedAppType', None, None, None, None)
+        specs = [self._get_setup_spec('web{}'.format(i), bad_details if i == 2 else good_details) for i in range(5)]
+
+        results = cdman.setup_continuous_delivery_batch(specs, max_workers=3)
+        self.assertEqual(5, len(results))
+        for i, result in enumerate(results):
+            if i == 2:
+                self.assertIsInstance(result, RuntimeError)
+                self.assertTrue('UnacceptedAppType' in str(result))
+            else:
+                self.assertEqual('SUCCESS', result.status)
+                self.assertEqual('web{}'.format(i), result.azure_website_name)
+        self.assertEqual(4, mocked_cd.provisioning_configuration.call_count)
+        self.assertEqual([], cdman.setup_continuous_delivery_batch([]))
+
+        # the shared status poller does the waiting for all sites
+        with ProvisioningStatusPoller(max_workers=1) as poller:
+            cdman = ContinuousDeliveryManager(None, status_poller=poller)
+            results = cdman.setup_continuous_delivery_batch(specs, max_workers=2)
+            self.assertIsInstance(results[2], RuntimeError)
+            self.assertEqual(['SUCCESS'] * 4, [r.status for i, r in enumerate(results) if i != 2])
+            cdman.set_azure_web_info('group1', 'web1', 'fakeCreds', 'sub1', 'subname1', 'tenant1', 'South Central US')
+            cdman.set_repository_info('repoUrl1', 'master1', 'token1', None, None)
+            result = cdman.setup_continuous_delivery('staging', good_details, 'https://account1.visualstudio.com',
+                                                     False, 'token2', None, None)
+            self.assertEqual('SUCCESS', result.status)
+
+    @patch("vsts_cd_manager.continuous_delivery_manager.ContinuousDelivery")
+    def test_iter_setup_continuous_delivery(self, mock_cd):
+        mocked_cd = mock_cd.return_value
+        mocked_cd.config.base_url = 'https://account1.portalext.visualstudio.com'
+        mocked_cd.provisioning_configuration.return_value = self._get_provisioning_config('queued', '')
+        mocked_cd.get_provisioning_configuration.return_value = self._get_raw_provisioning_config('succeeded', '')
+        cdman = ContinuousDeliveryManager(None)
+        good_details = self.create_cd_app_type_details_map('AspNet', None, None, None, None)
+        bad_details = self.create_cd_app_type_details_map('UnacceptedAppType', None, None, None, None)
+        read = []
+
+        def _specs():
+            for i in range(20):
+                read.append(i)
+                yield self._get_setup_spec('web{}'.format(i), bad_details if i == 7 else good_details)
+
+        outcomes = {}
+        for spec, outcome in cdman.iter_setup_continuous_delivery(_specs(), max_workers=2, max_in_flight=3):
+            outcomes[spec.website_name] = outcome
+            # the specs are read as the setups complete
+            self.assertTrue(len(read) - len(outcomes) <= 3)
+        self.assertEqual(20, len(outcomes))
+        self.assertIsInstance(outcomes['web7'], RuntimeError)
+        self.assertEqual('SUCCESS', outcomes['web8'].status)
+
+        # closing the iterator early stops reading the specs
+        del read[:]
+        iterator = cdman.iter_setup_continuous_delivery(_specs(), max_workers=1, max_in_flight=2)
+        next(iterator)
+        iterator.close()
+        self.assertTrue(len(read) <= 3)
+        self.assertRaises(ValueError, cdman.iter_setup_continuous_delivery, [], max_in_flight=0)
+
+    @patch("vsts_cd_manager.continuous_delivery_manager.ContinuousDelivery")
+    def test_setup_continuous_delivery___spec(self, mock_cd):
+        mocked_cd = mock_cd.return_value
+        mocked_cd.config.base_url = 'https://account1.portalext.visualstudio.com'
+        mocked_cd.provisioning_configuration.return_value = self._get_provisioning_config('queued', '')
+        mocked_cd.get_provisioning_configuration.return_value = self._get_raw_provisioning_config('succeeded', '')
+        cdman = ContinuousDeliveryManager(None)
+        cdman.set_azure_web_info('group0', 'web0', 'fakeCreds', 'sub0', 'subname0', 'tenant0', 'West US')
+        good_details = self.create_cd_app_type_details_map('AspNet', None, None, None, None)
+
+        # one manager serves setups for many sites from several threads
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(
+                lambda i: cdman.setup_continuous_delivery(spec=self._get_setup_spec('web{}'.format(i), good_details)),
+                range(8)))
+        self.assertEqual(['web{}'.format(i) for i in range(8)], [result.azure_website_name for result in results])
+        configs = [call[0][0] for call in mocked_cd.provisioning_configuration.call_args_list]
+        self.assertEqual(set('web{}'.format(i) for i in range(8)),
+                         set(config.targets[0].resource_identifier for config in configs))
+        self.assertEqual(set(['Github']), set(config.source.repository.type for config in configs))
+        # the values of the setters are left alone
+        self.assertEqual('web0', cdman._azure_info.website_name)
+        self.assertEqual(None, cdman._repo_info.url)
+
+    @patch("vsts_cd_manager.stage_graph.ThreadPoolExecutor", side_effect=AssertionError('no stage thread'))
+    @patch("vsts_cd_manager.continuous_delivery_manager.ContinuousDelivery")
+    def test_setup_continuous_delivery___no_stage_threads(self, mock_cd, mock_executor):
+        mocked_cd = mock_cd.return_value
+        mocked_cd.config.base_url = 'https://account1.portalext.visualstudio.com'
+        mocked_cd.provisioning_configuration.return_value = self._get_provisioning_config('queued', '')
+        mocked_cd.get_provisioning_configuration.return_value = self._get_raw_provisioning_config('succeeded', '')
+        cdman = ContinuousDeliveryManager(None)
+        good_details = self.create_cd_app_type_details_map('AspNet', None, None, None, None)
+        # a Github repository needs no lookup and no account is created, so no stage needs a thread
+        result = cdman.setup_continuous_delivery(spec=self._get_setup_spec('web1', good_details))
+        self.assertEqual('SUCCESS', result.status)
+        self.assertEqual(0, mock_executor.call_count)
+
+    def test_wait_for_cd_completion(self):
+        sleeps = []
+        clock = [0]
+        def fake_sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+        strategy = PollingStrategy(initial_interval=1, multiplier=2, max_interval=4, jitter=0, timeout=20,
+                                   sleep=fake_sleep, clock=lambda: clock[0])
+        cdman = ContinuousDeliveryManager(None, strategy)
+        cd = Mock()
+        cd.config.base_url = 'https://account1.portalext.visualstudio.com'
+        cd.get_provisioning_configuration.side_effect = [
+            self._get_raw_provisioning_config('queued', ''),
+            self._get_raw_provisioning_config('inProgress', '', {'Retry-After': '3'}),
+            self._get_raw_provisioning_config('inProgress', ''),
+            self._get_raw_provisioning_config('succeeded', '')]
+        config = cdman._wait_for_cd_completion(cd, self._get_provisioning_config('queued', ''))
+        self.assertEqual('succeeded', config.ci_configuration.result.status)
+        # immediate first check, then backoff where Retry-After extends the second interval
+        self.assertEqual([1, 3, 4], sleeps)
+        self.assertEqual(4, cd.get_provisioning_configuration.call_count)
+
+        # a status that never completes runs into the deadline
+        clock[0] = 0
+        cd.get_provisioning_configuration.side_effect = None
+        cd.get_provisioning_configuration.return_value = self._get_raw_provisioning_config('inProgress', '')
+        with self.assertRaises(ProvisioningTimeoutError) as context:
+            cdman._wait_for_cd_completion(cd, self._get_provisioning_config('queued', ''))
+        self.assertEqual('abcd', context.exception.provisioning_configuration_id)
+        self.assertEqual('inProgress', context.exception.status)
+        self.assertEqual(20, clock[0])
+
+        # failed provisionings raise the status message
+        cd.get_provisioning_configuration.return_value = self._get_raw_provisioning_config('failed', 'bad things')
+        with self.assertRaises(RuntimeError) as context:
+            cdman._wait_for_cd_completion(cd, self._get_provisioning_config('queued', ''))
+        self.assertEqual('bad things', str(context.exception))
+
+    @patch("vsts_cd_manager.continuous_delivery_manager.ContinuousDelivery")
+    @patch("vsts_cd_manager.continuous_delivery_manager.Account")
+    def test_setup_continuous_delivery___tfs_git(self, mock_account, mock_cd):
+        mocked_cd = mock_cd.return_value
+        mocked_cd.config.base_url = 'https://account1.portalext.visualstudio.com'
+        mocked_cd.provisioning_configuration.return_value = self._get_provisioning_config('queued', '')
+        mocked_cd.get_provisioning_configuration.return_value = self._get_raw_provisioning_config('succeeded', '')
+        mocked_account = mock_account.return_value
+        mocked_account.config.base_url = 'https://app.vssps.visualstudio.com'
+        mocked_account.create_account.return_value = Collection('111', 'collection111')
+        mocked_account.account_exists.return_value = False
+        cdman = ContinuousDeliveryManager(None, vsts_info_cache=VstsInfoCache())
+        cdman._get_vsts_info = self._mock_get_vsts_info
+        cdman.set_azure_web_info('group1', 'web1', 'fakeCreds', 'sub1', 'subname1', 'tenant1', 'South Central US')
+        cdman.set_repository_info('https://account2.visualstudio.com/project1/_git/repo222', None, None, None, None)
+        app_type_details = self.create_cd_app_type_details_map('AspNet', None, None, None, None)
+        result = cdman.setup_continuous_delivery(None, app_type_details, "https://account2.visualstudio.com", True, 'token2', None, None)
+        self.assertEqual('SUCCESS', result.status)
+        self.assertEqual(True, result.vsts_account_created)
+        config = mocked_cd.provisioning_configuration.call_args[0][0]
+        self.assertEqual('TfsGit', config.source.repository.type)
+        self.assertEqual('222', config.source.repository.identifier)
+        self.assertEqual('refs/heads/master', config.source.repository.default_branch)
+        self.assertEqual('project1', config.ci_configuration.project.name)
+        self.assertEqual('Bearer token2', config.targets[0].authorization_info.parameters.authorization)
+
+    def test_get_source_repository_caches_vsts_info(self):
+        cdman = ContinuousDeliveryManager(None, vsts_info_cache=VstsInfoCache())
+        cdman._get_vsts_info = Mock(side_effect=self._mock_get_vsts_info)
+        for _ in range(3):
+            source_repository, account_name, _ = cdman._get_source_repository(
+                'https://account1.visualstudio.com/project1/_git/repo222', None, 'master', 'fakeCreds', None, None)
+            self.assertEqual('TfsGit', source_repository.type)
+            self.assertEqual('222', source_repository.identifier)
+            self.assertEqual('account1', account_name)
+        self.assertEqual(1, cdman._get_vsts_info.call_count)
+
+    def test_get_source_repository___ssh_remote(self):
+        cdman = ContinuousDeliveryManager(None, vsts_info_cache=VstsInfoCache())
+        cdman._get_vsts_info = Mock(side_effect=self._mock_get_vsts_info)
+        source_repository, account_name, team_project_name = cdman._get_source_repository(
+            'git@ssh.dev.azure.com:v3/org1/project1/repo222', None, 'master', 'fakeCreds', None, None)
+        self.assertEqual('TfsGit', source_repository.type)
+        self.assertEqual('222', source_repository.identifier)
+        self.assertEqual('org1', account_name)
+        self.assertEqual('project1', team_project_name)
+        # the repository is looked up with its https url
+        cdman._get_vsts_info.assert_called_once_with('https://dev.azure.com/org1/project1/_git/repo222', 'fakeCreds')
+
+    def test_plan_continuous_delivery(self):
+        cdman = ContinuousDeliveryManager(None, vsts_info_cache=VstsInfoCache())
+        cdman._get_vsts_info = Mock(side_effect=AssertionError('no service call while planning'))
+        specs = [
+            ContinuousDeliverySetupSpec(
+                resource_group_name='group1', website_name='web1', repo_url='https://github.com/org/repo1',
+                app_type_details={'cd_app_type': 'NodeJS', 'nodejs_task_runner': 'Gulp'},
+                cd_project_url='https://account1.visualstudio.com', vsts_app_auth_token='token1',
+                subscription_id='sub1', git_token='gittoken1', swap_with_slot='staging'),
+            ContinuousDeliverySetupSpec(
+                resource_group_name='group1', website_name='web2',
+                repo_url='https://account1.visualstudio.com/project1/_git/repo222',
+                app_type_details={'cd_app_type': 'AspNet'}, cd_project_url='https://account1.visualstudio.com',
+                vsts_app_auth_token='token1', subscription_id='sub1'),
+            ContinuousDeliverySetupSpec(
+                resource_group_name='group1', website_name='web3', repo_url='https://github.com/org/repo3',
+                app_type_details={'cd_app_type': 'Cobol'}, cd_project_url='https://account1.visualstudio.com',
+                vsts_app_auth_token='token1', subscription_id='sub1'),
+        ]
+        plans = list(cdman.plan_continuous_delivery(iter(specs)))
+        self.assertEqual(specs, [spec for spec, _ in plans])
+        body = plans[0][1]
+        self.assertEqual('Github', body['source']['repository']['type'])
+        self.assertEqual('org/repo1', body['source']['repository']['id'])
+        self.assertEqual('***', body['source']['repository']['authorizationInfo']['parameters']['AccessToken'])
+        self.assertEqual('Gulp', body['source']['buildConfiguration']['NodeJsTaskRunner'])
+        self.assertEqual('Bearer ***', body['targets'][0]['authorizationInfo']['parameters']['Authorization'])
+        self.assertEqual('staging', body['targets'][0]['slotSwapConfiguration']['slotName'])
+        self.assertEqual('web1', body['ciConfiguration']['project']['name'])
+        # the repository of web2 is not cached, and web3 is not valid
+        self.assertTrue(isinstance(plans[1][1], RuntimeError))
+        self.assertTrue(isinstance(plans[2][1], RuntimeError))
+
+        plans = list(cdman.plan_continuous_delivery(specs[1:2], self._mock_get_vsts_info, redact=False))
+        body = plans[0][1]
+        self.assertEqual('222', body['source']['repository']['id'])
+        self.assertEqual('project1', body['ciConfiguration']['project']['name'])
+        self.assertEqual('Bearer token1', body['targets'][0]['authorizationInfo']['parameters']['Authorization'])
+
+        # the service plan of a new test web app is named after the spec, so the plans of a spec do not differ
+        spec = specs[0]._replace(test='web1-load', webapp_list=[])
+        first, second = [body for _, body in cdman.plan_continuous_delivery([spec, spec])]
+        self.assertEqual(first, second)
+        self.assertTrue(first['targets'][1]['createOptions']['appServicePlanName'].startswith('ServicePlan'))
+
     def test_get_provisioning_configuration_target(self):
         cdman = ContinuousDeliveryManager(None)
         cdman.set_azure_web_info('group1', 'web1', 'fakeCreds', 'sub1', 'subname1', 'tenant1', 'South Central US')
@@ -180,10 +436,20 @@ class TestContinousDeliveryManager(unittest.TestCase):
         elif(i==7):
             return 'NodeJS', 'UnexpectedNodeJSTaskRunner', None, None, None
     
+    def _get_setup_spec(self, website_name, app_type_details):
+        return ContinuousDeliverySetupSpec(resource_group_name='group1', website_name=website_name,
+                                           repo_url='https://github.com/org1/repo1', app_type_details=app_type_details,
+                                           cd_project_url='https://account1.visualstudio.com',
+                                           vsts_app_auth_token='token2', credentials='fakeCreds',
+                                           subscription_id='sub1', subscription_name='subname1',
+                                           tenant_id='tenant1', webapp_location='South Central US',
+                                           swap_with_slot='staging', branch='master1', git_token='token1')
+
     def _mock_get_vsts_info(self, vsts_repo_url, cred):
         collection_info = CollectionInfo('111', 'collection111', 'https://collection111.visualstudio.com')
         project_info = TeamProjectInfo('333', 'project1', 'https://collection111.visualstudio.com/project1', 'good', '1')
-        repository_info = RepositoryInfo('222', 'repo222', 'https://collection111.visualstudio.com/project1/_git/repo222', project_info)
+        repository_info = RepositoryInfo('222', 'repo222', 'https://collection111.visualstudio.com/project1/_git/repo222',
+                                         project_info=project_info)
         return VstsInfo('server1', collection_info, repository_info)
 
     def _get_provisioning_config(self, status, status_message):
@@ -194,6 +460,12 @@ class TestContinousDeliveryManager(unittest.TestCase):
             CiResult(status, status_message))
         return ProvisioningConfiguration('abcd', None, None, ci_config)
 
+    def _get_raw_provisioning_config(self, status, status_message, headers=None):
+        response = Response()
+        response.status_code = 200
+        response.headers.update(headers or {})
+        return ClientRawResponse(self._get_provisioning_config(status, status_message), response)
+
     def create_cd_app_type_details_map(self, cd_app_type, nodejs_task_runner, python_framework, python_version, app_working_dir):
         return {
             'cd_app_type' : cd_app_type,
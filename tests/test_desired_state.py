@@ -0,0 +1,61 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+from __future__ import print_function
+import os
+import shutil
+import tempfile
+import unittest
+
+from continuous_delivery.models import (AuthorizationInfo, AuthorizationInfoParameters, BuildConfiguration,
+                                        CiArtifact, CiConfiguration, CreateOptions, ProvisioningConfiguration,
+                                        ProvisioningConfigurationSource, ProvisioningConfigurationTarget,
+                                        SourceRepository)
+from vsts_cd_manager.desired_state import DesiredStateStore, get_provisioning_configuration_hash, get_site_key
+
+
+def _get_configuration(token='token1', branch='refs/heads/master', create_options=None):
+    auth_info = AuthorizationInfo('Headers', AuthorizationInfoParameters('Bearer ' + token))
+    source = ProvisioningConfigurationSource(
+        'codeRepository', SourceRepository('Github', 'org/repo', branch,
+                                           AuthorizationInfo('PersonalAccessToken',
+                                                             AuthorizationInfoParameters(None, token))),
+        BuildConfiguration('AspNetWap'))
+    target = ProvisioningConfigurationTarget('azure', 'windowsAppService', 'production', 'Production', 'sub1',
+                                             'subname1', 'tenant1', 'web1', 'group1', 'South Central US',
+                                             auth_info, None, create_options)
+    return ProvisioningConfiguration(None, source, [target], CiConfiguration(CiArtifact(name='web1')))
+
+
+class TestDesiredState(unittest.TestCase):
+    def test_get_provisioning_configuration_hash(self):
+        config_hash = get_provisioning_configuration_hash(_get_configuration())
+        # tokens and create options change between runs
+        self.assertEqual(config_hash, get_provisioning_configuration_hash(_get_configuration(token='token2')))
+        self.assertEqual(config_hash, get_provisioning_configuration_hash(
+            _get_configuration(create_options=CreateOptions('ServicePlan1', 'Standard', 'web1'))))
+        self.assertNotEqual(config_hash,
+                            get_provisioning_configuration_hash(_get_configuration(branch='refs/heads/dev')))
+
+    def test_store(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'state.jsonl')
+        site_key = get_site_key('Sub1', 'Group1', 'Web1')
+        self.assertEqual('sub1/group1/web1', site_key)
+        with DesiredStateStore(path) as store:
+            store.set(site_key, 'hash1', 'id1')
+            store.set(site_key, 'hash2', 'id2')
+        with DesiredStateStore(path) as store:
+            self.assertEqual(1, len(store))
+            self.assertEqual('hash2', store.get(site_key)['config_hash'])
+            self.assertEqual('id2', store.get(site_key)['provisioning_configuration_id'])
+            self.assertIsNone(store.get('sub1/group1/web2'))
+        store = DesiredStateStore()
+        store.set(site_key, 'hash1', 'id1')
+        self.assertEqual('id1', store.get(site_key)['provisioning_configuration_id'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,315 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+from __future__ import print_function
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+
+from msrest.exceptions import HttpOperationError
+from benchmarks.bench_setup import SetupBenchmark, get_site_spec, percentile
+from benchmarks.fake_vsts_server import FakeVstsServer, get_local_endpoints
+from vsts_cd_manager.caching import TTLCache
+from vsts_cd_manager.circuit_breaker import CircuitBreaker
+from vsts_cd_manager.client_registry import ClientRegistry
+from vsts_cd_manager.continuous_delivery_manager import ContinuousDeliveryManager
+from vsts_cd_manager.desired_state import DesiredStateStore, get_site_key
+from vsts_cd_manager.exceptions import CircuitOpenError, ProvisioningTimeoutError, UnconfirmedSubmissionError
+from vsts_cd_manager.journal import ProvisioningJournal
+from vsts_cd_manager.polling import PollingStrategy
+from vsts_cd_manager.rate_limiter import RateLimiter
+from vsts_cd_manager.retry import RetryPolicy
+from vsts_cd_manager.setup_spec import get_setup_spec_hash
+from vsts_cd_manager.status_poller import ProvisioningStatusPoller
+from vsts_cd_manager.vsts_info_cache import VstsInfoCache
+
+
+class TestEndToEnd(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter('ignore', DeprecationWarning)
+        self.server = FakeVstsServer(queued_time=0.05, in_progress_time=0.05).start()
+        self.registry = ClientRegistry(transport_retries=0)
+        self.strategy = PollingStrategy(initial_interval=0.02, max_interval=0.05, timeout=10)
+
+    def tearDown(self):
+        self.registry.close()
+        self.server.stop()
+
+    def _get_manager(self, rate_limiter=None, circuit_breaker=None, strategy=None, **kwargs):
+        cdman = ContinuousDeliveryManager(None, strategy or self.strategy, client_registry=self.registry,
+                                          vsts_info_cache=VstsInfoCache(), regions_cache=TTLCache(60),
+                                          name_availability_cache=TTLCache(60),
+                                          endpoints=get_local_endpoints(self.server.url),
+                                          retry_policy=RetryPolicy(initial_backoff=0.01),
+                                          rate_limiter=rate_limiter or RateLimiter(rate=1000, burst=100),
+                                          circuit_breaker=circuit_breaker or CircuitBreaker(), **kwargs)
+        cdman.set_azure_web_info('group1', 'web1', None, 'sub1', 'subname1', 'tenant1', 'South Central US')
+        cdman.set_repository_info('https://account1.visualstudio.com/project1/_git/repo1', None, None, None, None)
+        return cdman
+
+    def test_setup_continuous_delivery(self):
+        app_type_details = {'cd_app_type': 'Python', 'python_framework': 'Flask', 'python_version': 'Python 3.5.3 x64'}
+        cdman = self._get_manager()
+        result = cdman.setup_continuous_delivery('staging', app_type_details, 'https://account1.visualstudio.com',
+                                                 True, 'token1', None, None)
+        self.assertEqual('SUCCESS', result.status)
+        self.assertTrue(result.vsts_account_created)
+        # the lock of the account is not kept once the setup is done
+        self.assertEqual(0, len(cdman._account_locks))
+        self.assertEqual(self.server.url + '/account1', result.vsts_account_url)
+        self.assertTrue('definitionId=' in result.vsts_build_def_url)
+        self.assertEqual('project1', result.status_details.ci_configuration.project.name)
+        counts = self.server.request_counts
+        self.assertEqual(1, counts['provisioning_post'])
+        self.assertEqual(1, counts['vsts_info'])
+        self.assertEqual(1, counts['collections'])
+        self.assertEqual(0, counts['unknown'])
+
+        # the account exists now
+        result = self._get_manager().setup_continuous_delivery(None, app_type_details,
+                                                               'https://account1.visualstudio.com', True, 'token1',
+                                                               None, None)
+        self.assertFalse(result.vsts_account_created)
+        self.assertEqual(1, self.server.request_counts['collections'])
+
+    def test_repository_lookups_share_a_client(self):
+        specs = [get_site_spec(i, 3) for i in range(3)]
+        outcomes = self._get_manager().setup_continuous_delivery_batch(specs)
+        self.assertEqual(['SUCCESS'] * 3, [outcome.status for outcome in outcomes])
+        self.assertEqual(3, self.server.request_counts['vsts_info'])
+        # one client per host: the lookups of the three repositories, the account and the provisioning
+        self.assertEqual(3, len(self.registry))
+
+    def test_failed_provisioning(self):
+        self.server.failure_rate = 1
+        with self.assertRaises(RuntimeError) as context:
+            self._get_manager().setup_continuous_delivery(None, {'cd_app_type': 'AspNet'},
+                                                          'https://account1.visualstudio.com', False, 'token1',
+                                                          None, None)
+        self.assertEqual('Provisioning failed.', str(context.exception))
+
+    def test_retried_submission(self):
+        # a 503 is not processed, so the submission is retried
+        self.server.inject_faults('provisioning_post', [503])
+        self.server.inject_faults('provisioning_get', [500])
+        result = self._get_manager().setup_continuous_delivery(None, {'cd_app_type': 'AspNet'},
+                                                               'https://account1.visualstudio.com', False, 'token1',
+                                                               None, None)
+        self.assertEqual('SUCCESS', result.status)
+        self.assertEqual(2, self.server.request_counts['provisioning_post'])
+        self.assertEqual(1, self.server.provisioning_count)
+
+    def test_ambiguous_submission_is_not_retried(self):
+        # the 500 comes after the provisioning was created, a retry would create a second one
+        self.server.inject_faults('provisioning_post', [500], processed=True)
+        with self.assertRaises(HttpOperationError):
+            self._get_manager().setup_continuous_delivery(None, {'cd_app_type': 'AspNet'},
+                                                          'https://account1.visualstudio.com', False, 'token1',
+                                                          None, None)
+        self.assertEqual(1, self.server.request_counts['provisioning_post'])
+        self.assertEqual(1, self.server.provisioning_count)
+
+    def test_ambiguous_account_creation_is_probed(self):
+        self.server.inject_faults('collections', [502], processed=True)
+        result = self._get_manager().setup_continuous_delivery(None, {'cd_app_type': 'AspNet'},
+                                                               'https://account1.visualstudio.com', True, 'token1',
+                                                               None, None)
+        self.assertTrue(result.vsts_account_created)
+        self.assertEqual(1, self.server.request_counts['collections'])
+
+    def test_regions_are_cached(self):
+        self.server.inject_faults('regions', [503])
+        cdman = self._get_manager()
+        cdman.create_vsts_account(None, 'account1', 'South Central US')
+        cdman.create_vsts_account(None, 'account2')
+        # the failed call was retried, the second account used the cached regions
+        self.assertEqual(2, self.server.request_counts['regions'])
+        self.assertEqual(2, self.server.request_counts['collections'])
+
+    def test_accounts_exist(self):
+        cdman = self._get_manager()
+        cdman.create_vsts_account(None, 'account1')
+        self.server.inject_faults('name_availability', [503])
+        self.assertEqual({'account1': True, 'account2': False, 'account3': False},
+                         cdman.vsts_accounts_exist(None, ['account1', 'account2', 'account3']))
+        # the failed check of the three names was retried, then they are cached
+        self.assertEqual(6, self.server.request_counts['name_availability'])
+        self.assertEqual({'Account1': True, 'account3': False}, cdman.vsts_accounts_exist(None, ['Account1', 'account3']))
+        self.assertEqual(6, self.server.request_counts['name_availability'])
+
+    def test_concurrent_setups_create_account_once(self):
+        outcomes = self._get_manager().setup_continuous_delivery_batch([get_site_spec(i, 1) for i in range(4)])
+        self.assertEqual(['SUCCESS'] * 4, [outcome.status for outcome in outcomes])
+        self.assertEqual(1, sum(1 for outcome in outcomes if outcome.vsts_account_created))
+        self.assertEqual(1, self.server.request_counts['collections'])
+
+    def test_rate_limited_setups(self):
+        # the client stays under the limit of the server, so requests queue instead of being throttled
+        self.server.max_requests_per_second = 40
+        rate_limiter = RateLimiter(rate=30, burst=5)
+        outcomes = self._get_manager(rate_limiter).setup_continuous_delivery_batch(
+            [get_site_spec(i, 1) for i in range(4)])
+        self.assertEqual(['SUCCESS'] * 4, [outcome.status for outcome in outcomes])
+        self.assertEqual(0, self.server.request_counts['throttled'])
+        statistics = rate_limiter.get_statistics()['127.0.0.1:{}'.format(self.server.url.rsplit(':', 1)[1])]
+        self.assertEqual(self.server.total_requests, statistics['requests'])
+        self.assertTrue(statistics['delayed_requests'] > 0)
+
+    def test_throttled_requests_are_retried(self):
+        self.server.max_requests_per_second = 3
+        result = self._get_manager().setup_continuous_delivery(None, {'cd_app_type': 'AspNet'},
+                                                               'https://account1.visualstudio.com', False, 'token1',
+                                                               None, None)
+        self.assertEqual('SUCCESS', result.status)
+        self.assertTrue(self.server.request_counts['throttled'] > 0)
+
+    def test_failing_endpoint_fails_fast(self):
+        # the fake serves every route from one host
+        self.server.inject_faults('vsts_info', [503] * 100)
+        self.server.inject_faults('name_availability', [503] * 100)
+        cdman = self._get_manager(circuit_breaker=CircuitBreaker(failure_threshold=3))
+        outcomes = cdman.setup_continuous_delivery_batch([get_site_spec(i, 8) for i in range(8)], max_workers=2)
+        self.assertTrue(all(isinstance(outcome, Exception) for outcome in outcomes))
+        self.assertTrue(sum(1 for outcome in outcomes if isinstance(outcome, CircuitOpenError)) >= 6)
+        # without the breaker every site would make 4 attempts
+        self.assertTrue(self.server.total_requests < 8)
+        self.assertEqual(0, self.server.request_counts['provisioning_post'])
+
+    def test_resume_from_journal(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'journal.jsonl')
+        specs = [get_site_spec(i, 1) for i in range(3)]
+
+        # the first run completes one setup and stops waiting for the next, as if the process died
+        with ProvisioningJournal(path) as journal:
+            self.assertEqual('SUCCESS', self._get_manager(journal=journal).setup_continuous_delivery(
+                spec=specs[0]).status)
+            self.server.in_progress_time = 0.5
+            impatient = PollingStrategy(initial_interval=0.02, max_interval=0.02, timeout=0.1)
+            outcomes = self._get_manager(strategy=impatient, journal=journal).setup_continuous_delivery_batch(
+                specs[1:2])
+            self.assertIsInstance(outcomes[0], ProvisioningTimeoutError)
+            self.assertEqual('queued', journal.get(get_setup_spec_hash(specs[1]))['status'])
+        self.assertEqual(2, self.server.provisioning_count)
+
+        self.server.reset_counters()
+        with ProvisioningJournal(path) as journal:
+            outcomes = self._get_manager(journal=journal, resume=True).setup_continuous_delivery_batch(specs)
+            self.assertEqual(['SUCCESS'] * 3, [outcome.status for outcome in outcomes])
+            self.assertEqual(['succeeded'] * 3, [journal.get(get_setup_spec_hash(spec))['status'] for spec in specs])
+        # only the setup that never started is submitted, the others re-attach
+        self.assertEqual(3, self.server.provisioning_count)
+        self.assertEqual(1, self.server.request_counts['provisioning_post'])
+        self.assertTrue(outcomes[0].vsts_account_created)
+        self.assertTrue('definitionId=' in outcomes[0].vsts_build_def_url)
+
+    def test_resume_ambiguous_submission(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        spec = get_site_spec(0, 1)
+        self.server.inject_faults('provisioning_post', [500], processed=True)
+        with ProvisioningJournal(os.path.join(directory, 'journal.jsonl')) as journal:
+            with self.assertRaises(HttpOperationError):
+                self._get_manager(journal=journal).setup_continuous_delivery(spec=spec)
+            self.assertEqual('submitting', journal.get(get_setup_spec_hash(spec))['status'])
+            # the service created the provisioning configuration, so it must not be submitted again
+            with self.assertRaises(UnconfirmedSubmissionError) as context:
+                self._get_manager(journal=journal, resume=True).setup_continuous_delivery(spec=spec)
+            self.assertEqual(get_setup_spec_hash(spec), context.exception.spec_hash)
+            self.assertEqual(1, self.server.request_counts['provisioning_post'])
+            self.assertEqual(1, self.server.provisioning_count)
+
+            # once checked by hand, a setup recorded as failed is submitted again
+            journal.record(get_setup_spec_hash(spec), 'failed')
+            result = self._get_manager(journal=journal, resume=True).setup_continuous_delivery(spec=spec)
+        self.assertEqual('SUCCESS', result.status)
+        self.assertEqual(2, self.server.provisioning_count)
+
+    def test_reconcile(self):
+        store = DesiredStateStore()
+        specs = [get_site_spec(i, 1) for i in range(3)]
+        outcomes = self._get_manager(desired_state=store, reconcile=True).setup_continuous_delivery_batch(specs)
+        self.assertEqual([False] * 3, [outcome.unchanged for outcome in outcomes])
+        self.assertEqual(3, len(store))
+
+        # only the site whose configuration changed is provisioned again
+        self.server.reset_counters()
+        specs[1] = specs[1]._replace(branch='dev', vsts_app_auth_token='token2')
+        outcomes = self._get_manager(desired_state=store, reconcile=True).setup_continuous_delivery_batch(specs)
+        self.assertEqual([True, False, True], [outcome.unchanged for outcome in outcomes])
+        self.assertEqual(['SUCCESS'] * 3, [outcome.status for outcome in outcomes])
+        self.assertTrue('definitionId=' in outcomes[0].vsts_build_def_url)
+        self.assertEqual(1, self.server.request_counts['provisioning_post'])
+        self.assertEqual(4, self.server.provisioning_count)
+
+        # with the same specs, only the applied configurations are read back
+        self.server.reset_counters()
+        outcomes = self._get_manager(desired_state=store, reconcile=True).setup_continuous_delivery_batch(specs)
+        self.assertEqual([True] * 3, [outcome.unchanged for outcome in outcomes])
+        self.assertEqual({'provisioning_get': 3}, dict(self.server.request_counts))
+
+        # an applied configuration deleted on the service is provisioned again
+        site_key = get_site_key('sub1', specs[0].resource_group_name, specs[0].website_name)
+        applied = store.get(site_key)
+        store.set(site_key, applied['config_hash'], 'deleted', spec_hash=applied['spec_hash'])
+        outcome = self._get_manager(desired_state=store, reconcile=True).setup_continuous_delivery(spec=specs[0])
+        self.assertFalse(outcome.unchanged)
+        self.assertEqual('SUCCESS', outcome.status)
+        self.assertEqual(5, self.server.provisioning_count)
+        self.assertNotEqual('deleted', store.get(site_key)['provisioning_configuration_id'])
+
+    def test_reconcile_added_git_token(self):
+        store = DesiredStateStore()
+        spec = get_site_spec(0, 1)._replace(repo_url='https://github.com/org/repo0')
+        self.assertFalse(self._get_manager(desired_state=store, reconcile=True).setup_continuous_delivery(
+            spec=spec).unchanged)
+        # with a token the repository is a Github one, so the web site is provisioned again
+        outcome = self._get_manager(desired_state=store, reconcile=True).setup_continuous_delivery(
+            spec=spec._replace(git_token='gittoken1'))
+        self.assertFalse(outcome.unchanged)
+        self.assertEqual(2, self.server.request_counts['provisioning_post'])
+
+    def test_timings(self):
+        messages = []
+        cdman = self._get_manager()
+        cdman._update_progress = lambda count, total, message: messages.append(message)
+        result = cdman.setup_continuous_delivery(spec=get_site_spec(0, 1))
+        timings = result.timings
+        self.assertEqual(['validate', 'vsts_info', 'account', 'submit', 'queued', 'in_progress'],
+                         sorted(timings['phases'], key=lambda phase: timings['phases'][phase]['start']))
+        for phase in timings['phases'].values():
+            self.assertTrue(phase['duration'] >= 0)
+        self.assertTrue(timings['phases']['queued']['duration'] > 0.02)
+        self.assertTrue(timings['total'] >= timings['phases']['in_progress']['end'])
+        counts = self.server.request_counts
+        self.assertEqual(sum(counts.values()), timings['requests'])
+        self.assertEqual(counts['provisioning_get'], timings['polls'])
+        self.assertTrue(timings['bytes_sent'] > 0)
+        self.assertTrue(timings['bytes_received'] > 0)
+        self.assertTrue(messages[-1].startswith('Timings: validate'))
+
+        # the shared status poller counts the polls of every setup for it
+        self.server.reset_counters()
+        with ProvisioningStatusPoller(self.strategy, rate_limiter=RateLimiter(rate=1000, burst=100),
+                                      circuit_breaker=CircuitBreaker()) as poller:
+            outcomes = self._get_manager(status_poller=poller).setup_continuous_delivery_batch(
+                [get_site_spec(i, 1) for i in range(1, 3)])
+        self.assertEqual(self.server.request_counts['provisioning_get'],
+                         sum(outcome.timings['polls'] for outcome in outcomes))
+        self.assertTrue(all('in_progress' in outcome.timings['phases'] for outcome in outcomes))
+
+    def test_benchmark(self):
+        report = SetupBenchmark(self.server, 4, 2, self.strategy).run(8)
+        self.assertEqual(0, report['failures'])
+        self.assertEqual(8, report['request_counts']['provisioning_post'])
+        self.assertEqual(2, report['request_counts']['vsts_info'])
+        self.assertTrue(report['p50'] <= report['p95'] <= report['p99'])
+        self.assertEqual(3, percentile([5, 1, 3, 2, 4], 0.5))
+
+
+if __name__ == '__main__':
+    unittest.main()
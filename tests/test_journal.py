@@ -0,0 +1,79 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+from __future__ import print_function
+import os
+import shutil
+import tempfile
+import unittest
+
+from vsts_cd_manager.journal import SUBMITTING, ProvisioningJournal
+from vsts_cd_manager.setup_spec import ContinuousDeliverySetupSpec, get_setup_spec_hash
+
+
+class TestProvisioningJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'journal.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_record(self):
+        with ProvisioningJournal(self.path) as journal:
+            self.assertIsNone(journal.get('site1'))
+            journal.record('site1', SUBMITTING, account_name='account1', idempotency_key='key1')
+            journal.record('site1', 'queued', provisioning_configuration_id='id1')
+            journal.record('site2', SUBMITTING, account_name='account1')
+            entry = journal.get('site1')
+            self.assertEqual('queued', entry['status'])
+            self.assertEqual('id1', entry['provisioning_configuration_id'])
+            # earlier fields are kept
+            self.assertEqual('key1', entry['idempotency_key'])
+            self.assertEqual(2, len(journal))
+
+        with ProvisioningJournal(self.path) as journal:
+            self.assertEqual('queued', journal.get('site1')['status'])
+            self.assertEqual(SUBMITTING, journal.get('site2')['status'])
+            self.assertEqual(['site1', 'site2'], sorted(entry['spec_hash'] for entry in journal.get_entries()))
+
+    def test_partial_line(self):
+        with ProvisioningJournal(self.path, sync=False) as journal:
+            journal.record('site1', 'queued', provisioning_configuration_id='id1')
+        # a crash in the middle of a record
+        with open(self.path, 'a') as journal_file:
+            journal_file.write('{"spec_hash": "site1", "status": "succ')
+        with ProvisioningJournal(self.path) as journal:
+            self.assertEqual('queued', journal.get('site1')['status'])
+            journal.record('site2', 'queued')
+        with ProvisioningJournal(self.path) as journal:
+            self.assertEqual(2, len(journal))
+
+    def test_record_after_close(self):
+        journal = ProvisioningJournal(self.path)
+        journal.record('site1', 'queued')
+        journal.close()
+        journal.close()
+        journal.record('site1', 'succeeded')
+        journal.close()
+        with ProvisioningJournal(self.path) as journal:
+            self.assertEqual('succeeded', journal.get('site1')['status'])
+
+    def test_get_setup_spec_hash(self):
+        spec = ContinuousDeliverySetupSpec(resource_group_name='group1', website_name='web1',
+                                           repo_url='https://github.com/org/repo',
+                                           app_type_details={'cd_app_type': 'AspNet'},
+                                           vsts_app_auth_token='token1', git_token='git1')
+        # new tokens in a later run do not change the hash
+        self.assertEqual(get_setup_spec_hash(spec),
+                         get_setup_spec_hash(spec._replace(vsts_app_auth_token='token2', git_token='git2')))
+        self.assertNotEqual(get_setup_spec_hash(spec), get_setup_spec_hash(spec._replace(website_name='web2')))
+        # whether a secret is given changes the setup, e.g. a git token makes a github.com repository a Github one
+        self.assertNotEqual(get_setup_spec_hash(spec._replace(git_token=None)), get_setup_spec_hash(spec))
+        self.assertNotEqual(get_setup_spec_hash(spec),
+                            get_setup_spec_hash(spec._replace(app_type_details={'cd_app_type': 'PHP'})))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+from __future__ import print_function
+import io
+import json
+import unittest
+import warnings
+
+from benchmarks.fake_vsts_server import FakeVstsServer, get_local_endpoints
+from vsts_cd_manager.caching import TTLCache
+from vsts_cd_manager.circuit_breaker import CircuitBreaker
+from vsts_cd_manager.client_registry import ClientRegistry
+from vsts_cd_manager.continuous_delivery_manager import ContinuousDeliveryManager
+from vsts_cd_manager.exceptions import ManifestError
+from vsts_cd_manager.manifest import YAML, ManifestRunner, get_manifest_setup_spec, read_manifest
+from vsts_cd_manager.polling import PollingStrategy
+from vsts_cd_manager.rate_limiter import RateLimiter
+from vsts_cd_manager.retry import RetryPolicy
+from vsts_cd_manager.vsts_info_cache import VstsInfoCache
+
+_DEFAULTS = {'cd_project_url': 'https://account1.visualstudio.com', 'vsts_app_auth_token': 'token1',
+             'subscription_id': 'sub1', 'subscription_name': 'subname1', 'tenant_id': 'tenant1',
+             'webapp_location': 'South Central US'}
+
+
+def _get_record(index, **fields):
+    record = {'resource_group_name': 'group1', 'website_name': 'web{}'.format(index),
+              'repo_url': 'https://account1.visualstudio.com/project1/_git/repo1',
+              'app_type_details': {'cd_app_type': 'AspNet'}}
+    record.update(fields)
+    return record
+
+
+class TestManifest(unittest.TestCase):
+    def test_read_manifest(self):
+        manifest = io.StringIO(u'{"website_name": "web1"}\n\nnot json\n[1]\n{"website_name": "web2"}\n')
+        records = list(read_manifest(manifest))
+        self.assertEqual([1, 3, 4, 5], [position for position, _ in records])
+        self.assertEqual({'website_name': 'web1'}, records[0][1])
+        self.assertTrue(isinstance(records[1][1], ManifestError))
+        self.assertTrue(isinstance(records[2][1], ManifestError))
+        self.assertEqual({'website_name': 'web2'}, records[3][1])
+
+        manifest = io.StringIO(u'website_name: web1\nswap_with_slot: staging\n---\nwebsite_name: web2\n')
+        records = list(read_manifest(manifest, YAML))
+        self.assertEqual([(1, {'website_name': 'web1', 'swap_with_slot': 'staging'}),
+                          (2, {'website_name': 'web2'})], records)
+        self.assertRaises(ValueError, read_manifest, manifest, 'csv')
+
+    def test_get_manifest_setup_spec(self):
+        spec = get_manifest_setup_spec(1, _get_record(1, branch='refs/heads/dev', test='web1-load'), _DEFAULTS)
+        self.assertEqual('web1', spec.website_name)
+        self.assertEqual('refs/heads/dev', spec.branch)
+        self.assertEqual('web1-load', spec.test)
+        self.assertEqual('token1', spec.vsts_app_auth_token)
+
+        with self.assertRaises(ManifestError) as context:
+            get_manifest_setup_spec(7, _get_record(1, site='web1'), _DEFAULTS)
+        self.assertEqual('Record 7: unknown fields site.', str(context.exception))
+        with self.assertRaises(ManifestError) as context:
+            get_manifest_setup_spec(7, _get_record(1))
+        self.assertTrue('cd_project_url' in str(context.exception))
+        defaults = dict(_DEFAULTS)
+        del defaults['vsts_app_auth_token']
+        with self.assertRaises(ManifestError) as context:
+            get_manifest_setup_spec(7, _get_record(1), defaults)
+        self.assertEqual('Record 7: missing fields vsts_app_auth_token, give them in the record or the defaults.',
+                         str(context.exception))
+        self.assertEqual('token2', get_manifest_setup_spec(7, _get_record(1, vsts_app_auth_token='token2'),
+                                                           defaults).vsts_app_auth_token)
+        self.assertRaises(ManifestError, get_manifest_setup_spec, 7, _get_record(1, app_type_details='AspNet'),
+                          _DEFAULTS)
+        self.assertRaises(ManifestError, get_manifest_setup_spec, 7, _get_record(1, website_name=1), _DEFAULTS)
+
+    def test_plan(self):
+        cdman = ContinuousDeliveryManager(None, vsts_info_cache=VstsInfoCache())
+        records = [_get_record(0, repo_url='https://github.com/org/repo0'), _get_record(1, website_name=None),
+                   _get_record(2)]
+        manifest = io.StringIO(u''.join(json.dumps(record) + '\n' for record in records))
+        output = io.StringIO()
+        counts = ManifestRunner(cdman, _DEFAULTS).plan(manifest, output)
+        self.assertEqual({'planned': 1, 'invalid': 2}, counts)
+        plans = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([1, 2, 3], [plan['position'] for plan in plans])
+        self.assertEqual('planned', plans[0]['status'])
+        body = plans[0]['provisioning_configuration']
+        self.assertEqual('Bearer ***', body['targets'][0]['authorizationInfo']['parameters']['Authorization'])
+        # the repository of the third record is not known without a lookup
+        self.assertEqual('invalid', plans[2]['status'])
+        self.assertTrue('not known' in plans[2]['error'])
+
+    def test_plan_is_repeatable(self):
+        cdman = ContinuousDeliveryManager(None, vsts_info_cache=VstsInfoCache())
+        manifest = json.dumps(_get_record(0, repo_url='https://github.com/org/repo0', test='web0-load')) + '\n'
+        outputs = []
+        for _ in range(2):
+            output = io.StringIO()
+            ManifestRunner(cdman, _DEFAULTS).plan(io.StringIO(manifest), output)
+            outputs.append(output.getvalue())
+        # plans carry no timings, so two plans of a manifest can be diffed
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertFalse('elapsed' in json.loads(outputs[0]))
+
+
+class TestManifestRunner(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter('ignore', DeprecationWarning)
+        self.server = FakeVstsServer(queued_time=0.02, in_progress_time=0.02).start()
+        self.registry = ClientRegistry(transport_retries=0)
+
+    def tearDown(self):
+        self.registry.close()
+        self.server.stop()
+
+    def test_run(self):
+        cdman = ContinuousDeliveryManager(None, PollingStrategy(initial_interval=0.02, max_interval=0.05, timeout=10),
+                                          client_registry=self.registry, vsts_info_cache=VstsInfoCache(),
+                                          regions_cache=TTLCache(60), name_availability_cache=TTLCache(60),
+                                          endpoints=get_local_endpoints(self.server.url),
+                                          retry_policy=RetryPolicy(initial_backoff=0.01),
+                                          rate_limiter=RateLimiter(rate=1000, burst=100),
+                                          circuit_breaker=CircuitBreaker())
+        records = [_get_record(i) for i in range(5)]
+        records[1]['app_type_details'] = {'cd_app_type': 'Cobol'}
+        records[3]['cd_project_url'] = 'http://account1.example.com'
+        manifest = io.StringIO(u''.join(json.dumps(record) + '\n' for record in records))
+        output = io.StringIO()
+        counts = ManifestRunner(cdman, _DEFAULTS, max_workers=2).run(manifest, output)
+        self.assertEqual({'succeeded': 3, 'failed': 0, 'invalid': 2}, counts)
+
+        results = dict((result['position'], result) for result in map(json.loads, output.getvalue().splitlines()))
+        self.assertEqual([1, 2, 3, 4, 5], sorted(results))
+        self.assertEqual('invalid', results[2]['status'])
+        self.assertTrue('Cobol' in results[2]['error'])
+        self.assertEqual('invalid', results[4]['status'])
+        self.assertEqual('succeeded', results[5]['status'])
+        self.assertEqual('web4', results[5]['website_name'])
+        self.assertEqual('sub1', results[5]['subscription_id'])
+        self.assertTrue('definitionId=' in results[5]['build_definition_url'])
+        self.assertTrue(results[5]['elapsed'] > 0)
+        # invalid records make no service calls
+        self.assertEqual(3, self.server.request_counts['provisioning_post'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+from __future__ import print_function
+import unittest
+from email.utils import formatdate
+import time
+
+from mock import Mock
+from vsts_cd_manager.polling import PollingStrategy, get_retry_after
+
+
+class TestPolling(unittest.TestCase):
+    def test_backoff_is_capped(self):
+        clock = [0]
+        strategy = PollingStrategy(first_delay=0, initial_interval=1, multiplier=2, max_interval=5, jitter=0,
+                                   timeout=None, clock=lambda: clock[0])
+        timer = strategy.start()
+        delays = []
+        for _ in range(6):
+            delays.append(timer.next_delay())
+        self.assertEqual([0, 1, 2, 4, 5, 5], delays)
+        self.assertIsNone(timer.remaining())
+        self.assertFalse(timer.expired())
+
+    def test_jitter_and_deadline(self):
+        clock = [0]
+        strategy = PollingStrategy(initial_interval=10, jitter=0.5, timeout=12, clock=lambda: clock[0])
+        timer = strategy.start()
+        timer.poll_count = 1
+        for _ in range(20):
+            delay = timer.next_delay()
+            self.assertTrue(0 <= delay <= 12)
+        clock[0] = 10
+        self.assertEqual(2, timer.next_delay(retry_after=30))
+        clock[0] = 12
+        self.assertTrue(timer.expired())
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            PollingStrategy(multiplier=0.5)
+        with self.assertRaises(ValueError):
+            PollingStrategy(jitter=1)
+        with self.assertRaises(ValueError):
+            PollingStrategy(initial_interval=-1)
+
+    def test_get_retry_after(self):
+        self.assertIsNone(get_retry_after(None))
+        self.assertIsNone(get_retry_after(Mock(headers={})))
+        self.assertEqual(7, get_retry_after(Mock(headers={'Retry-After': '7'})))
+        self.assertIsNone(get_retry_after(Mock(headers={'Retry-After': 'soon'})))
+        retry_after = get_retry_after(Mock(headers={'Retry-After': formatdate(time.time() + 60, usegmt=True)}))
+        self.assertTrue(55 < retry_after <= 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
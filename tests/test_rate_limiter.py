@@ -0,0 +1,111 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+from __future__ import print_function
+import unittest
+
+from mock import Mock
+from msrest.exceptions import HttpOperationError
+from requests import Response
+from vsts_cd_manager.rate_limiter import RateLimiter, TokenBucket
+
+
+class _FakeClock(object):
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def _http_error(status_code, retry_after=None):
+    response = Response()
+    response.status_code = status_code
+    response._content = b'{}'
+    if retry_after is not None:
+        response.headers['Retry-After'] = retry_after
+    return HttpOperationError(Mock(), response)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_token_bucket(self):
+        clock = _FakeClock()
+        bucket = TokenBucket(rate=10, burst=2, clock=clock)
+        self.assertEqual(0, bucket.reserve())
+        self.assertEqual(0, bucket.reserve())
+        # the burst is used up, the next requests queue at the rate
+        self.assertAlmostEqual(0.1, bucket.reserve())
+        self.assertAlmostEqual(0.2, bucket.reserve())
+        self.assertEqual(2, bucket.queue_depth)
+        clock.sleep(0.15)
+        self.assertEqual(1, bucket.queue_depth)
+        clock.sleep(1)
+        self.assertEqual(0, bucket.queue_depth)
+        # tokens do not accrue beyond the burst
+        self.assertEqual(0, bucket.reserve())
+        self.assertEqual(0, bucket.reserve())
+        self.assertAlmostEqual(0.1, bucket.reserve())
+        statistics = bucket.get_statistics()
+        self.assertEqual(7, statistics['requests'])
+        self.assertEqual(3, statistics['delayed_requests'])
+        self.assertAlmostEqual(0.4, statistics['total_wait'])
+        self.assertAlmostEqual(0.2, statistics['max_wait'])
+
+    def test_due_times_stay_bounded(self):
+        clock = _FakeClock()
+        bucket = TokenBucket(rate=10, burst=1, clock=clock)
+        for _ in range(10000):
+            clock.sleep(bucket.reserve())
+        # the reservations are forgotten once due, without anyone reading queue_depth
+        self.assertTrue(len(bucket._due_times) <= 1)
+        self.assertEqual(0, bucket.queue_depth)
+
+    def test_pause(self):
+        clock = _FakeClock()
+        bucket = TokenBucket(rate=10, burst=5, clock=clock)
+        bucket.pause(2)
+        self.assertAlmostEqual(2, bucket.reserve())
+        self.assertAlmostEqual(2.1, bucket.reserve())
+        # the burst is not refilled by the pause
+        clock.sleep(2.1)
+        self.assertAlmostEqual(0.1, bucket.reserve())
+        self.assertEqual(1, bucket.get_statistics()['pauses'])
+
+    def test_call(self):
+        clock = _FakeClock()
+        limiter = RateLimiter(rate=10, burst=1, throttle_pause=0.5, sleep=clock.sleep, clock=clock)
+        self.assertEqual('ok', limiter.call('https://Account1.visualstudio.com/_apis', lambda: 'ok'))
+        # hosts have their own buckets
+        self.assertEqual('ok', limiter.call('https://account2.visualstudio.com', lambda: 'ok'))
+        self.assertIs(limiter.get_bucket('https://account1.visualstudio.com/x'),
+                      limiter.get_bucket('https://ACCOUNT1.visualstudio.com/y'))
+
+        operation = Mock(side_effect=_http_error(429, '3'))
+        with self.assertRaises(HttpOperationError):
+            limiter.call('https://account1.visualstudio.com', operation)
+        started = clock.now
+        limiter.call('https://account1.visualstudio.com', lambda: 'ok')
+        self.assertTrue(clock.now - started >= 3)
+
+        operation = Mock(side_effect=_http_error(503))
+        with self.assertRaises(HttpOperationError):
+            limiter.call('https://account2.visualstudio.com', operation)
+        operation = Mock(side_effect=_http_error(500))
+        with self.assertRaises(HttpOperationError):
+            limiter.call('https://account2.visualstudio.com', operation)
+        statistics = limiter.get_statistics()
+        self.assertEqual(1, statistics['account1.visualstudio.com']['pauses'])
+        self.assertEqual(1, statistics['account2.visualstudio.com']['pauses'])
+        self.assertEqual(3, statistics['account2.visualstudio.com']['requests'])
+
+    def test_invalid_arguments(self):
+        self.assertRaises(ValueError, TokenBucket, 0, 1)
+        self.assertRaises(ValueError, TokenBucket, 1, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+from __future__ import print_function
+import unittest
+
+from aex_accounts.models import RegionDetails, Regions
+from mock import Mock
+from vsts_cd_manager.caching import TTLCache
+from vsts_cd_manager.regions import get_regions, select_region
+
+
+class TestRegions(unittest.TestCase):
+    def _get_regions(self):
+        return Regions(3, [RegionDetails('CUS', 'Central US', 'false'),
+                           RegionDetails('SCUS', 'South Central US', 'false'),
+                           RegionDetails('WEU', 'West Europe', 'True')])
+
+    def test_select_region(self):
+        regions = self._get_regions()
+        self.assertEqual('SCUS', select_region(regions, 'South Central US').name)
+        self.assertEqual('SCUS', select_region(regions, 'southcentralus').name)
+        self.assertEqual('CUS', select_region(regions, 'cus').name)
+        self.assertEqual('WEU', select_region(regions, 'Japan East').name)
+        self.assertEqual('WEU', select_region(regions).name)
+        self.assertEqual('A', select_region(Regions(2, [RegionDetails('A'), RegionDetails('B')]), 'x').name)
+        with self.assertRaises(RuntimeError):
+            select_region(Regions(0, []))
+
+    def test_get_regions_is_cached(self):
+        account_client = Mock()
+        account_client.regions.return_value = self._get_regions()
+        cache = TTLCache(60)
+        for _ in range(5):
+            regions = get_regions(account_client, 'https://app.vsaex.visualstudio.com', cache)
+            self.assertEqual(3, regions.count)
+        self.assertEqual(1, account_client.regions.call_count)
+
+        account_client.regions.return_value = Regions(0, [])
+        with self.assertRaises(RuntimeError):
+            get_regions(account_client, 'https://other.vsaex.visualstudio.com', cache)
+        self.assertIsNone(cache.get('https://other.vsaex.visualstudio.com'))
+
+        call = Mock(side_effect=lambda operation: operation())
+        account_client.regions.return_value = self._get_regions()
+        get_regions(account_client, 'https://other.vsaex.visualstudio.com', cache, call=call)
+        call.assert_called_once_with(account_client.regions)
+
+
+if __name__ == '__main__':
+    unittest.main()
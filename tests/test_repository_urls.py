@@ -0,0 +1,84 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+from __future__ import print_function
+import re
+import unittest
+
+from vsts_cd_manager.repository_urls import (EXTERNAL_GIT, GITHUB, TFS_GIT, TFVC, RepositoryUrl,
+                                             RepositoryUrlClassifier)
+
+
+class TestRepositoryUrlClassifier(unittest.TestCase):
+    def test_team_services_git(self):
+        classifier = RepositoryUrlClassifier()
+        for url, account_name, lookup_url in [
+                ('https://account1.visualstudio.com/project1/_git/repo1', 'account1',
+                 'https://account1.visualstudio.com/project1/_git/repo1'),
+                ('https://user@account1.visualstudio.com/DefaultCollection/project1/_git/repo1.git/', 'account1',
+                 'https://account1.visualstudio.com/DefaultCollection/project1/_git/repo1'),
+                ('https://dev.azure.com/org1/project1/_git/repo1', 'org1',
+                 'https://dev.azure.com/org1/project1/_git/repo1'),
+                ('https://org1@dev.azure.com/org1/project1/_git/repo1.git?path=/src', 'org1',
+                 'https://dev.azure.com/org1/project1/_git/repo1'),
+                ('git@ssh.dev.azure.com:v3/org1/project1/repo1', 'org1',
+                 'https://dev.azure.com/org1/project1/_git/repo1'),
+                ('ssh://account1@vs-ssh.visualstudio.com/v3/account1/project1/repo1.git', 'account1',
+                 'https://account1.visualstudio.com/project1/_git/repo1')]:
+            self.assertEqual(RepositoryUrl(TFS_GIT, None, account_name, lookup_url), classifier.classify_url(url), url)
+
+    def test_github(self):
+        classifier = RepositoryUrlClassifier()
+        for url, identifier in [('https://github.com/org/repo', 'org/repo'),
+                                ('https://github.com/org/repo.git', 'org/repo'),
+                                ('https://github.com/org/repo/tree/master', 'org/repo'),
+                                ('git@github.com:org/repo.git', 'org/repo'),
+                                # only a .git suffix is stripped
+                                ('https://github.com/org/repo.github.io', 'org/repo.github.io'),
+                                ('https://github.com/my.git.tools/repo', 'my.git.tools/repo'),
+                                # an owner without a repository, as the old pattern took it
+                                ('https://github.com/org', 'org')]:
+            repository_url = classifier.classify_url(url)
+            self.assertEqual(GITHUB, repository_url.type, url)
+            self.assertEqual(identifier, repository_url.identifier, url)
+            self.assertEqual('https://github.com/' + identifier, repository_url.url)
+
+    def test_other_repositories(self):
+        classifier = RepositoryUrlClassifier()
+        self.assertEqual(RepositoryUrl(TFVC, 'project1', 'account1', 'https://account1.visualstudio.com/project1'),
+                         classifier.classify_url('https://account1.visualstudio.com/project1'))
+        self.assertEqual(RepositoryUrl(TFVC, 'project1/folder', 'org1', 'https://dev.azure.com/org1/project1/folder'),
+                         classifier.classify_url('https://dev.azure.com/org1/project1/folder'))
+        for url in ['https://example.com/repo.git', 'git@example.com:org/repo.git']:
+            self.assertEqual(RepositoryUrl(EXTERNAL_GIT, url, None, url), classifier.classify_url(url))
+
+    def test_matches_baseline_classification(self):
+        # The patterns setup_continuous_delivery classified Team Services urls with before the classifier
+        def baseline(url):
+            match = re.match(r'[htps]+\:\/\/(.+)\.visualstudio\.com.*\/_git\/(.+)', url, re.IGNORECASE)
+            if match:
+                return TFS_GIT, match.group(1)
+            match = re.match(r'[htps]+\:\/\/(.+)\.visualstudio\.com\/(.+)', url, re.IGNORECASE)
+            if match:
+                return TFVC, match.group(1)
+            return EXTERNAL_GIT, None
+
+        classifier = RepositoryUrlClassifier()
+        for url, lookup_url in [
+                ('https://acct.visualstudio.com/proj/_git/repo/pullrequest/5',
+                 'https://acct.visualstudio.com/proj/_git/repo'),
+                ('https://my.acct.visualstudio.com/_git/r', 'https://my.acct.visualstudio.com/_git/r')]:
+            repository_url = classifier.classify_url(url)
+            self.assertEqual(baseline(url), (repository_url.type, repository_url.account_name), url)
+            self.assertEqual(lookup_url, repository_url.url, url)
+
+    def test_classify(self):
+        urls = ['https://github.com/org/repo', 'https://dev.azure.com/org1/project1/_git/repo1',
+                'https://example.com/repo.git']
+        self.assertEqual([GITHUB, TFS_GIT, EXTERNAL_GIT],
+                         [repository_url.type for repository_url in RepositoryUrlClassifier().classify(iter(urls))])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+from __future__ import print_function
+import unittest
+
+from mock import Mock
+from msrest.exceptions import ClientRequestError, HttpOperationError
+from requests import Response
+from requests.exceptions import ConnectionError as RequestsConnectionError, ReadTimeout
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+from vsts_cd_manager.retry import AMBIGUOUS, NOT_SENT, REJECTED, RetryPolicy, classify_error
+
+
+def _http_error(status_code, retry_after=None):
+    response = Response()
+    response.status_code = status_code
+    response._content = b'{}'
+    if retry_after is not None:
+        response.headers['Retry-After'] = retry_after
+    return HttpOperationError(Mock(), response)
+
+
+def _connection_refused():
+    reason = NewConnectionError(None, 'Connection refused')
+    return ClientRequestError('Error occurred in request.', RequestsConnectionError(MaxRetryError(None, '/', reason)))
+
+
+class TestRetry(unittest.TestCase):
+    def _get_policy(self, **kwargs):
+        self.sleeps = []
+        return RetryPolicy(initial_backoff=1, multiplier=2, max_backoff=5, jitter=0, sleep=self.sleeps.append,
+                           **kwargs)
+
+    def test_classify_error(self):
+        self.assertEqual(REJECTED, classify_error(_http_error(429)))
+        self.assertEqual(REJECTED, classify_error(_http_error(503)))
+        self.assertEqual(AMBIGUOUS, classify_error(_http_error(500)))
+        self.assertEqual(AMBIGUOUS, classify_error(ClientRequestError('Error', ReadTimeout())))
+        self.assertEqual(NOT_SENT, classify_error(_connection_refused()))
+        self.assertIsNone(classify_error(_http_error(404)))
+        self.assertIsNone(classify_error(RuntimeError('not transient')))
+
+    def test_idempotent_backoff(self):
+        operation = Mock(side_effect=[_http_error(500), _http_error(502), _http_error(503, '10'), 'done'])
+        self.assertEqual('done', self._get_policy().call(operation))
+        # Retry-After wins over a shorter backoff
+        self.assertEqual([1, 2, 10], self.sleeps)
+
+        operation = Mock(side_effect=_http_error(500))
+        with self.assertRaises(HttpOperationError):
+            self._get_policy(max_attempts=3).call(operation)
+        self.assertEqual(3, operation.call_count)
+
+        operation = Mock(side_effect=_http_error(400))
+        with self.assertRaises(HttpOperationError):
+            self._get_policy().call(operation)
+        self.assertEqual(1, operation.call_count)
+
+    def test_non_idempotent(self):
+        # not processed: retried
+        operation = Mock(side_effect=[_connection_refused(), _http_error(429), 'created'])
+        self.assertEqual('created', self._get_policy().call(operation, idempotent=False))
+
+        # ambiguous without a probe: raised
+        operation = Mock(side_effect=[_http_error(500), 'created'])
+        with self.assertRaises(HttpOperationError):
+            self._get_policy().call(operation, idempotent=False)
+        self.assertEqual(1, operation.call_count)
+
+        # ambiguous, the probe finds the failed attempt took effect: not retried
+        operation = Mock(side_effect=[_http_error(502), 'created'])
+        probe = Mock(return_value='found')
+        self.assertEqual('found', self._get_policy().call(operation, idempotent=False, probe=probe))
+        self.assertEqual(1, operation.call_count)
+
+        # ambiguous, the probe finds nothing: retried
+        operation = Mock(side_effect=[_http_error(502), 'created'])
+        probe = Mock(return_value=None)
+        self.assertEqual('created', self._get_policy().call(operation, idempotent=False, probe=probe))
+        self.assertEqual(1, probe.call_count)
+        self.assertEqual([1], self.sleeps)
+
+    def test_invalid_arguments(self):
+        self.assertRaises(ValueError, RetryPolicy, max_attempts=0)
+        self.assertRaises(ValueError, RetryPolicy, initial_backoff=-1)
+        self.assertRaises(ValueError, RetryPolicy, multiplier=0.5)
+        self.assertRaises(ValueError, RetryPolicy, jitter=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
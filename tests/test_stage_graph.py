@@ -0,0 +1,79 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+from __future__ import print_function
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from vsts_cd_manager.stage_graph import StageGraph
+
+
+class TestStageGraph(unittest.TestCase):
+    def test_independent_stages_overlap(self):
+        # both stages only finish when the other one has started, so they must run concurrently
+        first_started = threading.Event()
+        second_started = threading.Event()
+
+        def first():
+            first_started.set()
+            self.assertTrue(second_started.wait(5))
+            return 1
+
+        def second():
+            second_started.set()
+            self.assertTrue(first_started.wait(5))
+            return 2
+
+        graph = StageGraph()
+        graph.add('first', first)
+        graph.add('second', second)
+        graph.add('total', lambda first, second: first + second, depends_on=('first', 'second'))
+        self.assertEqual({'first': 1, 'second': 2, 'total': 3}, graph.run())
+
+    def test_stage_threads(self):
+        threads = {}
+
+        def record(name):
+            threads[name] = threading.current_thread()
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            graph = StageGraph(executor)
+            graph.add('first', lambda: record('first'))
+            graph.add('second', lambda: record('second'))
+            graph.add('cheap', lambda: record('cheap'), inline=True)
+            graph.run()
+            # the given executor is not shut down
+            self.assertEqual(1, executor.submit(lambda: 1).result())
+        # only one of the stages needed another thread
+        self.assertIs(threading.current_thread(), threads['cheap'])
+        self.assertEqual(1, sum(1 for thread in threads.values() if thread is not threading.current_thread()))
+
+    def test_errors(self):
+        calls = []
+
+        def fail(message):
+            raise RuntimeError(message)
+
+        graph = StageGraph()
+        graph.add('slow_failure', lambda: fail('first'))
+        graph.add('failure', lambda: fail('second'))
+        graph.add('dependent', lambda failure: calls.append(failure), depends_on=('failure',))
+        with self.assertRaises(RuntimeError) as context:
+            graph.run()
+        self.assertEqual('first', str(context.exception))
+        self.assertEqual([], calls)
+
+    def test_invalid_graph(self):
+        graph = StageGraph()
+        graph.add('a', lambda: None)
+        with self.assertRaises(ValueError):
+            graph.add('a', lambda: None)
+        with self.assertRaises(ValueError):
+            graph.add('b', lambda c: None, depends_on=('c',))
+        self.assertEqual({}, StageGraph().run())
+
+
+if __name__ == '__main__':
+    unittest.main()
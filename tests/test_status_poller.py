@@ -0,0 +1,101 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+from __future__ import print_function
+import threading
+import unittest
+
+from continuous_delivery.models import CiConfiguration, CiResult, ProvisioningConfiguration
+from msrest import Configuration
+from msrest.exceptions import ClientRequestError
+from msrest.pipeline import ClientRawResponse
+from requests import Response
+from vsts_cd_manager.exceptions import ProvisioningTimeoutError
+from vsts_cd_manager.polling import PollingStrategy
+from vsts_cd_manager.rate_limiter import RateLimiter
+from vsts_cd_manager.retry import RetryPolicy
+from vsts_cd_manager.status_poller import ProvisioningStatusPoller
+
+
+class _FakeContinuousDelivery(object):
+    # Returns the statuses of every provisioning configuration id in sequence, repeating the last one
+    def __init__(self, statuses):
+        self._statuses = statuses
+        self.config = Configuration('https://account1.portalext.visualstudio.com')
+        self._lock = threading.Lock()
+        self.calls = {}
+
+    def get_provisioning_configuration(self, provisioning_configuration_id, raw=False, status_only=False):
+        with self._lock:
+            count = self.calls.get(provisioning_configuration_id, 0)
+            self.calls[provisioning_configuration_id] = count + 1
+        statuses = self._statuses[provisioning_configuration_id]
+        status = statuses[min(count, len(statuses) - 1)]
+        if isinstance(status, Exception):
+            raise status
+        config = ProvisioningConfiguration(provisioning_configuration_id, None, None,
+                                           CiConfiguration(result=CiResult(status, status + ' message')))
+        response = Response()
+        response.status_code = 200
+        return ClientRawResponse(config, response)
+
+
+class TestProvisioningStatusPoller(unittest.TestCase):
+    def _get_strategy(self, timeout=5):
+        return PollingStrategy(initial_interval=0.01, multiplier=1, max_interval=0.01, jitter=0, timeout=timeout)
+
+    def _get_poller(self, strategy, **kwargs):
+        return ProvisioningStatusPoller(strategy, rate_limiter=RateLimiter(rate=10000, burst=100), **kwargs)
+
+    def test_watch_many(self):
+        statuses = {}
+        for i in range(50):
+            statuses['id{}'.format(i)] = ['queued'] + ['inProgress'] * (i % 4) + ['succeeded']
+        cd = _FakeContinuousDelivery(statuses)
+        done = []
+        with self._get_poller(self._get_strategy(), max_workers=2) as poller:
+            futures = dict((key, poller.watch(cd, key, done.append)) for key in statuses)
+            for key, future in futures.items():
+                self.assertEqual(key, future.result(5).id)
+            self.assertEqual(0, poller.pending_count)
+        self.assertEqual(50, len(done))
+        self.assertEqual(3 + 2, cd.calls['id3'])
+
+    def test_transient_errors_are_retried(self):
+        cd = _FakeContinuousDelivery({'flaky': ['queued', ClientRequestError('reset'), 'succeeded'],
+                                      'broken': ['queued', ClientRequestError('reset')]})
+        with self._get_poller(self._get_strategy(), retry_policy=RetryPolicy(max_attempts=2,
+                                                                             initial_backoff=0.01)) as poller:
+            flaky = poller.watch(cd, 'flaky')
+            broken = poller.watch(cd, 'broken')
+            self.assertEqual('succeeded', flaky.result(5).ci_configuration.result.status)
+            self.assertRaises(ClientRequestError, broken.result, 5)
+        self.assertEqual(3, cd.calls['flaky'])
+        self.assertEqual(3, cd.calls['broken'])
+
+    def test_failed_and_timed_out(self):
+        cd = _FakeContinuousDelivery({'bad': ['queued', 'failed'], 'slow': ['inProgress']})
+        with self._get_poller(self._get_strategy(timeout=0.05), max_polls_per_second=1000) as poller:
+            bad = poller.watch(cd, 'bad')
+            slow = poller.watch(cd, 'slow')
+            with self.assertRaises(RuntimeError) as context:
+                bad.result(5)
+            self.assertEqual('failed message', str(context.exception))
+            with self.assertRaises(ProvisioningTimeoutError):
+                slow.result(5)
+
+    def test_close(self):
+        cd = _FakeContinuousDelivery({'stuck': ['inProgress']})
+        poller = self._get_poller(PollingStrategy(first_delay=60, timeout=None))
+        future = poller.watch(cd, 'stuck')
+        poller.close()
+        with self.assertRaises(RuntimeError):
+            future.result(5)
+        with self.assertRaises(RuntimeError):
+            poller.watch(cd, 'stuck')
+        self.assertEqual(0, poller.pending_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
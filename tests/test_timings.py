@@ -0,0 +1,77 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+from __future__ import print_function
+import threading
+import unittest
+
+from mock import Mock
+from vsts_cd_manager.timings import (IN_PROGRESS, QUEUED, SUBMIT, VALIDATE, SetupTimings, active, count_response,
+                                     get_active_timings)
+
+
+class _FakeClock(object):
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTimings(unittest.TestCase):
+    def test_phases(self):
+        clock = _FakeClock()
+        timings = SetupTimings(clock)
+        with timings.measure(VALIDATE):
+            clock.now += 0.5
+        timings.start(SUBMIT)
+        clock.now += 1
+        timings.end(SUBMIT)
+        timings.observe_status('queued')
+        clock.now += 2
+        timings.observe_status('inProgress')
+        clock.now += 3
+        timings.observe_status('inProgress')
+        self.assertEqual({VALIDATE: 0.5, SUBMIT: 1, QUEUED: 2}, timings.get_durations())
+        timings.observe_status('succeeded')
+        timings.finish()
+        result = timings.to_dict()
+        self.assertEqual(6.5, result['total'])
+        self.assertEqual({'start': 3.5, 'end': 6.5, 'duration': 3}, result['phases'][IN_PROGRESS])
+        self.assertEqual([VALIDATE, SUBMIT, QUEUED, IN_PROGRESS], list(result['phases']))
+        self.assertTrue(timings.format().startswith('validate 0.500s, submit 1.000s, queued 2.000s'))
+
+    def test_finish_ends_running_phases(self):
+        clock = _FakeClock()
+        timings = SetupTimings(clock)
+        timings.observe_status('queued')
+        clock.now += 1
+        timings.finish()
+        self.assertEqual({QUEUED: 1}, timings.get_durations())
+
+    def test_count_response(self):
+        timings = SetupTimings()
+        response = Mock(headers={'Content-Length': '120'})
+        response.request.body = b'{"a": 1}'
+        count_response(response)
+        self.assertEqual(0, timings.requests)
+        with timings.measure(SUBMIT):
+            self.assertIs(timings, get_active_timings())
+            count_response(response)
+            # other threads count for their own setup
+            thread = threading.Thread(target=lambda: count_response(response))
+            thread.start()
+            thread.join()
+        self.assertIsNone(get_active_timings())
+        with active(timings):
+            response = Mock(headers={}, content=b'{}')
+            response.request.body = None
+            count_response(response)
+        self.assertEqual(2, timings.requests)
+        self.assertEqual(8, timings.bytes_sent)
+        self.assertEqual(122, timings.bytes_received)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+
+from aex_accounts.account import is_name_taken
+from .caching import TTLCache
+
+DEFAULT_NAME_AVAILABILITY_TTL = 300
+DEFAULT_NAME_CHECK_MAX_WORKERS = 8
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+_MISSING = object()
+
+
+def get_accounts_existence(account_client, aex_url, account_names, cache,
+                           max_workers=DEFAULT_NAME_CHECK_MAX_WORKERS, call=None):
+    """
+    Checks which Team Services accounts already exist. Only the names that are not cached are sent to
+    the name availability API, concurrently.
+    :param account_client: Account client used for the names that are not cached
+    :param aex_url: url of the AEX service, part of the cache key
+    :param account_names: account (collection) names to check
+    :param cache: TTLCache holding the results
+    :param max_workers: maximum number of concurrent name availability requests
+    :param call: method of the form func(operation, cost) invoking operation, e.g. with retries, where cost
+     is the number of requests it makes. By default operation is invoked directly.
+    :return: dict of account name to True if the account exists
+    """
+    existence, missing = get_cached_accounts_existence(aex_url, account_names, cache)
+    if missing:
+        call = call or _invoke
+        checked = call(lambda: check_accounts_existence(account_client, missing, max_workers), len(missing))
+        cache_accounts_existence(aex_url, checked, cache)
+        existence.update(checked)
+    return existence
+
+
+def check_accounts_existence(account_client, account_names, max_workers=DEFAULT_NAME_CHECK_MAX_WORKERS):
+    """
+    Checks which Team Services accounts already exist with the name availability API, without the cache.
+    :param account_client: Account client
+    :param account_names: account (collection) names to check
+    :param max_workers: maximum number of concurrent name availability requests
+    :return: dict of account name to True if the account exists
+    """
+    if len(account_names) == 1:
+        return {account_names[0]: bool(account_client.account_exists(account_names[0]))}
+    availabilities = account_client.get_names_availability(account_names, max_workers) if account_names else {}
+    return get_existence_from_availabilities(availabilities)
+
+
+def get_existence_from_availabilities(availabilities):
+    """
+    :param availabilities: dict of account name to NameAvailability
+    :return: dict of account name to True if the account exists
+    """
+    return dict((name, is_name_taken(availability)) for name, availability in availabilities.items())
+
+
+def get_cached_accounts_existence(aex_url, account_names, cache):
+    """
+    :return: tuple of (dict of account name to True if the account exists, list of the names that are not cached)
+    """
+    existence = {}
+    missing = []
+    for name in account_names:
+        exists = cache.get(_get_cache_key(aex_url, name), _MISSING)
+        if exists is _MISSING:
+            missing.append(name)
+        else:
+            existence[name] = exists
+    return existence, missing
+
+
+def cache_accounts_existence(aex_url, existence, cache):
+    """
+    Stores checked account names.
+    :param existence: dict of account name to True if the account exists
+    """
+    for name, exists in existence.items():
+        cache.set(_get_cache_key(aex_url, name), exists)
+
+
+def invalidate_account_existence(aex_url, account_name, cache):
+    """
+    Drops the cached result of an account name, e.g. after the account was created.
+    """
+    cache.invalidate(_get_cache_key(aex_url, account_name))
+
+
+def get_default_name_availability_cache():
+    """
+    :return: the process wide TTLCache of account existence used by ContinuousDeliveryManager unless another
+     one is given
+    """
+    global _default_cache  # pylint: disable=global-statement
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = TTLCache(DEFAULT_NAME_AVAILABILITY_TTL)
+        return _default_cache
+
+
+def _invoke(operation, cost):  # pylint: disable=unused-argument
+    return operation()
+
+
+def _get_cache_key(aex_url, account_name):
+    # Account names are case insensitive
+    return aex_url, account_name.lower()
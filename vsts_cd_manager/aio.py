@@ -0,0 +1,484 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+# Requires Python 3.5+ and msrest 0.6.0+
+
+import asyncio
+import weakref
+
+from msrest.exceptions import HttpOperationError
+from aex_accounts.aio import AsyncAccount
+from continuous_delivery.aio import AsyncContinuousDelivery
+from vsts_info_provider.aio import AsyncVstsInfoProvider
+from .account_names import (DEFAULT_NAME_CHECK_MAX_WORKERS, cache_accounts_existence, get_cached_accounts_existence,
+                            get_existence_from_availabilities, invalidate_account_existence)
+from .client_registry import ClientRegistry, get_origin
+from .continuous_delivery_manager import _ContinuousDeliveryManagerBase
+from .exceptions import ProvisioningFailedError, ProvisioningTimeoutError
+from .journal import REATTACH_STATUSES
+from .polling import get_retry_after
+from .regions import check_regions, select_region
+from .retry import AMBIGUOUS, IDEMPOTENCY_KEY_HEADER, classify_error, new_idempotency_key
+from .timings import ACCOUNT, SUBMIT, VALIDATE, VSTS_INFO, SetupTimings
+
+DEFAULT_ASYNC_BATCH_CONCURRENCY = 100
+
+
+class AsyncClientRegistry(ClientRegistry):
+    def __init__(self, transport_retries=None):
+        """
+        Hands out shared asynchronous REST clients (AsyncContinuousDelivery, AsyncVstsInfoProvider, AsyncAccount).
+        Use it from one event loop and close it with await registry.close().
+        :param transport_retries: number of retries of the msrest transport for the clients, see ClientRegistry
+        """
+        super().__init__(transport_retries)
+
+    async def close(self):
+        """
+        Closes the HTTP sessions of all clients handed out by this registry.
+        """
+        for client in self._detach_clients():
+            await client.close()
+
+    def _release_clients(self, clients):
+        for client in clients:
+            asyncio.ensure_future(client.close())
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_details):
+        await self.close()
+
+
+class AsyncContinuousDeliveryManager(_ContinuousDeliveryManagerBase):
+    def __init__(self, progress_callback, polling_strategy=None, client_registry=None, vsts_info_cache=None,
+                 regions_cache=None, name_availability_cache=None, endpoints=None, retry_policy=None,
+                 rate_limiter=None, circuit_breaker=None, journal=None, resume=False, desired_state=None,
+                 reconcile=False):
+        """
+        Asynchronous counterpart of ContinuousDeliveryManager for asyncio applications. Requests are awaited and
+        the waits between status polls do not hold a thread, so one event loop can drive many setups at once.
+        It shares the validation, payloads, journal and summaries of ContinuousDeliveryManager but not its
+        blocking methods.
+        :param progress_callback: method of the form func(count, total, message)
+        :param polling_strategy: PollingStrategy used while waiting for the provisioning to complete
+        :param client_registry: AsyncClientRegistry handing out the REST clients. By default the manager creates
+         its own, which is closed by close().
+        :param vsts_info_cache: VstsInfoCache for the repository lookups, defaults to the process wide cache
+        :param regions_cache: TTLCache for the AEX regions, defaults to the process wide cache
+        :param name_availability_cache: TTLCache for the account existence checks, defaults to the process wide cache
+        :param endpoints: ServiceEndpoints with the service urls, defaults to Team Services
+        :param retry_policy: RetryPolicy for the REST calls, its sleep is replaced by asyncio.sleep
+        :param rate_limiter: RateLimiter shared by the clients of the process, waited on with asyncio.sleep
+        :param circuit_breaker: CircuitBreaker failing the calls to a failing host fast, defaults to the process
+         wide breaker
+        :param journal: optional ProvisioningJournal, see ContinuousDeliveryManager
+        :param resume: whether setups found in the journal re-attach to their provisioning configuration
+        :param desired_state: optional DesiredStateStore, see ContinuousDeliveryManager
+        :param reconcile: whether setups of web sites whose configuration is already applied skip the provisioning
+        """
+        self._owns_clients = client_registry is None
+        super().__init__(progress_callback, polling_strategy,
+                         AsyncClientRegistry(transport_retries=0) if client_registry is None else client_registry,
+                         vsts_info_cache, regions_cache, name_availability_cache, endpoints, retry_policy,
+                         rate_limiter, circuit_breaker, journal, resume, desired_state, reconcile)
+        self._in_flight = {}
+        # asyncio.Lock per Team Services account being ensured, dropped once no setup holds it
+        self._account_locks = weakref.WeakValueDictionary()
+
+    async def close(self):
+        """
+        Closes the REST clients when the manager created its own client registry.
+        """
+        if self._owns_clients:
+            await self._clients.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_details):
+        await self.close()
+
+    async def setup_continuous_delivery(self, swap_with_slot=None, app_type_details=None, cd_project_url=None,
+                                        create_account=False, vsts_app_auth_token=None, test=None, webapp_list=None,
+                                        spec=None):
+        """
+        Use this method to setup Continuous Delivery of an Azure web site from a source control repository.
+        Takes the same parameters as ContinuousDeliveryManager.setup_continuous_delivery. With a spec, one manager
+        can run many setups as concurrent tasks.
+        :return: a ContinuousDeliveryResult
+        """
+        if spec is None:
+            spec = self._get_setup_spec(swap_with_slot, app_type_details, cd_project_url, create_account,
+                                        vsts_app_auth_token, test, webapp_list)
+        pending = await self._start_continuous_delivery(spec)
+        try:
+            if pending.final_status is not None:
+                return self._get_pending_summary(pending, pending.final_status)
+            try:
+                final_status = await self._wait_for_cd_completion(pending.cd, pending.response, pending.timings)
+            except Exception as ex:
+                self._record_outcome(pending, ex)
+                raise
+            self._record_outcome(pending)
+            return self._get_pending_summary(pending, final_status)
+        finally:
+            # The client was checked out by _start_continuous_delivery
+            self._clients.release_client(pending.cd)
+
+    async def setup_continuous_delivery_batch(self, specs, max_concurrency=DEFAULT_ASYNC_BATCH_CONCURRENCY):
+        """
+        Use this method to setup Continuous Delivery of many Azure web sites concurrently.
+        :param specs: list of ContinuousDeliverySetupSpec, one per web site
+        :param max_concurrency: maximum number of web sites that are set up at the same time
+        :return: list with a ContinuousDeliveryResult or the raised exception for each spec, in the order of specs
+        """
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be at least 1.')
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _setup(spec):
+            async with semaphore:
+                return await self.setup_continuous_delivery(spec=spec)
+        return await asyncio.gather(*[_setup(spec) for spec in specs], return_exceptions=True)
+
+    def iter_setup_continuous_delivery(self, specs, max_concurrency=DEFAULT_ASYNC_BATCH_CONCURRENCY):
+        """
+        Use this method to setup Continuous Delivery of many Azure web sites concurrently and act on every web site
+        as soon as its setup is done. The specs are read as setups complete, so they can come from a lazy iterable
+        of any length.
+            async for spec, outcome in cdman.iter_setup_continuous_delivery(specs):
+        :param specs: iterable of ContinuousDeliverySetupSpec, one per web site
+        :param max_concurrency: maximum number of setups started and not yet handed out
+        :return: asynchronous iterator of (spec, ContinuousDeliveryResult or the raised exception), in the order
+         the setups complete. Closing it early with aclose() cancels the running setups.
+        """
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be at least 1.')
+        return _SetupOutcomeIterator(self, iter(specs), max_concurrency)
+
+    async def vsts_accounts_exist(self, creds, vsts_account_names):
+        """
+        Checks which Team Services accounts already exist. Results are cached, the remaining names are checked concurrently.
+        :param creds: credentials for AEX
+        :param vsts_account_names: account names to check
+        :return: dict of account name to True if the account exists
+        """
+        aex_url = self._endpoints.aex_url
+        existence, missing = get_cached_accounts_existence(aex_url, vsts_account_names, self._name_availability_cache)
+        if missing:
+            with self._clients.client(AsyncAccount, '4.0-preview.1', aex_url, creds) as account_client:
+                availabilities = await self._call(
+                    account_client,
+                    lambda: account_client.get_names_availability(missing, DEFAULT_NAME_CHECK_MAX_WORKERS),
+                    cost=len(missing))
+            checked = get_existence_from_availabilities(availabilities)
+            cache_accounts_existence(aex_url, checked, self._name_availability_cache)
+            existence.update(checked)
+        return existence
+
+    async def create_vsts_account(self, creds, vsts_account_name, location=None):
+        """
+        Creates a Team Services account using the AEX APIs.
+        :param creds: credentials for AEX
+        :param vsts_account_name: name of the new account
+        :param location: Azure location used to choose the account region, the default region is used if no region matches
+        """
+        with self._clients.client(AsyncAccount, '4.0-preview.1', self._endpoints.aex_url, creds) as account_client:
+            await self._create_vsts_account(account_client, vsts_account_name, location)
+
+    async def _create_vsts_account(self, account_client, vsts_account_name, location):
+        aex_url = self._endpoints.aex_url
+        self._update_progress(0, 100, 'Creating or getting Team Services account information')
+
+        async def _load_regions():
+            return check_regions(await self._call(account_client, account_client.regions))
+        regions = await self._get_or_load(self._regions_cache, aex_url, _load_regions)
+        region_name = select_region(regions, location).name
+        headers = {IDEMPOTENCY_KEY_HEADER: new_idempotency_key()}
+
+        async def _create_account():
+            return bool((await account_client.create_account(vsts_account_name, region_name, headers)).id)
+
+        async def _probe_account():
+            # After an ambiguous failure the account exists only if the failed attempt created it
+            return True if await account_client.account_exists(vsts_account_name) else None
+        try:
+            created = await self._call(account_client, _create_account, idempotent=False, probe=_probe_account)
+        finally:
+            # The account may exist now, whatever the outcome of the call
+            invalidate_account_existence(aex_url, vsts_account_name, self._name_availability_cache)
+        if created:
+            self._update_progress(5, 100, 'Team Services account created')
+        else:
+            raise RuntimeError('Account creation failed.')
+
+    async def _start_continuous_delivery(self, spec):
+        # Runs the setup up to the point where the provisioning configuration is queued
+        timings = SetupTimings()
+        journal_key, entry = self._get_journal_entry(spec)
+        if entry is not None and entry['status'] in REATTACH_STATUSES:
+            cd = self._clients.checkout_client(AsyncContinuousDelivery, '3.2-preview.1',
+                                               self._endpoints.get_portalext_url(entry['account_name']),
+                                               spec.credentials)
+            timings.observe_status(entry['status'])
+            return self._get_reattached_continuous_delivery(cd, spec, journal_key, entry, timings)
+        timings.start(VALIDATE)
+        prepared = self._prepare_continuous_delivery(spec)
+        timings.end(VALIDATE)
+
+        # Checked out until the setup is done, see setup_continuous_delivery
+        cd = self._clients.checkout_client(AsyncContinuousDelivery, '3.2-preview.1', prepared.portalext_account_url,
+                                           spec.credentials)
+        try:
+            # A web site set up from the same spec before is up to date, without looking up the repository or
+            # account
+            applied = self._get_applied_configuration(spec)
+            if applied is not None:
+                unchanged = await self._get_unchanged_continuous_delivery(cd, spec, prepared, applied, False,
+                                                                          journal_key, timings)
+                if unchanged is not None:
+                    return unchanged
+            targets = self._get_provisioning_configuration_targets(spec)
+
+            # The repository lookup and the account creation do not depend on each other
+            outcomes = await asyncio.gather(
+                _timed(timings, VSTS_INFO, self._resolve_source_repository(
+                    prepared.source_repository, prepared.repo_url, spec.credentials)),
+                _timed(timings, ACCOUNT, self._ensure_vsts_account(spec, prepared.account_name)),
+                return_exceptions=True)
+            for outcome in outcomes:
+                if isinstance(outcome, BaseException):
+                    raise outcome
+            team_project_name, account_created = outcomes
+
+            provisioning_configuration = self._get_provisioning_configuration(spec, prepared, team_project_name,
+                                                                              targets)
+            config_hash = self._get_config_hash(provisioning_configuration)
+            # Another spec may still give the applied configuration, unless it was found deleted above
+            if applied is None:
+                applied = self._get_applied_configuration(spec, config_hash)
+                if applied is not None:
+                    unchanged = await self._get_unchanged_continuous_delivery(cd, spec, prepared, applied,
+                                                                              account_created, journal_key, timings)
+                    if unchanged is not None:
+                        return unchanged
+            timings.start(SUBMIT)
+            try:
+                account_created, idempotency_key = self._record_submission(journal_key, entry, spec, prepared,
+                                                                           account_created, config_hash)
+                response = await self._submit_provisioning_configuration(cd, provisioning_configuration,
+                                                                         idempotency_key)
+            finally:
+                timings.end(SUBMIT)
+            return self._get_pending_continuous_delivery(cd, response, spec, prepared, account_created,
+                                                         journal_key, config_hash, timings)
+        except BaseException:
+            self._clients.release_client(cd)
+            raise
+
+    async def _get_unchanged_continuous_delivery(self, cd, spec, prepared, applied, account_created, journal_key,
+                                                 timings):
+        # Reads the applied provisioning configuration back; None if it was deleted, so the web site is set up anew
+        try:
+            final_status = await self._call(cd, lambda: cd.get_provisioning_configuration(
+                applied['provisioning_configuration_id']))
+        except HttpOperationError as ex:
+            if getattr(ex.response, 'status_code', None) == 404:
+                return None
+            raise
+        return self._get_unchanged_pending(cd, spec, prepared, applied, final_status, account_created, journal_key,
+                                           timings)
+
+    async def _submit_provisioning_configuration(self, cd, provisioning_configuration, idempotency_key):
+        # Every attempt carries the same key. The service gives no way to look a submission up, so it is only
+        # retried when it was not processed.
+        headers = {IDEMPOTENCY_KEY_HEADER: idempotency_key}
+        return await self._call(cd, lambda: cd.provisioning_configuration(provisioning_configuration, headers),
+                                idempotent=False)
+
+    async def _ensure_vsts_account(self, spec, vsts_account_name):
+        # VSTS Account using AEX APIs, returns True if the account was created
+        if not spec.create_account:
+            return False
+        # Concurrent setups for the same new account must not both create it. The ones waiting see it exist, so
+        # only the setup that created it reports account_created.
+        key = (self._endpoints.aex_url, vsts_account_name.lower())
+        lock = self._account_locks.get(key)
+        if lock is None:
+            lock = self._account_locks[key] = asyncio.Lock()
+        async with lock:
+            existence = await self.vsts_accounts_exist(spec.credentials, [vsts_account_name])
+            if existence[vsts_account_name]:
+                self._update_progress(5, 100, 'Team Services account already exists')
+                return False
+            await self.create_vsts_account(spec.credentials, vsts_account_name, spec.webapp_location)
+            return True
+
+    async def _resolve_source_repository(self, source_repository, uri, cred):
+        # TfsGit repositories are identified by their repo id, which needs a lookup; returns the team project name
+        if source_repository.type != 'TfsGit':
+            return None
+        key = self._vsts_info_cache.get_key(uri, cred)
+        info = self._vsts_info_cache.get(key)
+        if info is None:
+            info = await self._get_or_load(None, key, lambda: self._get_vsts_info(uri, cred))
+            self._vsts_info_cache.set(key, info)
+        return self._apply_vsts_info(source_repository, info)
+
+    async def _get_vsts_info(self, vsts_repo_url, cred):
+        # One client per host looks up all repositories of the host
+        vsts_info_url = self._endpoints.get_vsts_info_url(vsts_repo_url)
+        with self._clients.client(AsyncVstsInfoProvider, '3.2-preview', get_origin(vsts_info_url),
+                                  cred) as vsts_info_client:
+            return await self._call(vsts_info_client,
+                                    lambda: vsts_info_client.get_vsts_info(vsts_git_url=vsts_info_url))
+
+    async def _call(self, client, operation, idempotent=True, probe=None, cost=1):
+        # RetryPolicy.call and RateLimiter.call for coroutine functions, waiting with asyncio.sleep
+        policy = self._retry_policy
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await self._limit(client, operation, cost)
+            except Exception as ex:  # pylint: disable=broad-except
+                delay = policy.get_delay(ex, attempt, idempotent)
+                if delay is None and probe is not None and classify_error(ex) == AMBIGUOUS:
+                    delay = policy.get_delay(ex, attempt, idempotent, probed=True)
+                    if delay is not None:
+                        outcome = await self._limit(client, probe)
+                        if outcome is not None:
+                            return outcome
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+
+    async def _limit(self, client, operation, cost=1):
+        # Passes the circuit breaker of the host of client and waits for a request slot, then awaits operation
+        base_url = client.config.base_url
+        circuit = self._circuit_breaker.get_circuit(base_url)
+        circuit.acquire()
+        bucket = self._rate_limiter.get_bucket(base_url)
+        try:
+            wait = bucket.reserve(cost)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            result = await operation()
+        except Exception as ex:
+            if isinstance(ex, HttpOperationError):
+                self._rate_limiter.on_error(bucket, ex)
+            circuit.record(ex)
+            raise
+        except BaseException:
+            # Cancelled
+            circuit.release()
+            raise
+        circuit.record()
+        return result
+
+    async def _get_provisioning_status(self, cd, provisioning_configuration_id):
+        return await self._call(cd, lambda: cd.get_provisioning_configuration(
+            provisioning_configuration_id, raw=True, status_only=True))
+
+    async def _get_or_load(self, cache, key, loader):
+        # Returns the cached value, concurrent misses of the same key on this event loop share one loader call.
+        # Without a cache only the concurrent calls are shared, the caller stores the value.
+        if cache is not None:
+            value = cache.get(key)
+            if value is not None:
+                return value
+        in_flight_key = (id(cache), key)
+        task = self._in_flight.get(in_flight_key)
+        if task is None:
+            task = self._in_flight[in_flight_key] = asyncio.ensure_future(loader())
+            task.add_done_callback(lambda _: self._in_flight.pop(in_flight_key, None))
+        value = await asyncio.shield(task)
+        if cache is not None:
+            cache.set(key, value)
+        return value
+
+    async def _wait_for_cd_completion(self, cd, response, timings=None):
+        # Wait for the configuration to finish and report on the status
+        step = 5
+        max = 100
+        self._update_progress(step, max, 'Setting up Team Services continuous deployment')
+        timer = self._polling_strategy.start()
+        await asyncio.sleep(timer.next_delay())
+        raw_response = await self._poll_provisioning_status(cd, response.id, timings)
+        config = raw_response.output
+        while config.ci_configuration.result.status == 'queued' or config.ci_configuration.result.status == 'inProgress':
+            if timer.expired():
+                self._update_progress(max, max, 'Setting up Team Services continuous deployment (TIMED OUT)')
+                raise ProvisioningTimeoutError(response.id, config.ci_configuration.result.status,
+                                               self._polling_strategy.timeout)
+            step += 5 if step + 5 < max else 0
+            self._update_progress(step, max, 'Setting up Team Services continuous deployment (' + config.ci_configuration.result.status + ')')
+            await asyncio.sleep(timer.next_delay(get_retry_after(raw_response.response)))
+            raw_response = await self._poll_provisioning_status(cd, response.id, timings)
+            config = raw_response.output
+        if config.ci_configuration.result.status == 'failed':
+            self._update_progress(max, max, 'Setting up Team Services continuous deployment (FAILED)')
+            raise ProvisioningFailedError(response.id, config.ci_configuration.result.status_message)
+        self._update_progress(max, max, 'Setting up Team Services continuous deployment (SUCCEEDED)')
+        return config
+
+    async def _poll_provisioning_status(self, cd, provisioning_configuration_id, timings):
+        raw_response = await self._get_provisioning_status(cd, provisioning_configuration_id)
+        if timings is not None:
+            timings.count_poll()
+            timings.observe_status(raw_response.output.ci_configuration.result.status)
+        return raw_response
+
+
+async def _timed(timings, phase, awaitable):
+    # Times an awaitable as a phase of the setup. The timings are not made active: tasks share the thread.
+    timings.start(phase)
+    try:
+        return await awaitable
+    finally:
+        timings.end(phase)
+
+
+class _SetupOutcomeIterator(object):
+    # Asynchronous iterator of the setups of AsyncContinuousDeliveryManager.iter_setup_continuous_delivery
+    def __init__(self, manager, specs, max_in_flight):
+        self._manager = manager
+        self._specs = specs
+        self._in_flight = {}
+        self._done = []
+        self._start(max_in_flight)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._done:
+            if not self._in_flight:
+                raise StopAsyncIteration
+            done, _ = await asyncio.wait(list(self._in_flight), return_when=asyncio.FIRST_COMPLETED)
+            self._done.extend(done)
+        task = self._done.pop(0)
+        spec = self._in_flight.pop(task)
+        # Start the next setup before handing out the finished one, so the work goes on meanwhile
+        self._start(1)
+        error = task.exception()
+        return spec, error if error is not None else task.result()
+
+    async def aclose(self):
+        tasks = list(self._in_flight)
+        self._in_flight.clear()
+        self._done = []
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks)
+
+    def _start(self, count):
+        for _ in range(count):
+            spec = next(self._specs, None)
+            if spec is None:
+                return
+            self._in_flight[asyncio.ensure_future(self._manager.setup_continuous_delivery(spec=spec))] = spec
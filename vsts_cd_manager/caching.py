@@ -0,0 +1,202 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+DEFAULT_MAX_SIZE = 1024
+
+
+class MemoryCacheBackend(object):
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        """
+        Process local cache storage. The least recently used entry is evicted when max_size is exceeded.
+        The backend is not thread-safe on its own, TTLCache serializes the access to it.
+        :param max_size: maximum number of entries
+        """
+        if max_size < 1:
+            raise ValueError('max_size must be at least 1.')
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """
+        :return: tuple of (value, expires_at) or None if the key is not cached
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._entries[key] = entry
+        return entry
+
+    def set(self, key, value, expires_at):
+        self._entries.pop(key, None)
+        self._entries[key] = (value, expires_at)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class FileCacheBackend(MemoryCacheBackend):
+    def __init__(self, path, max_size=DEFAULT_MAX_SIZE, encode=None, decode=None):
+        """
+        Cache storage that survives the process in a JSON file. The file is rewritten on every change.
+        :param path: path of the cache file, created if it does not exist
+        :param max_size: maximum number of entries
+        :param encode: method of the form func(value) returning a JSON serializable object
+        :param decode: method of the form func(data) reversing encode
+        """
+        super(FileCacheBackend, self).__init__(max_size)
+        self.path = path
+        self._encode = encode or (lambda value: value)
+        self._decode = decode or (lambda data: data)
+        self._load()
+
+    def set(self, key, value, expires_at):
+        super(FileCacheBackend, self).set(key, value, expires_at)
+        self._save()
+
+    def delete(self, key):
+        super(FileCacheBackend, self).delete(key)
+        self._save()
+
+    def clear(self):
+        super(FileCacheBackend, self).clear()
+        self._save()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as cache_file:
+            for item in json.load(cache_file):
+                super(FileCacheBackend, self).set(_to_key(item['key']), self._decode(item['value']),
+                                                  item['expires_at'])
+
+    def _save(self):
+        items = [{'key': key, 'value': self._encode(value), 'expires_at': expires_at}
+                 for key, (value, expires_at) in self._entries.items()]
+        directory = os.path.dirname(os.path.abspath(self.path))
+        handle, temp_path = tempfile.mkstemp(dir=directory, prefix='.cache')
+        try:
+            with os.fdopen(handle, 'w') as cache_file:
+                json.dump(items, cache_file)
+            _replace_file(temp_path, self.path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+
+class TTLCache(object):
+    def __init__(self, ttl, backend=None, clock=time.time):
+        """
+        Thread-safe cache with a time to live per entry. Concurrent misses of the same key are
+        deduplicated so only one caller runs the loader while the others wait for its result.
+        :param ttl: seconds an entry stays valid
+        :param backend: MemoryCacheBackend (default) or another storage with the same methods
+        :param clock: method returning the current time in seconds, wall clock time so entries can be persisted
+        """
+        if ttl <= 0:
+            raise ValueError('ttl must be positive.')
+        self.ttl = ttl
+        self._backend = backend if backend is not None else MemoryCacheBackend()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._get_valid(key)
+        return default if value is _MISSING else value
+
+    def set(self, key, value):
+        with self._lock:
+            self._backend.set(key, value, self._clock() + self.ttl)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._backend.delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._backend.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._backend)
+
+    def get_or_load(self, key, loader):
+        """
+        Returns the cached value for key, calling loader() to produce it on a miss.
+        Errors raised by the loader are passed to every waiting caller and are not cached.
+        :param key: hashable cache key
+        :param loader: method of the form func() returning the value
+        """
+        with self._lock:
+            value = self._get_valid(key)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            self.misses += 1
+            in_flight = self._in_flight.get(key)
+            owner = in_flight is None
+            if owner:
+                in_flight = self._in_flight[key] = Future()
+        if not owner:
+            return in_flight.result()
+        try:
+            value = loader()
+        except Exception as ex:
+            with self._lock:
+                del self._in_flight[key]
+            in_flight.set_exception(ex)
+            raise
+        with self._lock:
+            self._backend.set(key, value, self._clock() + self.ttl)
+            del self._in_flight[key]
+        in_flight.set_result(value)
+        return value
+
+    def _get_valid(self, key):
+        entry = self._backend.get(key)
+        if entry is None:
+            return _MISSING
+        if entry[1] <= self._clock():
+            self._backend.delete(key)
+            return _MISSING
+        return entry[0]
+
+
+_MISSING = object()
+
+
+def _to_key(value):
+    # JSON turns tuples into lists, turn them back into hashable keys
+    if isinstance(value, list):
+        return tuple(_to_key(item) for item in value)
+    return value
+
+
+def _rename_over(source, destination):
+    if os.path.exists(destination):
+        os.remove(destination)
+    os.rename(source, destination)
+
+
+_replace_file = getattr(os, 'replace', _rename_over)
@@ -0,0 +1,200 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import time
+
+from msrest.exceptions import HttpOperationError
+
+try:
+    from urllib.parse import urlparse
+except ImportError:
+    from urlparse import urlparse  #pylint: disable=import-error
+from .exceptions import CircuitOpenError
+from .retry import classify_error
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+_default_breaker = None
+_default_breaker_lock = threading.Lock()
+
+
+def is_endpoint_failure(error):
+    """
+    Tells whether an error shows the endpoint is failing: it could not be reached, timed out or answered with a
+    server error. Throttling (429) and client errors show it is up.
+    """
+    if isinstance(error, HttpOperationError) and getattr(error.response, 'status_code', None) == 429:
+        return False
+    return classify_error(error) is not None
+
+
+class Circuit(object):
+    def __init__(self, host, failure_threshold, reset_timeout, clock=_monotonic):
+        """
+        State of the circuit breaker of one host. It opens after failure_threshold consecutive failures and
+        rejects calls until reset_timeout has passed. Then it is half-open: one call is let through as a probe,
+        which closes the circuit if it succeeds and opens it again if it fails.
+        :param host: host the circuit protects
+        :param failure_threshold: consecutive failures opening the circuit
+        :param reset_timeout: seconds the circuit stays open before a probe is let through
+        :param clock: method returning a monotonic time in seconds
+        """
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self.opened_count = 0
+        self.rejected_count = 0
+
+    @property
+    def state(self):
+        """
+        :return: CLOSED, OPEN or HALF_OPEN
+        """
+        with self._lock:
+            if self._state == OPEN and self._clock() >= self._opened_at + self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def acquire(self):
+        """
+        Asks to make a call.
+        :raises CircuitOpenError: the circuit is open, or half-open with its probe in flight
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            retry_in = self._opened_at + self.reset_timeout - self._clock()
+            if retry_in <= 0 and not self._probing:
+                self._state = HALF_OPEN
+                self._probing = True
+                return
+            self.rejected_count += 1
+            raise CircuitOpenError(self.host, max(0.0, retry_in))
+
+    def record(self, error=None):
+        """
+        Records the outcome of a call allowed by acquire.
+        :param error: the exception raised by the call, None if it succeeded
+        """
+        with self._lock:
+            self._probing = False
+            if error is None or not is_endpoint_failure(error):
+                self._state = CLOSED
+                self._failures = 0
+                return
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.opened_count += 1
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+    def release(self):
+        """
+        Gives back a call allowed by acquire that ended without an outcome, e.g. because it was cancelled.
+        """
+        with self._lock:
+            self._probing = False
+
+    def get_statistics(self):
+        """
+        :return: dict with the state, the consecutive failures and the open and rejection counters
+        """
+        state = self.state
+        with self._lock:
+            return {
+                'state': state,
+                'failures': self._failures,
+                'opened': self.opened_count,
+                'rejected': self.rejected_count,
+            }
+
+
+class CircuitBreaker(object):
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT,
+                 clock=_monotonic):
+        """
+        Keeps a Circuit per host, so that calls to an endpoint that keeps failing fail fast with CircuitOpenError
+        instead of every setup waiting for it to time out.
+        :param failure_threshold: consecutive failures of a host opening its circuit
+        :param reset_timeout: seconds a circuit stays open before a probe call is let through
+        :param clock: method returning a monotonic time in seconds
+        """
+        if failure_threshold < 1:
+            raise ValueError('failure_threshold must be at least 1.')
+        if reset_timeout < 0:
+            raise ValueError('reset_timeout must not be negative.')
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def get_circuit(self, url):
+        """
+        :return: the Circuit of the host of url
+        """
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None:
+                circuit = self._circuits[host] = Circuit(host, self.failure_threshold, self.reset_timeout,
+                                                         self._clock)
+            return circuit
+
+    def call(self, url, operation):
+        """
+        Runs operation unless the circuit of the host of url is open.
+        :param url: url of the service called by operation
+        :param operation: method of the form func() making the request
+        :return: the result of operation
+        :raises CircuitOpenError: the circuit is open
+        """
+        circuit = self.get_circuit(url)
+        circuit.acquire()
+        try:
+            result = operation()
+        except Exception as ex:
+            circuit.record(ex)
+            raise
+        except BaseException:
+            circuit.release()
+            raise
+        circuit.record()
+        return result
+
+    def get_statistics(self):
+        """
+        :return: dict of host to the statistics of its Circuit
+        """
+        with self._lock:
+            circuits = list(self._circuits.items())
+        return dict((host, circuit.get_statistics()) for host, circuit in circuits)
+
+
+def get_default_circuit_breaker():
+    """
+    :return: the process wide CircuitBreaker used by ContinuousDeliveryManager and ProvisioningStatusPoller unless
+     another one is given
+    """
+    global _default_breaker  # pylint: disable=global-statement
+    with _default_breaker_lock:
+        if _default_breaker is None:
+            _default_breaker = CircuitBreaker()
+        return _default_breaker
@@ -0,0 +1,209 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    from urllib.parse import urlsplit
+except ImportError:
+    from urlparse import urlsplit  #pylint: disable=import-error
+from .timings import count_response
+
+DEFAULT_MAX_CLIENTS = 64
+DEFAULT_IDLE_TIMEOUT = 300
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+class ClientRegistry(object):
+    def __init__(self, transport_retries=None, max_clients=DEFAULT_MAX_CLIENTS, idle_timeout=DEFAULT_IDLE_TIMEOUT,
+                 clock=_monotonic):
+        """
+        Hands out shared REST clients (ContinuousDelivery, VstsInfoProvider, Account) so that their HTTP
+        sessions, and with them the open connections, are reused across calls.
+        Clients are keyed by client class, base url, api version and credentials object. The least recently used
+        clients are closed and dropped beyond max_clients, and so are clients not handed out for idle_timeout
+        seconds, so a long running process using new credentials for every call does not keep them all.
+        A client taken with checkout_client is not closed by the eviction until it is released.
+        :param transport_retries: number of retries of the msrest transport for the clients, None keeps the
+         msrest default. The msrest transport may retry POSTs blindly, callers retrying with a RetryPolicy
+         use 0.
+        :param max_clients: maximum number of clients kept
+        :param idle_timeout: seconds a client is kept after it was last handed out
+        :param clock: method returning a monotonic time in seconds
+        """
+        if max_clients < 1:
+            raise ValueError('max_clients must be at least 1.')
+        self._transport_retries = transport_retries
+        self._max_clients = max_clients
+        self._idle_timeout = idle_timeout
+        self._clock = clock
+        # key to (client, creds, last handed out), least recently used first
+        self._clients = OrderedDict()
+        # id of a checked out client to [client, number of checkouts]
+        self._checkouts = {}
+        # ids of the checked out clients evicted meanwhile, closed on their last release
+        self._evicted_checkouts = set()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def get_client(self, client_class, api_version, base_url, creds):
+        """
+        Returns the shared client for the given settings, creating it on first use.
+        :param client_class: client class, constructed as client_class(api_version, base_url, creds)
+        :param api_version: Version of the API to use
+        :param base_url: Service URL
+        :param creds: credentials for the service
+        :return: client instance
+        """
+        return self._get_client(client_class, api_version, base_url, creds, False)
+
+    def checkout_client(self, client_class, api_version, base_url, creds):
+        """
+        Like get_client, but the client is not closed by an eviction until every checkout of it is released
+        with release_client.
+        :return: client instance
+        """
+        return self._get_client(client_class, api_version, base_url, creds, True)
+
+    def release_client(self, client):
+        """
+        Releases a checkout of checkout_client. The last release of a client evicted meanwhile closes it.
+        """
+        with self._lock:
+            checkout = self._checkouts[id(client)]
+            checkout[1] -= 1
+            if checkout[1] > 0:
+                return
+            del self._checkouts[id(client)]
+            if id(client) not in self._evicted_checkouts:
+                return
+            self._evicted_checkouts.discard(id(client))
+        self._release_clients([client])
+
+    @contextmanager
+    def client(self, client_class, api_version, base_url, creds):
+        """
+        Checks out the client for the duration of a with block.
+            with registry.client(Account, '4.0-preview.1', aex_url, creds) as account_client:
+        """
+        client = self.checkout_client(client_class, api_version, base_url, creds)
+        try:
+            yield client
+        finally:
+            self.release_client(client)
+
+    def _get_client(self, client_class, api_version, base_url, creds, checkout):
+        # The credentials object is kept alive by the entry, so its id stays unique while it is cached
+        key = (client_class, base_url, api_version, id(creds))
+        now = self._clock()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('The client registry has been closed.')
+            entry = self._clients.pop(key, None)
+            client = entry[0] if entry is not None else self._create_client(client_class, api_version, base_url,
+                                                                             creds)
+            self._clients[key] = (client, creds, now)
+            if checkout:
+                self._checkouts.setdefault(id(client), [client, 0])[1] += 1
+            evicted = self._evict(now)
+        self._release_clients(evicted)
+        return client
+
+    def __len__(self):
+        with self._lock:
+            return len(self._clients)
+
+    def close(self):
+        """
+        Closes the HTTP sessions of all clients handed out by this registry.
+        """
+        for client in self._detach_clients():
+            _close_client(client)
+
+    def _create_client(self, client_class, api_version, base_url, creds):
+        client = client_class(api_version, base_url, creds)
+        client.config.keep_alive = True
+        # Counts the requests and bytes of the setup the calling thread works for, see SetupTimings
+        client.config.hooks.append(count_response)
+        if self._transport_retries is not None:
+            client.config.retry_policy.retries = self._transport_retries
+        return client
+
+    def _evict(self, now):
+        # Drops the least recently used clients beyond max_clients and the idle ones; returns those to close now.
+        # Checked out ones are closed on their last release.
+        evicted = []
+        while self._clients:
+            key, (client, _, last_used) = next(iter(self._clients.items()))
+            if len(self._clients) <= self._max_clients and now - last_used < self._idle_timeout:
+                break
+            del self._clients[key]
+            if id(client) in self._checkouts:
+                self._evicted_checkouts.add(id(client))
+            else:
+                evicted.append(client)
+        return evicted
+
+    def _release_clients(self, clients):
+        # Closes the sessions of evicted clients. They stay usable, a setup still polling with one gets a new
+        # session on its next request.
+        for client in clients:
+            close = getattr(getattr(client, '_client', None), 'close', None)
+            if close is not None:
+                close()
+
+    def _detach_clients(self):
+        # Marks the registry closed and returns the clients it handed out
+        with self._lock:
+            self._closed = True
+            clients = [entry[0] for entry in self._clients.values()]
+            clients.extend(self._checkouts[client_id][0] for client_id in self._evicted_checkouts)
+            self._clients.clear()
+            self._evicted_checkouts.clear()
+        return clients
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_details):
+        self.close()
+
+
+def get_origin(url):
+    """
+    :return: the scheme and host of url, e.g. https://account1.visualstudio.com. Clients created with it serve
+     every path of the host with one HTTP session.
+    """
+    parts = urlsplit(url)
+    return '{}://{}'.format(parts.scheme.lower(), parts.netloc.lower())
+
+
+def get_default_client_registry():
+    """
+    :return: the process wide ClientRegistry used by ContinuousDeliveryManager unless another one is given.
+     It is closed when the interpreter exits. The manager retries the calls itself, so the transport does not.
+    """
+    global _default_registry  # pylint: disable=global-statement
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = ClientRegistry(transport_retries=0)
+            atexit.register(_default_registry.close)
+        return _default_registry
+
+
+def _close_client(client):
+    service_client = getattr(client, '_client', None)
+    close = getattr(service_client, 'close', None)
+    if close is not None:
+        client.config.keep_alive = False
+        close()
@@ -4,31 +4,74 @@
 # --------------------------------------------------------------------------------------------
 
 from __future__ import print_function
-import re
-import time
+import itertools
+import threading
 import uuid
+import weakref
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 
 try:
-    from urllib.parse import quote, urlparse
+    from urllib.parse import quote
 except ImportError:
     from urllib import quote  #pylint: disable=no-name-in-module
-    from urlparse import urlparse  #pylint: disable=import-error
+from msrest.exceptions import HttpOperationError
 from vsts_info_provider import VstsInfoProvider
 from continuous_delivery import ContinuousDelivery
 from continuous_delivery.models import (AuthorizationInfo, AuthorizationInfoParameters, BuildConfiguration,
-                                        CiArtifact, CiConfiguration, ProvisioningConfiguration,
+                                        CiArtifact, CiConfiguration, CiResult, ProvisioningConfiguration,
                                         ProvisioningConfigurationSource, ProvisioningConfigurationTarget,
                                         SlotSwapConfiguration, SourceRepository, CreateOptions)
 from aex_accounts import Account
-
-# Use this class to setup or remove continuous delivery mechanisms for Azure web sites using VSTS build and release
-class ContinuousDeliveryManager(object):
-    def __init__(self, progress_callback):
+from .account_names import (get_accounts_existence, get_default_name_availability_cache,
+                            invalidate_account_existence)
+from .circuit_breaker import get_default_circuit_breaker
+from .desired_state import get_provisioning_configuration_body, get_provisioning_configuration_hash, get_site_key
+from .client_registry import get_default_client_registry, get_origin
+from .endpoints import ServiceEndpoints
+from .exceptions import ProvisioningFailedError, ProvisioningTimeoutError, UnconfirmedSubmissionError
+from .journal import REATTACH_STATUSES, SUBMITTING
+from .polling import PollingStrategy, get_retry_after
+from .rate_limiter import get_default_rate_limiter
+from .regions import get_default_regions_cache, get_regions, select_region
+from .repository_urls import EXTERNAL_GIT, GITHUB, classify_repository_url
+from .retry import IDEMPOTENCY_KEY_HEADER, RetryPolicy, new_idempotency_key
+from .setup_spec import ContinuousDeliverySetupSpec, get_setup_spec_hash
+from .stage_graph import StageGraph
+from .timings import ACCOUNT, SUBMIT, VALIDATE, VSTS_INFO, SetupTimings, active
+from .vsts_info_cache import get_default_vsts_info_cache
+
+DEFAULT_BATCH_MAX_WORKERS = 8
+
+# Secrets of a spec that plans show masked
+_SECRET_SPEC_FIELDS = ('vsts_app_auth_token', 'git_token', 'private_repo_password')
+_REDACTED = '***'
+
+
+class _ContinuousDeliveryManagerBase(object):
+    def __init__(self, progress_callback, polling_strategy, client_registry, vsts_info_cache, regions_cache,
+                 name_availability_cache, endpoints, retry_policy, rate_limiter, circuit_breaker, journal, resume,
+                 desired_state, reconcile):
         """
-        Use this class to setup or remove continuous delivery mechanisms for Azure web sites using VSTS build and release
-        :param progress_callback: method of the form func(count, total, message)
+        Inputs, payloads, journal records and summaries of the setups, none of which make a service call. Shared
+        by ContinuousDeliveryManager and AsyncContinuousDeliveryManager, which make the service calls; see
+        ContinuousDeliveryManager for the parameters.
         """
         self._update_progress = progress_callback or self._skip_update_progress
+        self._polling_strategy = polling_strategy or PollingStrategy()
+        # Registries and caches define __len__, so an empty one is falsy; compare with None
+        self._clients = client_registry if client_registry is not None else get_default_client_registry()
+        self._vsts_info_cache = vsts_info_cache if vsts_info_cache is not None else get_default_vsts_info_cache()
+        self._regions_cache = regions_cache if regions_cache is not None else get_default_regions_cache()
+        self._name_availability_cache = (name_availability_cache if name_availability_cache is not None
+                                         else get_default_name_availability_cache())
+        self._endpoints = endpoints or ServiceEndpoints()
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._rate_limiter = rate_limiter if rate_limiter is not None else get_default_rate_limiter()
+        self._circuit_breaker = circuit_breaker if circuit_breaker is not None else get_default_circuit_breaker()
+        self._journal = journal
+        self._resume = resume
+        self._desired_state = desired_state
+        self._reconcile = reconcile
         self._azure_info = _AzureInfo()
         self._repo_info = _RepositoryInfo()
 
@@ -42,7 +85,8 @@ class ContinuousDeliveryManager(object):
     def set_azure_web_info(self, resource_group_name, website_name, credentials,
                            subscription_id, subscription_name, tenant_id, webapp_location):
         """
-        Call this method before attempting to setup continuous delivery to setup the azure settings
+        Call this method before attempting to setup continuous delivery to setup the azure settings,
+        unless the setup is given a ContinuousDeliverySetupSpec
         :param resource_group_name:
         :param website_name:
         :param credentials:
@@ -62,7 +106,8 @@ class ContinuousDeliveryManager(object):
 
     def set_repository_info(self, repo_url, branch, git_token, private_repo_username, private_repo_password):
         """
-        Call this method before attempting to setup continuous delivery to setup the source control settings
+        Call this method before attempting to setup continuous delivery to setup the source control settings,
+        unless the setup is given a ContinuousDeliverySetupSpec
         :param repo_url: URL of the code repo
         :param branch: repo branch
         :param git_token: git token
@@ -84,74 +129,196 @@ class ContinuousDeliveryManager(object):
         # TODO: this would be called by appservice web source-control delete
         return
 
-    def setup_continuous_delivery(self, swap_with_slot, app_type_details, cd_project_url, create_account,
-                                  vsts_app_auth_token, test, webapp_list):
+    def validate_setup_spec(self, spec):
         """
-        Use this method to setup Continuous Delivery of an Azure web site from a source control repository.
-        :param swap_with_slot: the slot to use for deployment
-        :param app_type_details: the details of app that will be deployed. i.e. app_type = Python, python_framework = Django etc.
-        :param cd_project_url: CD Project url in the format of https://<accountname>.visualstudio.com/<projectname> 
-        :param create_account: Boolean value to decide if account need to be created or not
-        :param vsts_app_auth_token: Authentication token for vsts app
-        :param test: Load test webapp name
-        :param webapp_list: Existing webapp list
-        :return: a message indicating final status and instructions for the user
+        Checks the inputs of a setup the way setup_continuous_delivery does before its first service call: the
+        project url, the repository and the app type details.
+        :param spec: ContinuousDeliverySetupSpec
+        :raises RuntimeError: an input is not valid
         """
+        self._prepare_continuous_delivery(spec)
 
-        branch = self._repo_info.branch or 'refs/heads/master'
-        self._validate_cd_project_url(cd_project_url)
-        vsts_account_name = self._get_vsts_account_name(cd_project_url)
+    def plan_continuous_delivery(self, specs, vsts_info=None, redact=True):
+        """
+        Use this method to see the provisioning configurations that setup_continuous_delivery would submit for
+        many web sites, without any service call. The specs are read lazily.
+        :param specs: iterable of ContinuousDeliverySetupSpec, one per web site
+        :param vsts_info: method of the form func(repo_url, creds) returning the VstsInfo of a Team Services git
+         repository, or None if it is not known. By default only the VstsInfoCache of the manager is looked at.
+        :param redact: whether the tokens and passwords are replaced by *** in the bodies
+        :return: iterator of (spec, dict of the JSON body of the ProvisioningConfiguration or the raised exception),
+         in the order of specs
+        """
+        get_vsts_info = vsts_info or self._get_cached_vsts_info
+        for spec in specs:
+            try:
+                body = self._plan_continuous_delivery(spec, get_vsts_info, redact)
+            except Exception as ex:  # pylint: disable=broad-except
+                body = ex
+            yield spec, body
+
+    def _plan_continuous_delivery(self, spec, get_vsts_info, redact):
+        if redact:
+            spec = spec._replace(**dict((field, _REDACTED) for field in _SECRET_SPEC_FIELDS
+                                        if getattr(spec, field) is not None))
+        prepared = self._prepare_continuous_delivery(spec)
+        team_project_name = None
+        if prepared.source_repository.type == 'TfsGit':
+            info = get_vsts_info(prepared.repo_url, spec.credentials)
+            if info is None:
+                raise RuntimeError('The repository {} is not known, it is only looked up when set up.'.format(
+                    spec.repo_url))
+            team_project_name = self._apply_vsts_info(prepared.source_repository, info)
+        # A service plan created for the test web app is named after the spec, so plans of a spec do not differ
+        targets = self._get_provisioning_configuration_targets(spec, 'ServicePlan' + get_setup_spec_hash(spec)[:13])
+        provisioning_configuration = self._get_provisioning_configuration(spec, prepared, team_project_name,
+                                                                          targets)
+        return get_provisioning_configuration_body(provisioning_configuration)
+
+    def _get_cached_vsts_info(self, repo_url, creds):
+        return self._vsts_info_cache.get(self._vsts_info_cache.get_key(repo_url, creds))
+
+    def _get_setup_spec(self, swap_with_slot, app_type_details, cd_project_url, create_account,
+                        vsts_app_auth_token, test, webapp_list):
+        # Snapshot of the values given to the setters, so the setup itself only reads the spec
+        return ContinuousDeliverySetupSpec(
+            resource_group_name=self._azure_info.resource_group_name, website_name=self._azure_info.website_name,
+            repo_url=self._repo_info.url, app_type_details=app_type_details, cd_project_url=cd_project_url,
+            vsts_app_auth_token=vsts_app_auth_token, credentials=self._azure_info.credentials,
+            subscription_id=self._azure_info.subscription_id, subscription_name=self._azure_info.subscription_name,
+            tenant_id=self._azure_info.tenant_id, webapp_location=self._azure_info.webapp_location,
+            swap_with_slot=swap_with_slot, test=test, branch=self._repo_info.branch,
+            git_token=self._repo_info.git_token, private_repo_username=self._repo_info._private_repo_username,
+            private_repo_password=self._repo_info._private_repo_password, create_account=create_account,
+            webapp_list=webapp_list)
+
+    def _prepare_continuous_delivery(self, spec):
+        # Validates the inputs and classifies the repository, without any service call
+        branch = spec.branch or 'refs/heads/master'
+        self._validate_cd_project_url(spec.cd_project_url)
+        vsts_account_name = self._get_vsts_account_name(spec.cd_project_url)
 
         # Verify inputs before we start generating tokens
-        source_repository, account_name, team_project_name = self._get_source_repository(self._repo_info.url,
-            self._repo_info.git_token, branch, self._azure_info.credentials, 
-            self._repo_info._private_repo_username, self._repo_info._private_repo_password)
+        source_repository, account_name, repo_url = self._classify_source_repository(spec.repo_url, spec.git_token,
+            branch, spec.private_repo_username, spec.private_repo_password)
         self._verify_vsts_parameters(vsts_account_name, source_repository)
+        build_configuration = self._get_build_configuration(spec.app_type_details)
         vsts_account_name = vsts_account_name or account_name
-        cd_project_name = team_project_name or self._azure_info.website_name
-        account_url = 'https://{}.visualstudio.com'.format(quote(vsts_account_name))
-        portalext_account_url = 'https://{}.portalext.visualstudio.com'.format(quote(vsts_account_name))
-
-        # VSTS Account using AEX APIs
-        account_created = False
-        if create_account:
-            self.create_vsts_account(self._azure_info.credentials, vsts_account_name)
-            account_created = True
-        
-        # Create ContinuousDelivery client
-        cd = ContinuousDelivery('3.2-preview.1', portalext_account_url, self._azure_info.credentials)
+        return _PreparedContinuousDelivery(source_repository, build_configuration, vsts_account_name,
+                                           self._endpoints.get_account_url(vsts_account_name),
+                                           self._endpoints.get_portalext_url(vsts_account_name), repo_url)
+
+    def _get_provisioning_configuration_targets(self, spec, app_service_plan_name=None):
+        auth_info = AuthorizationInfo('Headers', AuthorizationInfoParameters('Bearer ' + spec.vsts_app_auth_token))
+        return self._build_provisioning_configuration_targets(auth_info, spec, app_service_plan_name)
 
+    def _get_provisioning_configuration(self, spec, prepared, team_project_name, targets):
         # Construct the config body of the continuous delivery call
-        build_configuration = self._get_build_configuration(app_type_details)
-        source = ProvisioningConfigurationSource('codeRepository', source_repository, build_configuration)
-        auth_info = AuthorizationInfo('Headers', AuthorizationInfoParameters('Bearer ' + vsts_app_auth_token))
-        target = self.get_provisioning_configuration_target(auth_info, swap_with_slot, test, webapp_list)
+        cd_project_name = team_project_name or spec.website_name
+        source = ProvisioningConfigurationSource('codeRepository', prepared.source_repository,
+                                                 prepared.build_configuration)
         ci_config = CiConfiguration(CiArtifact(name=cd_project_name))
-        config = ProvisioningConfiguration(None, source, target, ci_config)
+        return ProvisioningConfiguration(None, source, targets, ci_config)
 
-        # Configure the continuous deliver using VSTS as a backend
-        response = cd.provisioning_configuration(config)
+    def _get_pending_continuous_delivery(self, cd, response, spec, prepared, account_created, journal_key=None,
+                                         config_hash=None, timings=None):
         if response.ci_configuration.result.status == 'queued':
-            final_status = self._wait_for_cd_completion(cd, response)
-            return self._get_summary(final_status, account_url, vsts_account_name, account_created, self._azure_info.subscription_id,
-                                     self._azure_info.resource_group_name, self._azure_info.website_name)
+            self._record_journal(journal_key, 'queued', provisioning_configuration_id=response.id)
+            if timings is not None:
+                timings.observe_status('queued')
+            return _PendingContinuousDelivery(cd, response, prepared.account_url, prepared.account_name,
+                                              account_created, spec.subscription_id, spec.resource_group_name,
+                                              spec.website_name, journal_key, config_hash, timings=timings,
+                                              spec_hash=self._get_desired_spec_hash(spec))
         else:
             raise RuntimeError('Unknown status returned from provisioning_configuration: ' + response.ci_configuration.result.status)
-    
-    def create_vsts_account(self, creds, vsts_account_name):
-        aex_url = 'https://app.vsaex.visualstudio.com'
-        accountClient = Account('4.0-preview.1', aex_url, creds)
-        self._update_progress(0, 100, 'Creating or getting Team Services account information')            
-        regions = accountClient.regions()
-        if regions.count == 0:
-            raise RuntimeError('Region details not found.')
-        region_name = regions.value[0].name
-        create_account_reponse = accountClient.create_account(vsts_account_name, region_name)
-        if create_account_reponse.id:
-            self._update_progress(5, 100, 'Team Services account created')
-        else:
-            raise RuntimeError('Account creation failed.')
-        
+
+    def _get_journal_entry(self, spec):
+        # Returns the journal key of the setup and, when resuming, its last journal entry
+        if self._journal is None:
+            return None, None
+        journal_key = get_setup_spec_hash(spec)
+        entry = self._journal.get(journal_key) if self._resume else None
+        if entry is not None and entry['status'] == SUBMITTING:
+            # Only the idempotency key would guard a second submission, and the service does not honor it
+            raise UnconfirmedSubmissionError(journal_key, entry.get('website_name'), entry.get('account_name'))
+        return journal_key, entry
+
+    def _record_submission(self, journal_key, entry, spec, prepared, account_created, config_hash=None):
+        # Records the submission before it is sent. Returns whether this setup created the account, in this run or an
+        # earlier one, and the idempotency key of the submission.
+        idempotency_key = new_idempotency_key()
+        account_created = account_created or bool(entry is not None and entry.get('account_created'))
+        self._record_journal(journal_key, SUBMITTING, website_name=spec.website_name,
+                             account_name=prepared.account_name, account_created=account_created,
+                             idempotency_key=idempotency_key, provisioning_configuration_id=None,
+                             config_hash=config_hash)
+        return account_created, idempotency_key
+
+    def _get_reattached_continuous_delivery(self, cd, spec, journal_key, entry, timings=None):
+        # The provisioning configuration submitted by an earlier run, its status is polled as if it was just queued
+        response = ProvisioningConfiguration(entry['provisioning_configuration_id'], None, None,
+                                             CiConfiguration(result=CiResult(entry['status'])))
+        self._update_progress(5, 100, 'Resuming Team Services continuous deployment setup')
+        return _PendingContinuousDelivery(cd, response, self._endpoints.get_account_url(entry['account_name']),
+                                          entry['account_name'], entry['account_created'], spec.subscription_id,
+                                          spec.resource_group_name, spec.website_name, journal_key,
+                                          entry.get('config_hash'), timings=timings,
+                                          spec_hash=self._get_desired_spec_hash(spec))
+
+    def _get_config_hash(self, provisioning_configuration):
+        if self._desired_state is None:
+            return None
+        return get_provisioning_configuration_hash(provisioning_configuration)
+
+    def _get_desired_spec_hash(self, spec):
+        if self._desired_state is None:
+            return None
+        return get_setup_spec_hash(spec)
+
+    def _get_applied_configuration(self, spec, config_hash=None):
+        # When reconciling, the desired state entry of a web site whose configuration is already applied: the one
+        # applied from the same spec, which is known before any service call, or with config_hash if given
+        if not self._reconcile or self._desired_state is None:
+            return None
+        applied = self._desired_state.get(get_site_key(spec.subscription_id, spec.resource_group_name,
+                                                       spec.website_name))
+        if applied is None:
+            return None
+        if config_hash is None:
+            return applied if applied.get('spec_hash') == get_setup_spec_hash(spec) else None
+        return applied if applied['config_hash'] == config_hash else None
+
+    def _get_unchanged_pending(self, cd, spec, prepared, applied, final_status, account_created, journal_key,
+                               timings=None):
+        # The applied provisioning configuration, read back from the service, in place of a new one
+        self._record_journal(journal_key, 'succeeded', website_name=spec.website_name,
+                             account_name=prepared.account_name, account_created=account_created,
+                             provisioning_configuration_id=applied['provisioning_configuration_id'],
+                             config_hash=applied['config_hash'])
+        self._update_progress(5, 100, 'Team Services continuous deployment is up to date')
+        return _PendingContinuousDelivery(cd, final_status, prepared.account_url, prepared.account_name,
+                                          account_created, spec.subscription_id, spec.resource_group_name,
+                                          spec.website_name, journal_key, applied['config_hash'], unchanged=True,
+                                          timings=timings, final_status=final_status)
+
+    def _record_outcome(self, pending, error=None):
+        # Any error but a failed provisioning leaves the setup in flight, so a resume re-attaches to it
+        if pending.unchanged:
+            return
+        if error is None:
+            self._record_journal(pending.journal_key, 'succeeded')
+            if self._desired_state is not None and pending.config_hash is not None:
+                self._desired_state.set(get_site_key(pending.subscription_id, pending.resource_group_name,
+                                                     pending.website_name),
+                                        pending.config_hash, pending.response.id, spec_hash=pending.spec_hash)
+        elif isinstance(error, ProvisioningFailedError):
+            self._record_journal(pending.journal_key, 'failed', status_message=error.status_message)
+
+    def _record_journal(self, journal_key, status, **fields):
+        if journal_key is not None:
+            self._journal.record(journal_key, status, **fields)
+
     def _validate_cd_project_url(self, cd_project_url):
         if -1 == cd_project_url.find('visualstudio.com') or -1 == cd_project_url.find('https://'):
             raise RuntimeError('Project URL should be in format https://<accountname>.visualstudio.com/<projectname>')
@@ -160,25 +327,28 @@ class ContinuousDeliveryManager(object):
         return (cd_project_url.split('.visualstudio.com', 1)[0]).split('https://', 1)[1]
 
     def get_provisioning_configuration_target(self, auth_info, swap_with_slot, test, webapp_list):
-        swap_with_slot_config = None if swap_with_slot is None else SlotSwapConfiguration(swap_with_slot)
+        spec = self._get_setup_spec(swap_with_slot, None, None, False, None, test, webapp_list)
+        return self._build_provisioning_configuration_targets(auth_info, spec)
+
+    def _build_provisioning_configuration_targets(self, auth_info, spec, app_service_plan_name=None):
+        swap_with_slot_config = None if spec.swap_with_slot is None else SlotSwapConfiguration(spec.swap_with_slot)
         slotTarget = ProvisioningConfigurationTarget('azure', 'windowsAppService', 'production', 'Production',
-                                                 self._azure_info.subscription_id, self._azure_info.subscription_name, 
-                                                 self._azure_info.tenant_id, self._azure_info.website_name, 
-                                                 self._azure_info.resource_group_name, self._azure_info.webapp_location, 
+                                                 spec.subscription_id, spec.subscription_name,
+                                                 spec.tenant_id, spec.website_name,
+                                                 spec.resource_group_name, spec.webapp_location,
                                                  auth_info, swap_with_slot_config)
         target = [slotTarget]
-        if test is not None:
+        if spec.test is not None:
             create_options = None
-            if webapp_list is not None and not any(s.name == test for s in webapp_list) :
-                app_service_plan_name = 'ServicePlan'+ str(uuid.uuid4())[:13]
-                create_options = CreateOptions(app_service_plan_name, 'Standard', self._azure_info.website_name)
+            if spec.webapp_list is not None and not any(s.name == spec.test for s in spec.webapp_list) :
+                app_service_plan_name = app_service_plan_name or 'ServicePlan'+ str(uuid.uuid4())[:13]
+                create_options = CreateOptions(app_service_plan_name, 'Standard', spec.website_name)
             testTarget = ProvisioningConfigurationTarget('azure', 'windowsAppService', 'test', 'Load Test',
-                                                    self._azure_info.subscription_id,
-                                                    self._azure_info.subscription_name, self._azure_info.tenant_id,
-                                                    test, self._azure_info.resource_group_name,
-                                                    self._azure_info.webapp_location, auth_info, None, create_options)
+                                                    spec.subscription_id, spec.subscription_name, spec.tenant_id,
+                                                    spec.test, spec.resource_group_name,
+                                                    spec.webapp_location, auth_info, None, create_options)
             target.append(testTarget)
-        return target        
+        return target
 
     def _verify_vsts_parameters(self, cd_account, source_repository):
         # if provider is vsts and repo is not vsts then we need the account name
@@ -221,62 +391,42 @@ class ContinuousDeliveryManager(object):
             raise RuntimeError("The app_type %s was not understood. Accepted values: %s." % (app_type, accepted_app_types))
         return build_configuration
 
-    def _get_source_repository(self, uri, token, branch, cred, username, password):
-        # Determine the type of repository (TfsGit, github, tfvc, externalGit)
-        # Find the identifier and set the properties.
-        # Default is externalGit
-        type = 'Git'
-        identifier = uri
-        account_name = None
-        team_project_name = None
-        auth_info = AuthorizationInfo('UsernamePassword', AuthorizationInfoParameters(None, None, username, password))
-        
-        match = re.match(r'[htps]+\:\/\/(.+)\.visualstudio\.com.*\/_git\/(.+)', uri, re.IGNORECASE)
-        if match:
-            type = 'TfsGit'
-            account_name = match.group(1)
-            # we have to get the repo id as the identifier
-            info = self._get_vsts_info(uri, cred)
-            identifier = info.repository_info.id
-            team_project_name = info.repository_info.project_info.name
-            auth_info = None
-        else:
-            match = re.match(r'[htps]+\:\/\/github\.com\/(.+)', uri, re.IGNORECASE)
-            if match:
-                if token is not None:                    
-                    type = 'Github'
-                    identifier = match.group(1).replace(".git", "")
-                    auth_info = AuthorizationInfo('PersonalAccessToken', AuthorizationInfoParameters(None, token))
+    def _classify_source_repository(self, uri, token, branch, username, password):
+        # Determine the type of repository (TfsGit, github, tfvc, externalGit) and set the properties;
+        # returns the SourceRepository, the account name and the url to look the repository up with
+        repository_url = classify_repository_url(uri)
+        type = repository_url.type
+        identifier = repository_url.identifier
+        auth_info = None
+        if type == GITHUB:
+            if token is not None:
+                auth_info = AuthorizationInfo('PersonalAccessToken', AuthorizationInfoParameters(None, token))
             else:
-                match = re.match(r'[htps]+\:\/\/(.+)\.visualstudio\.com\/(.+)', uri, re.IGNORECASE)
-                if match:
-                    type = 'TFVC'
-                    identifier = match.group(2)
-                    account_name = match.group(1)
-                    auth_info = None
+                # Without a token GitHub repositories are cloned as external git repositories
+                type = EXTERNAL_GIT
+                identifier = uri
+        if type == EXTERNAL_GIT:
+            auth_info = AuthorizationInfo('UsernamePassword',
+                                          AuthorizationInfoParameters(None, None, username, password))
+        # the repo id of TfsGit repositories is the identifier, it is filled in by _resolve_source_repository
         sourceRepository = SourceRepository(type, identifier, branch, auth_info)
-        return sourceRepository, account_name, team_project_name
-
-    def _get_vsts_info(self, vsts_repo_url, cred):
-        vsts_info_client = VstsInfoProvider('3.2-preview', vsts_repo_url, cred)
-        return vsts_info_client.get_vsts_info()
-
-    def _wait_for_cd_completion(self, cd, response):
-        # Wait for the configuration to finish and report on the status
-        step = 5
-        max = 100
-        self._update_progress(step, max, 'Setting up Team Services continuous deployment')
-        config = cd.get_provisioning_configuration(response.id)
-        while config.ci_configuration.result.status == 'queued' or config.ci_configuration.result.status == 'inProgress':
-            step += 5 if step + 5 < max else 0
-            self._update_progress(step, max, 'Setting up Team Services continuous deployment (' + config.ci_configuration.result.status + ')')
-            time.sleep(2)
-            config = cd.get_provisioning_configuration(response.id)
-        if config.ci_configuration.result.status == 'failed':
-            self._update_progress(max, max, 'Setting up Team Services continuous deployment (FAILED)')
-            raise RuntimeError(config.ci_configuration.result.status_message)
-        self._update_progress(max, max, 'Setting up Team Services continuous deployment (SUCCEEDED)')
-        return config
+        return sourceRepository, repository_url.account_name, repository_url.url
+
+    def _apply_vsts_info(self, source_repository, info):
+        # Fills in the repo id; returns the team project name
+        source_repository.identifier = info.repository_info.id
+        return info.repository_info.project_info.name
+
+    def _get_pending_summary(self, pending, final_status):
+        result = self._get_summary(final_status, pending.account_url, pending.account_name, pending.account_created,
+                                   pending.subscription_id, pending.resource_group_name, pending.website_name)
+        if result is not None:
+            result.unchanged = pending.unchanged
+            if pending.timings is not None:
+                pending.timings.finish()
+                result.timings = pending.timings.to_dict()
+                self._update_progress(100, 100, 'Timings: ' + pending.timings.format())
+        return result
 
     def _get_summary(self, provisioning_configuration, account_url, account_name, account_created, subscription_id, resource_group_name, website_name):
         summary = '\n'
@@ -314,6 +464,463 @@ class ContinuousDeliveryManager(object):
         return
 
 
+# Use this class to setup or remove continuous delivery mechanisms for Azure web sites using VSTS build and release
+class ContinuousDeliveryManager(_ContinuousDeliveryManagerBase):
+    def __init__(self, progress_callback, polling_strategy=None, status_poller=None, client_registry=None,
+                 vsts_info_cache=None, regions_cache=None, name_availability_cache=None, endpoints=None,
+                 retry_policy=None, rate_limiter=None, circuit_breaker=None, journal=None, resume=False,
+                 desired_state=None, reconcile=False):
+        """
+        Use this class to setup or remove continuous delivery mechanisms for Azure web sites using VSTS build and release
+        :param progress_callback: method of the form func(count, total, message)
+        :param polling_strategy: PollingStrategy used while waiting for the provisioning to complete
+        :param status_poller: optional ProvisioningStatusPoller shared by many setups to wait for the provisioning
+        :param client_registry: ClientRegistry handing out the REST clients, defaults to the process wide registry
+        :param vsts_info_cache: VstsInfoCache for the repository lookups, defaults to the process wide cache
+        :param regions_cache: TTLCache for the AEX regions, defaults to the process wide cache
+        :param name_availability_cache: TTLCache for the account existence checks, defaults to the process wide cache
+        :param endpoints: ServiceEndpoints with the service urls, defaults to Team Services
+        :param retry_policy: RetryPolicy for the REST calls. A client_registry given here should be created with
+         transport_retries=0, so that POSTs are not also retried blindly by the transport.
+        :param rate_limiter: RateLimiter spacing the REST calls per host, defaults to the process wide limiter
+        :param circuit_breaker: CircuitBreaker failing the calls to a failing host fast, defaults to the process
+         wide breaker
+        :param journal: optional ProvisioningJournal recording the provisioning id and status of every setup
+        :param resume: whether setups found in the journal re-attach to their provisioning configuration instead
+         of submitting a new one. Setups that failed, or never got to the submission, are run again. Setups that
+         stopped while submitting raise UnconfirmedSubmissionError, since the submission may have been created.
+        :param desired_state: optional DesiredStateStore recording the provisioning configuration applied to every
+         web site
+        :param reconcile: whether setups whose provisioning configuration equals the one last applied to the web
+         site skip the provisioning. The applied configuration is read back for the result; if it was deleted, the
+         web site is provisioned anew. Setups of an unchanged spec skip the repository and account lookups too.
+        """
+        super(ContinuousDeliveryManager, self).__init__(
+            progress_callback, polling_strategy, client_registry, vsts_info_cache, regions_cache,
+            name_availability_cache, endpoints, retry_policy, rate_limiter, circuit_breaker, journal, resume,
+            desired_state, reconcile)
+        self._status_poller = status_poller
+        # Lock per Team Services account being ensured, dropped once no setup holds it
+        self._account_locks = weakref.WeakValueDictionary()
+        self._account_locks_lock = threading.Lock()
+
+    def setup_continuous_delivery(self, swap_with_slot=None, app_type_details=None, cd_project_url=None,
+                                  create_account=False, vsts_app_auth_token=None, test=None, webapp_list=None,
+                                  spec=None):
+        """
+        Use this method to setup Continuous Delivery of an Azure web site from a source control repository.
+        Either pass a spec, or call set_azure_web_info and set_repository_info first and pass the other parameters.
+        :param swap_with_slot: the slot to use for deployment
+        :param app_type_details: the details of app that will be deployed. i.e. app_type = Python, python_framework = Django etc.
+        :param cd_project_url: CD Project url in the format of https://<accountname>.visualstudio.com/<projectname> 
+        :param create_account: Boolean value to decide if account need to be created or not
+        :param vsts_app_auth_token: Authentication token for vsts app
+        :param test: Load test webapp name
+        :param webapp_list: Existing webapp list
+        :param spec: ContinuousDeliverySetupSpec carrying all inputs of the setup. The other parameters and the
+         values of the setters are then ignored, and the manager keeps no state of the setup, so one manager can
+         run setups for many web sites at the same time from several threads.
+        :return: a message indicating final status and instructions for the user
+        """
+        if spec is None:
+            spec = self._get_setup_spec(swap_with_slot, app_type_details, cd_project_url, create_account,
+                                        vsts_app_auth_token, test, webapp_list)
+        if self._status_poller is not None:
+            return self._watch_cd_completion(self._start_continuous_delivery(spec)).result()
+        return self._setup_continuous_delivery(spec)
+
+    def _setup_continuous_delivery(self, spec, stage_executor=None):
+        # Runs the whole setup in the calling thread, waiting for the provisioning itself
+        pending = self._start_continuous_delivery(spec, stage_executor)
+        if pending.final_status is not None:
+            return self._get_pending_summary(pending, pending.final_status)
+        try:
+            final_status = self._wait_for_cd_completion(pending.cd, pending.response, pending.timings)
+        except Exception as ex:
+            self._record_outcome(pending, ex)
+            raise
+        self._record_outcome(pending)
+        return self._get_pending_summary(pending, final_status)
+
+    def _start_continuous_delivery(self, spec, stage_executor=None):
+        # Runs the setup up to the point where the provisioning configuration is queued. The repository lookup
+        # and the account run concurrently, one of them on stage_executor if given.
+        timings = SetupTimings()
+        journal_key, entry = self._get_journal_entry(spec)
+        if entry is not None and entry['status'] in REATTACH_STATUSES:
+            cd = self._clients.get_client(ContinuousDelivery, '3.2-preview.1',
+                                          self._endpoints.get_portalext_url(entry['account_name']), spec.credentials)
+            timings.observe_status(entry['status'])
+            return self._get_reattached_continuous_delivery(cd, spec, journal_key, entry, timings)
+        with timings.measure(VALIDATE):
+            prepared = self._prepare_continuous_delivery(spec)
+
+        # Create ContinuousDelivery client
+        cd = self._clients.get_client(ContinuousDelivery, '3.2-preview.1', prepared.portalext_account_url,
+                                      spec.credentials)
+
+        # A web site set up from the same spec before is up to date, without looking up the repository or account
+        applied = self._get_applied_configuration(spec)
+        if applied is not None:
+            unchanged = self._get_unchanged_continuous_delivery(cd, spec, prepared, applied, False, journal_key,
+                                                                timings)
+            if unchanged is not None:
+                return unchanged
+
+        # The repository lookup, the account creation and the payload do not depend on each other. Stages without
+        # a service call run inline, so a thread is only used when both the lookup and the account make one.
+        stages = StageGraph(stage_executor)
+        stages.add('team_project_name', _timed(timings, VSTS_INFO, lambda: self._resolve_source_repository(
+            prepared.source_repository, prepared.repo_url, spec.credentials)),
+            inline=(prepared.source_repository.type != 'TfsGit' or
+                    self._get_cached_vsts_info(prepared.repo_url, spec.credentials) is not None))
+        stages.add('account_created', _timed(timings, ACCOUNT, lambda: self._ensure_vsts_account(
+            spec, prepared.account_name)), inline=not spec.create_account)
+        stages.add('targets', lambda: self._get_provisioning_configuration_targets(spec), inline=True)
+        results = stages.run()
+
+        # Configure the continuous deliver using VSTS as a backend
+        provisioning_configuration = self._get_provisioning_configuration(spec, prepared,
+                                                                          results['team_project_name'],
+                                                                          results['targets'])
+        config_hash = self._get_config_hash(provisioning_configuration)
+        # Another spec may still give the applied configuration, unless it was found deleted above
+        if applied is None:
+            applied = self._get_applied_configuration(spec, config_hash)
+            if applied is not None:
+                unchanged = self._get_unchanged_continuous_delivery(cd, spec, prepared, applied,
+                                                                    results['account_created'], journal_key, timings)
+                if unchanged is not None:
+                    return unchanged
+        with timings.measure(SUBMIT):
+            account_created, idempotency_key = self._record_submission(journal_key, entry, spec, prepared,
+                                                                       results['account_created'], config_hash)
+            response = self._submit_provisioning_configuration(cd, provisioning_configuration, idempotency_key)
+        return self._get_pending_continuous_delivery(cd, response, spec, prepared, account_created, journal_key,
+                                                     config_hash, timings)
+
+    def _get_unchanged_continuous_delivery(self, cd, spec, prepared, applied, account_created, journal_key,
+                                           timings):
+        # Reads the applied provisioning configuration back; None if it was deleted, so the web site is set up anew
+        try:
+            with active(timings):
+                final_status = self._call(cd, lambda: cd.get_provisioning_configuration(
+                    applied['provisioning_configuration_id']))
+        except HttpOperationError as ex:
+            if getattr(ex.response, 'status_code', None) == 404:
+                return None
+            raise
+        return self._get_unchanged_pending(cd, spec, prepared, applied, final_status, account_created, journal_key,
+                                           timings)
+
+    def _submit_provisioning_configuration(self, cd, provisioning_configuration, idempotency_key=None):
+        # Every attempt carries the same key. The service gives no way to look a submission up, so it is only
+        # retried when it was not processed.
+        headers = {IDEMPOTENCY_KEY_HEADER: idempotency_key or new_idempotency_key()}
+        return self._call(cd, lambda: cd.provisioning_configuration(provisioning_configuration, headers),
+                          idempotent=False)
+
+    def _ensure_vsts_account(self, spec, vsts_account_name):
+        # VSTS Account using AEX APIs, returns True if the account was created
+        if not spec.create_account:
+            return False
+        # Concurrent setups for the same new account must not both create it
+        with self._get_account_lock(vsts_account_name):
+            if self.vsts_accounts_exist(spec.credentials, [vsts_account_name])[vsts_account_name]:
+                self._update_progress(5, 100, 'Team Services account already exists')
+                return False
+            self.create_vsts_account(spec.credentials, vsts_account_name, spec.webapp_location)
+            return True
+
+    def _get_account_lock(self, vsts_account_name):
+        key = (self._endpoints.aex_url, vsts_account_name.lower())
+        with self._account_locks_lock:
+            lock = self._account_locks.get(key)
+            if lock is None:
+                lock = self._account_locks[key] = threading.Lock()
+            return lock
+
+    def setup_continuous_delivery_batch(self, specs, max_workers=DEFAULT_BATCH_MAX_WORKERS):
+        """
+        Use this method to setup Continuous Delivery of many Azure web sites concurrently.
+        :param specs: list of ContinuousDeliverySetupSpec, one per web site
+        :param max_workers: maximum number of web sites that are set up at the same time
+        :return: list with a ContinuousDeliveryResult or the raised exception for each spec, in the order of specs
+        """
+        specs = list(specs)
+        if not specs:
+            return []
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1.')
+        max_workers = min(max_workers, len(specs))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+                ThreadPoolExecutor(max_workers=max_workers) as stage_executor:
+            futures = [executor.submit(self._setup_continuous_delivery_for_spec, spec, stage_executor)
+                       for spec in specs]
+            return [_get_outcome(future) for future in futures]
+
+    def iter_setup_continuous_delivery(self, specs, max_workers=DEFAULT_BATCH_MAX_WORKERS, max_in_flight=None):
+        """
+        Use this method to setup Continuous Delivery of many Azure web sites concurrently and act on every web site
+        as soon as its setup is done. The specs are read as setups complete, so they can come from a lazy iterable
+        of any length.
+        :param specs: iterable of ContinuousDeliverySetupSpec, one per web site
+        :param max_workers: maximum number of web sites that are set up at the same time
+        :param max_in_flight: maximum number of setups started and not yet yielded, twice max_workers by default
+        :return: iterator of (spec, ContinuousDeliveryResult or the raised exception), in the order the setups
+         complete. Closing it early cancels the setups that have not started.
+        """
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1.')
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError('max_in_flight must be at least 1.')
+        return self._iter_setup_continuous_delivery(iter(specs), max_workers, max_in_flight or 2 * max_workers)
+
+    def _iter_setup_continuous_delivery(self, specs, max_workers, max_in_flight):
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        stage_executor = ThreadPoolExecutor(max_workers=max_workers)
+        in_flight = {}
+        try:
+            for spec in itertools.islice(specs, max_in_flight):
+                in_flight[self._submit_setup(executor, stage_executor, spec)] = spec
+            while in_flight:
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                for outcome in done:
+                    spec = in_flight.pop(outcome)
+                    # Start the next setup before handing out the finished one, so the work goes on meanwhile
+                    for next_spec in itertools.islice(specs, 1):
+                        in_flight[self._submit_setup(executor, stage_executor, next_spec)] = next_spec
+                    yield spec, _get_outcome(outcome)
+        finally:
+            for outcome in in_flight:
+                outcome.cancel()
+            executor.shutdown(wait=False)
+            stage_executor.shutdown(wait=False)
+
+    def _submit_setup(self, executor, stage_executor, spec):
+        # Returns a future resolved with the final outcome of the setup, also when the status poller finishes it
+        outcome = Future()
+
+        def _on_done(future):
+            if outcome.cancelled():
+                return
+            if future.cancelled():
+                outcome.cancel()
+                return
+            error = future.exception()
+            if error is not None:
+                outcome.set_exception(error)
+            elif isinstance(future.result(), Future):
+                future.result().add_done_callback(_on_done)
+            else:
+                outcome.set_result(future.result())
+        task = executor.submit(self._setup_continuous_delivery_for_spec, spec, stage_executor)
+        # Cancelling the outcome cancels the setup unless it is running already
+        outcome.add_done_callback(lambda _: task.cancel())
+        task.add_done_callback(_on_done)
+        return outcome
+
+    def _setup_continuous_delivery_for_spec(self, spec, stage_executor):
+        # A setup runs at most one stage on stage_executor, so one worker per batch worker never makes it wait
+        if self._status_poller is None:
+            return self._setup_continuous_delivery(spec, stage_executor)
+        # Hand the wait over to the shared poller so the worker is free for the next site
+        return self._watch_cd_completion(self._start_continuous_delivery(spec, stage_executor))
+
+    def vsts_accounts_exist(self, creds, vsts_account_names):
+        """
+        Checks which Team Services accounts already exist. Results are cached, the remaining names are checked concurrently.
+        :param creds: credentials for AEX
+        :param vsts_account_names: account names to check
+        :return: dict of account name to True if the account exists
+        """
+        aex_url = self._endpoints.aex_url
+        accountClient = self._clients.get_client(Account, '4.0-preview.1', aex_url, creds)
+        return get_accounts_existence(accountClient, aex_url, vsts_account_names, self._name_availability_cache,
+                                      call=lambda operation, cost: self._call(accountClient, operation, cost=cost))
+
+    def create_vsts_account(self, creds, vsts_account_name, location=None):
+        """
+        Creates a Team Services account using the AEX APIs.
+        :param creds: credentials for AEX
+        :param vsts_account_name: name of the new account
+        :param location: Azure location used to choose the account region, the default region is used if no region matches
+        """
+        aex_url = self._endpoints.aex_url
+        accountClient = self._clients.get_client(Account, '4.0-preview.1', aex_url, creds)
+        self._update_progress(0, 100, 'Creating or getting Team Services account information')            
+        regions = get_regions(accountClient, aex_url, self._regions_cache,
+                              call=lambda operation: self._call(accountClient, operation))
+        region_name = select_region(regions, location).name
+        headers = {IDEMPOTENCY_KEY_HEADER: new_idempotency_key()}
+
+        def _create_account():
+            return bool(accountClient.create_account(vsts_account_name, region_name, headers).id)
+
+        def _probe_account():
+            # After an ambiguous failure the account exists only if the failed attempt created it
+            return True if accountClient.account_exists(vsts_account_name) else None
+        try:
+            created = self._call(accountClient, _create_account, idempotent=False, probe=_probe_account)
+        finally:
+            # The account may exist now, whatever the outcome of the call
+            invalidate_account_existence(aex_url, vsts_account_name, self._name_availability_cache)
+        if created:
+            self._update_progress(5, 100, 'Team Services account created')
+        else:
+            raise RuntimeError('Account creation failed.')
+        
+    def _get_source_repository(self, uri, token, branch, cred, username, password):
+        sourceRepository, account_name, lookup_url = self._classify_source_repository(uri, token, branch, username,
+                                                                                      password)
+        team_project_name = self._resolve_source_repository(sourceRepository, lookup_url, cred)
+        return sourceRepository, account_name, team_project_name
+
+    def _resolve_source_repository(self, source_repository, uri, cred):
+        # TfsGit repositories are identified by their repo id, which needs a lookup; returns the team project name
+        if source_repository.type != 'TfsGit':
+            return None
+        info = self._vsts_info_cache.get_vsts_info(uri, cred, self._get_vsts_info)
+        return self._apply_vsts_info(source_repository, info)
+
+    def _get_vsts_info(self, vsts_repo_url, cred):
+        # One client per host looks up all repositories of the host
+        vsts_info_url = self._endpoints.get_vsts_info_url(vsts_repo_url)
+        vsts_info_client = self._clients.get_client(VstsInfoProvider, '3.2-preview', get_origin(vsts_info_url), cred)
+        return self._call(vsts_info_client, lambda: vsts_info_client.get_vsts_info(vsts_git_url=vsts_info_url))
+
+    def _wait_for_cd_completion(self, cd, response, timings=None):
+        # Wait for the configuration to finish and report on the status
+        step = 5
+        max = 100
+        self._update_progress(step, max, 'Setting up Team Services continuous deployment')
+        timer = self._polling_strategy.start()
+        timer.wait()
+        raw_response = self._poll_provisioning_status(cd, response.id, timings)
+        config = raw_response.output
+        while config.ci_configuration.result.status == 'queued' or config.ci_configuration.result.status == 'inProgress':
+            if timer.expired():
+                self._update_progress(max, max, 'Setting up Team Services continuous deployment (TIMED OUT)')
+                raise ProvisioningTimeoutError(response.id, config.ci_configuration.result.status,
+                                               self._polling_strategy.timeout)
+            step += 5 if step + 5 < max else 0
+            self._update_progress(step, max, 'Setting up Team Services continuous deployment (' + config.ci_configuration.result.status + ')')
+            timer.wait(get_retry_after(raw_response.response))
+            raw_response = self._poll_provisioning_status(cd, response.id, timings)
+            config = raw_response.output
+        if config.ci_configuration.result.status == 'failed':
+            self._update_progress(max, max, 'Setting up Team Services continuous deployment (FAILED)')
+            raise ProvisioningFailedError(response.id, config.ci_configuration.result.status_message)
+        self._update_progress(max, max, 'Setting up Team Services continuous deployment (SUCCEEDED)')
+        return config
+
+    def _poll_provisioning_status(self, cd, provisioning_configuration_id, timings):
+        # Polls the status, counting the poll and its requests for the timings of the setup
+        with active(timings):
+            raw_response = self._get_provisioning_status(cd, provisioning_configuration_id)
+        if timings is not None:
+            timings.count_poll()
+            timings.observe_status(raw_response.output.ci_configuration.result.status)
+        return raw_response
+
+    def _get_provisioning_status(self, cd, provisioning_configuration_id):
+        return self._call(cd, lambda: cd.get_provisioning_configuration(
+            provisioning_configuration_id, raw=True, status_only=True))
+
+    def _call(self, client, operation, idempotent=True, probe=None, cost=1):
+        # A REST call of client: every attempt passes the circuit breaker of the host and waits for a request slot,
+        # failed attempts are retried
+        base_url = client.config.base_url
+
+        def _guard(attempt, attempt_cost=1):
+            return self._circuit_breaker.call(
+                base_url, lambda: self._rate_limiter.call(base_url, attempt, attempt_cost))
+        return self._retry_policy.call(lambda: _guard(operation, cost), idempotent,
+                                       None if probe is None else lambda: _guard(probe))
+
+    def _watch_cd_completion(self, pending):
+        # Same as _wait_for_cd_completion, but the status poller does the waiting
+        result = Future()
+        if pending.final_status is not None:
+            result.set_result(self._get_pending_summary(pending, pending.final_status))
+            return result
+        max = 100
+        self._update_progress(5, max, 'Setting up Team Services continuous deployment')
+
+        def _on_final_status(future):
+            try:
+                final_status = future.result()
+            except Exception as ex:  # pylint: disable=broad-except
+                self._update_progress(max, max, 'Setting up Team Services continuous deployment (FAILED)')
+                try:
+                    self._record_outcome(pending, ex)
+                finally:
+                    result.set_exception(ex)
+                return
+            self._update_progress(max, max, 'Setting up Team Services continuous deployment (SUCCEEDED)')
+            try:
+                self._record_outcome(pending)
+                result.set_result(self._get_pending_summary(pending, final_status))
+            except Exception as ex:  # pylint: disable=broad-except
+                result.set_exception(ex)
+
+        self._status_poller.watch(pending.cd, pending.response.id, _on_final_status, pending.timings)
+        return result
+
+
+def _timed(timings, phase, func):
+    # Returns func timed as a phase of the setup, for a stage that may run on another thread
+    def _run():
+        with timings.measure(phase):
+            return func()
+    return _run
+
+
+def _get_outcome(future):
+    # Returns the result of a future, or the exception it failed with, following chained futures
+    error = future.exception()
+    if error is not None:
+        return error
+    result = future.result()
+    if isinstance(result, Future):
+        return _get_outcome(result)
+    return result
+
+
+class _PreparedContinuousDelivery(object):
+    def __init__(self, source_repository, build_configuration, account_name, account_url, portalext_account_url,
+                 repo_url=None):
+        self.source_repository = source_repository
+        self.build_configuration = build_configuration
+        self.account_name = account_name
+        self.account_url = account_url
+        self.portalext_account_url = portalext_account_url
+        # url the repository is looked up with
+        self.repo_url = repo_url
+
+
+class _PendingContinuousDelivery(object):
+    def __init__(self, cd, response, account_url, account_name, account_created, subscription_id,
+                 resource_group_name, website_name, journal_key=None, config_hash=None, unchanged=False,
+                 timings=None, spec_hash=None, final_status=None):
+        self.cd = cd
+        self.response = response
+        self.account_url = account_url
+        self.account_name = account_name
+        self.account_created = account_created
+        self.subscription_id = subscription_id
+        self.resource_group_name = resource_group_name
+        self.website_name = website_name
+        self.journal_key = journal_key
+        self.config_hash = config_hash
+        self.unchanged = unchanged
+        self.timings = timings
+        # hash of the spec, recorded in the desired state once the configuration is applied
+        self.spec_hash = spec_hash
+        # the provisioning configuration when it is known without waiting, e.g. one already applied
+        self.final_status = final_status
+
+
 class _AzureInfo(object):
     def __init__(self):
         self.resource_group_name = None
@@ -330,8 +937,8 @@ class _RepositoryInfo(object):
         self.url = None
         self.branch = None
         self.git_token = None
-        self.private_repo_username = None
-        self.private_repo_password = None
+        self._private_repo_username = None
+        self._private_repo_password = None
 
 
 class ContinuousDeliveryResult(object):
@@ -347,3 +954,7 @@ class ContinuousDeliveryResult(object):
         self.status = 'SUCCESS'
         self.status_message = message
         self.status_details = final_status
+        # True when reconciling found the configuration already applied and skipped the provisioning
+        self.unchanged = False
+        # dict with the durations of the phases of the setup and its request, poll and byte counts, see SetupTimings
+        self.timings = None
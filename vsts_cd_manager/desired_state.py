@@ -0,0 +1,77 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import hashlib
+import json
+
+from continuous_delivery import get_codecs
+from .journal import JsonLinesStore
+
+# Tokens change between runs, and the create options carry a random service plan name
+_UNHASHED_KEYS = frozenset(('authorizationInfo', 'createOptions'))
+
+
+class DesiredStateStore(JsonLinesStore):
+    key_field = 'site'
+
+    def __init__(self, path=None, sync=True):
+        """
+        Last applied provisioning configuration of every web site, keyed by get_site_key. With a path the
+        state survives the process in an append-only JSON lines file.
+        :param path: path of the state file, created if it does not exist. None keeps the state in memory only.
+        :param sync: whether every change is flushed to disk with fsync before the setup goes on
+        """
+        super(DesiredStateStore, self).__init__(path, sync)
+
+    def get(self, site_key):
+        """
+        :return: dict with the config_hash and the provisioning_configuration_id last applied to the web site,
+         or None if nothing was applied
+        """
+        return super(DesiredStateStore, self).get(site_key)
+
+    def set(self, site_key, config_hash, provisioning_configuration_id, **fields):
+        """
+        Records the provisioning configuration applied to a web site.
+        :param site_key: key of the web site, see get_site_key
+        :param config_hash: hash of the applied configuration, see get_provisioning_configuration_hash
+        :param provisioning_configuration_id: id of the succeeded provisioning configuration
+        :param fields: other values to record, they must be JSON serializable
+        """
+        fields.update(config_hash=config_hash, provisioning_configuration_id=provisioning_configuration_id)
+        self._update(site_key, fields)
+
+
+def get_site_key(subscription_id, resource_group_name, website_name):
+    """
+    :return: key of the web site in a DesiredStateStore
+    """
+    return '/'.join((value or '').lower() for value in (subscription_id, resource_group_name, website_name))
+
+
+def get_provisioning_configuration_hash(provisioning_configuration):
+    """
+    Hashes what a ProvisioningConfiguration sets up: the source with its build configuration, the targets and
+    the CI configuration. Authorizations and create options are left out.
+    :return: hex digest
+    """
+    body = get_provisioning_configuration_body(provisioning_configuration)
+    content = json.dumps(_strip(body), sort_keys=True)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def get_provisioning_configuration_body(provisioning_configuration):
+    """
+    :return: dict of the JSON body a ProvisioningConfiguration is submitted with
+    """
+    return get_codecs()[0].body(provisioning_configuration, 'ProvisioningConfiguration')
+
+
+def _strip(value):
+    if isinstance(value, dict):
+        return dict((key, _strip(item)) for key, item in value.items() if key not in _UNHASHED_KEYS)
+    if isinstance(value, list):
+        return [_strip(item) for item in value]
+    return value
@@ -0,0 +1,37 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+try:
+    from urllib.parse import quote
+except ImportError:
+    from urllib import quote  #pylint: disable=no-name-in-module
+
+
+class ServiceEndpoints(object):
+    def __init__(self, account_url_format='https://{}.visualstudio.com',
+                 portalext_url_format='https://{}.portalext.visualstudio.com',
+                 aex_url='https://app.vsaex.visualstudio.com', vsts_info_url=None):
+        """
+        The service urls used by ContinuousDeliveryManager. The defaults point to Team Services,
+        other values can point the manager to a different deployment or to a local stand-in server.
+        :param account_url_format: format string for the account url, {} is replaced by the account name
+        :param portalext_url_format: format string for the continuous delivery service of an account
+        :param aex_url: url of the account (AEX) service
+        :param vsts_info_url: method of the form func(repo_url) returning the base url of the /vsts/info
+         lookup of a repository, by default the repository url itself
+        """
+        self.account_url_format = account_url_format
+        self.portalext_url_format = portalext_url_format
+        self.aex_url = aex_url
+        self._vsts_info_url = vsts_info_url
+
+    def get_account_url(self, account_name):
+        return self.account_url_format.format(quote(account_name))
+
+    def get_portalext_url(self, account_name):
+        return self.portalext_url_format.format(quote(account_name))
+
+    def get_vsts_info_url(self, repo_url):
+        return self._vsts_info_url(repo_url) if self._vsts_info_url else repo_url
@@ -0,0 +1,62 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+
+class ProvisioningTimeoutError(RuntimeError):
+    """
+    Raised when a provisioning configuration does not reach a final status before the polling deadline.
+    """
+    def __init__(self, provisioning_configuration_id, status, timeout):
+        super(ProvisioningTimeoutError, self).__init__(
+            'Provisioning configuration {} did not complete within {} seconds (last status: {}).'.format(
+                provisioning_configuration_id, timeout, status))
+        self.provisioning_configuration_id = provisioning_configuration_id
+        self.status = status
+        self.timeout = timeout
+
+
+class ProvisioningFailedError(RuntimeError):
+    """
+    Raised when a provisioning configuration ends with the status failed. The message is the status message.
+    """
+    def __init__(self, provisioning_configuration_id, status_message):
+        super(ProvisioningFailedError, self).__init__(status_message)
+        self.provisioning_configuration_id = provisioning_configuration_id
+        self.status_message = status_message
+
+
+class UnconfirmedSubmissionError(RuntimeError):
+    """
+    Raised when resuming a setup that an earlier run stopped while submitting its provisioning configuration. The
+    service may have created it and offers no way to look it up, so it is not submitted again.
+    """
+    def __init__(self, spec_hash, website_name, account_name):
+        super(UnconfirmedSubmissionError, self).__init__(
+            'The setup of {} stopped while submitting its provisioning configuration to the Team Services account '
+            '{}. Check the account for its build and release definitions, then record the journal entry {} as '
+            'failed to submit it again.'.format(website_name, account_name, spec_hash))
+        self.spec_hash = spec_hash
+        self.website_name = website_name
+        self.account_name = account_name
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of calling a service endpoint whose circuit breaker is open after repeated failures.
+    """
+    def __init__(self, host, retry_in):
+        super(CircuitOpenError, self).__init__(
+            'The endpoint {} is failing, calls to it are stopped for {:.0f} more seconds.'.format(host, retry_in))
+        self.host = host
+        self.retry_in = retry_in
+
+
+class ManifestError(ValueError):
+    """
+    Raised for a record of a manifest that cannot be turned into a ContinuousDeliverySetupSpec.
+    """
+    def __init__(self, position, message):
+        super(ManifestError, self).__init__('Record {}: {}'.format(position, message))
+        self.position = position
@@ -0,0 +1,135 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import os
+import threading
+import time
+
+# The provisioning configuration is about to be submitted; if a run stops here, it is not known whether the service
+# created it
+SUBMITTING = 'submitting'
+# Statuses after which a resumed setup re-attaches to the recorded provisioning configuration id. A submitted
+# setup is recorded as queued until its final status, the statuses in between are not journaled.
+REATTACH_STATUSES = ('queued', 'succeeded')
+
+
+class JsonLinesStore(object):
+    # Name of the field of the entries holding their key
+    key_field = 'key'
+
+    def __init__(self, path=None, sync=True):
+        """
+        Entries kept in memory and appended to a file, one JSON document per line. Each line is a complete
+        snapshot of one entry, so the last line of a key is its current value. A line cut short by a crash
+        is skipped on load.
+        :param path: path of the file, created if it does not exist. None keeps the entries in memory only.
+        :param sync: whether every change is flushed to disk with fsync before the caller goes on
+        """
+        self.path = path
+        self._sync = sync
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._file = None
+        if path is not None:
+            needs_newline = self._load()
+            self._file = open(path, 'a')
+            if needs_newline:
+                self._file.write('\n')
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key):
+        """
+        :return: copy of the entry of key, or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else dict(entry)
+
+    def get_entries(self):
+        """
+        :return: list of copies of all entries
+        """
+        with self._lock:
+            return [dict(entry) for entry in self._entries.values()]
+
+    def close(self):
+        """
+        Closes the file. A later change opens it again.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_details):
+        self.close()
+
+    def _update(self, key, fields):
+        # Merges fields into the entry of key and appends the result
+        with self._lock:
+            entry = dict(self._entries.get(key) or {})
+            entry.update(fields)
+            entry[self.key_field] = key
+            entry['time'] = time.time()
+            if self._file is None and self.path is not None:
+                self._file = open(self.path, 'a')
+            if self._file is not None:
+                self._file.write(json.dumps(entry, sort_keys=True) + '\n')
+                self._file.flush()
+                if self._sync:
+                    os.fsync(self._file.fileno())
+            self._entries[key] = entry
+
+    def _load(self):
+        # Returns True if the file ends in a partial line, which the next entry must not be appended to
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, 'r') as store_file:
+            content = store_file.read()
+        for line in content.splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict) and self.key_field in entry:
+                self._entries[entry[self.key_field]] = entry
+        return bool(content) and not content.endswith('\n')
+
+
+class ProvisioningJournal(JsonLinesStore):
+    key_field = 'spec_hash'
+
+    def __init__(self, path, sync=True):
+        """
+        Append-only record of the setups, keyed by the hash of their ContinuousDeliverySetupSpec
+        (see get_setup_spec_hash).
+        :param path: path of the journal file, created if it does not exist
+        :param sync: whether every record is flushed to disk with fsync before the setup goes on
+        """
+        super(ProvisioningJournal, self).__init__(path, sync)
+
+    def get(self, spec_hash):
+        """
+        :return: dict with the last recorded state of the setup, or None if it was never recorded. It has the
+         keys spec_hash, status and time, plus the fields given to record, e.g. provisioning_configuration_id.
+        """
+        return super(ProvisioningJournal, self).get(spec_hash)
+
+    def record(self, spec_hash, status, **fields):
+        """
+        Appends the new state of a setup. The fields of earlier records of the setup are kept unless given again.
+        :param spec_hash: hash of the ContinuousDeliverySetupSpec of the setup
+        :param status: SUBMITTING, 'queued' once submitted, or the final status of the provisioning configuration
+        :param fields: other values to record, they must be JSON serializable
+        """
+        fields['status'] = status
+        self._update(spec_hash, fields)
@@ -0,0 +1,253 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import time
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+from .continuous_delivery_manager import DEFAULT_BATCH_MAX_WORKERS
+from .exceptions import ManifestError
+from .setup_spec import _SETUP_SPEC_FIELDS, ContinuousDeliverySetupSpec
+
+JSON_LINES = 'jsonl'
+YAML = 'yaml'
+
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+INVALID = 'invalid'
+PLANNED = 'planned'
+
+try:
+    _string_types = (str, unicode)  # pylint: disable=undefined-variable
+except NameError:
+    _string_types = (str,)
+
+# Credentials and web app lists are objects, they can only be given as defaults
+_MANIFEST_FIELDS = frozenset(_SETUP_SPEC_FIELDS) - frozenset(('credentials', 'webapp_list'))
+# The token authorizes the service with the web site, it is usually given in the defaults
+_REQUIRED_FIELDS = ('subscription_id', 'resource_group_name', 'website_name', 'repo_url', 'cd_project_url',
+                    'vsts_app_auth_token', 'app_type_details')
+# Fields of a result that differ from run to run
+_TIMING_FIELDS = ('started', 'finished', 'elapsed')
+
+
+def read_manifest(manifest, manifest_format=None):
+    """
+    Reads the records of a manifest one at a time. A JSON lines manifest has one JSON object per line, blank lines
+    are skipped. A YAML manifest has one mapping per document, the documents separated by '---'; it needs PyYAML.
+    :param manifest: path of the manifest, or a file object open for reading
+    :param manifest_format: JSON_LINES or YAML. By default YAML for paths ending in .yaml or .yml, else JSON_LINES.
+    :return: iterator of (position, record): the line number or document number, and the dict of the record or a
+     ManifestError for a line that is not a JSON object
+    """
+    if manifest_format is None:
+        path = getattr(manifest, 'name', '') if hasattr(manifest, 'read') else manifest
+        manifest_format = YAML if str(path).lower().endswith(('.yaml', '.yml')) else JSON_LINES
+    if manifest_format not in (JSON_LINES, YAML):
+        raise ValueError('manifest_format must be {} or {}.'.format(JSON_LINES, YAML))
+    if manifest_format == YAML and yaml is None:
+        raise RuntimeError('Reading a YAML manifest requires PyYAML.')
+    read = _read_yaml if manifest_format == YAML else _read_json_lines
+    if hasattr(manifest, 'read'):
+        return read(manifest)
+    return _read_path(manifest, read)
+
+
+def _read_path(path, read):
+    with open(path, 'r') as manifest_file:
+        for item in read(manifest_file):
+            yield item
+
+
+def _read_json_lines(manifest_file):
+    for position, line in enumerate(manifest_file, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as ex:
+            yield position, ManifestError(position, 'not valid JSON: {}'.format(ex))
+            continue
+        if not isinstance(record, dict):
+            record = ManifestError(position, 'a record must be a JSON object.')
+        yield position, record
+
+
+def _read_yaml(manifest_file):
+    for position, record in enumerate(yaml.safe_load_all(manifest_file), 1):
+        if record is None:
+            continue
+        if not isinstance(record, dict):
+            record = ManifestError(position, 'a record must be a mapping.')
+        yield position, record
+
+
+def get_manifest_setup_spec(position, record, defaults=None):
+    """
+    Turns a manifest record into a ContinuousDeliverySetupSpec. The keys of the record are the fields of the spec,
+    e.g. subscription_id, resource_group_name, website_name, repo_url, branch, app_type_details, swap_with_slot
+    and test (the load test web site).
+    :param position: line or document number of the record, for the error messages
+    :param record: dict of the record
+    :param defaults: dict of values for the fields the record leaves out, e.g. the tokens and credentials
+    :return: ContinuousDeliverySetupSpec
+    :raises ManifestError: a field is unknown, missing or of the wrong type
+    """
+    unknown = sorted(key for key in record if key not in _MANIFEST_FIELDS)
+    if unknown:
+        raise ManifestError(position, 'unknown fields {}.'.format(', '.join(unknown)))
+    values = dict(defaults or {})
+    values.update(record)
+    missing = [field for field in _REQUIRED_FIELDS if not values.get(field)]
+    if missing:
+        raise ManifestError(position, 'missing fields {}, give them in the record or the defaults.'.format(
+            ', '.join(missing)))
+    if not isinstance(values['app_type_details'], dict):
+        raise ManifestError(position, 'app_type_details must be a mapping.')
+    for field in _REQUIRED_FIELDS[:-1]:
+        if not isinstance(values[field], _string_types):
+            raise ManifestError(position, '{} must be a string.'.format(field))
+    return ContinuousDeliverySetupSpec(**values)
+
+
+class ManifestRunner(object):
+    def __init__(self, manager, defaults=None, max_workers=DEFAULT_BATCH_MAX_WORKERS, max_in_flight=None,
+                 clock=time.time):
+        """
+        Sets up the web sites of a manifest with a ContinuousDeliveryManager. The records are read, validated and
+        set up as the setups complete, and one result is written per record, so the memory used does not depend
+        on the length of the manifest.
+        :param manager: ContinuousDeliveryManager running the setups
+        :param defaults: dict of values for the fields the records leave out, see get_manifest_setup_spec
+        :param max_workers: maximum number of web sites that are set up at the same time
+        :param max_in_flight: maximum number of setups started and not yet written, see
+         iter_setup_continuous_delivery
+        :param clock: method returning the time in seconds
+        """
+        self.manager = manager
+        self.defaults = defaults
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight
+        self._clock = clock
+
+    def run(self, manifest, output=None, manifest_format=None, on_result=None):
+        """
+        Sets up the web sites of a manifest. Records that are not valid are reported without any service call.
+        :param manifest: path of the manifest or a file object, see read_manifest
+        :param output: path or file object the results are written to, one JSON object per line in the order
+         the setups complete. Each has the position and the web site of the record, a status (succeeded, failed
+         or invalid), the build and release definition urls or the error, the started, finished and elapsed
+         times in seconds, and the timings of the phases of the setup (see ContinuousDeliveryResult.timings).
+        :param manifest_format: JSON_LINES or YAML, see read_manifest
+        :param on_result: optional method of the form func(result) called with the dict of every result
+        :return: dict with the number of results of every status
+        """
+        if output is not None and not hasattr(output, 'write'):
+            with open(output, 'w') as output_file:
+                return self.run(manifest, output_file, manifest_format, on_result)
+        counts, report = self._get_reporter(output, on_result, (SUCCEEDED, FAILED, INVALID))
+        in_flight = {}
+        specs = self._iter_specs(manifest, manifest_format, in_flight, report)
+        for spec, outcome in self.manager.iter_setup_continuous_delivery(specs, self.max_workers,
+                                                                         self.max_in_flight):
+            position, record, started = in_flight.pop(id(spec))
+            if isinstance(outcome, Exception):
+                report(self._get_result(position, record, started, FAILED, error=outcome))
+            else:
+                report(self._get_result(position, record, started, SUCCEEDED, outcome=outcome))
+        return counts
+
+    def plan(self, manifest, output=None, manifest_format=None, on_result=None, vsts_info=None, redact=True):
+        """
+        Writes the provisioning configuration every web site of a manifest would be set up with, without any
+        service call. See ContinuousDeliveryManager.plan_continuous_delivery.
+        :param manifest: path of the manifest or a file object, see read_manifest
+        :param output: path or file object the plans are written to, one JSON object per line in the order of
+         the manifest. Each has the position and the web site of the record, a status (planned or invalid), and
+         the body of the provisioning configuration or the error. Plans carry no timings, so the plans of an
+         unchanged manifest are the same from run to run.
+        :param manifest_format: JSON_LINES or YAML, see read_manifest
+        :param on_result: optional method of the form func(result) called with the dict of every plan
+        :param vsts_info: method of the form func(repo_url, creds) returning the VstsInfo of a Team Services git
+         repository, or None if it is not known
+        :param redact: whether the tokens and passwords are replaced by *** in the bodies
+        :return: dict with the number of plans of every status
+        """
+        if output is not None and not hasattr(output, 'write'):
+            with open(output, 'w') as output_file:
+                return self.plan(manifest, output_file, manifest_format, on_result, vsts_info, redact)
+        counts, report = self._get_reporter(output, on_result, (PLANNED, INVALID), timed=False)
+        in_flight = {}
+        specs = self._iter_specs(manifest, manifest_format, in_flight, report, validate=False)
+        for spec, body in self.manager.plan_continuous_delivery(specs, vsts_info, redact):
+            position, record, started = in_flight.pop(id(spec))
+            if isinstance(body, Exception):
+                report(self._get_result(position, record, started, INVALID, error=body))
+            else:
+                result = self._get_result(position, record, started, PLANNED)
+                result['provisioning_configuration'] = body
+                report(result)
+        return counts
+
+    def _get_reporter(self, output, on_result, statuses, timed=True):
+        # Returns the counts of the statuses and the method writing a result
+        counts = dict((status, 0) for status in statuses)
+
+        def _report(result):
+            counts[result['status']] += 1
+            if not timed:
+                for field in _TIMING_FIELDS:
+                    del result[field]
+            if output is not None:
+                output.write(json.dumps(result, sort_keys=True) + '\n')
+                output.flush()
+            if on_result is not None:
+                on_result(result)
+        return counts, _report
+
+    def _iter_specs(self, manifest, manifest_format, in_flight, report, validate=True):
+        # Yields the specs of the valid records and reports the others right away, so a run of invalid records is
+        # not held in memory. The records of the yielded specs are kept in in_flight by id, the spec is handed
+        # back by the manager when it is done with it.
+        for position, record in read_manifest(manifest, manifest_format):
+            started = self._clock()
+            try:
+                if isinstance(record, ManifestError):
+                    raise record
+                spec = get_manifest_setup_spec(position, record, self.defaults)
+                if validate:
+                    self.manager.validate_setup_spec(spec)
+            except (ManifestError, RuntimeError) as ex:
+                report(self._get_result(position, record, started, INVALID, error=ex))
+                continue
+            in_flight[id(spec)] = (position, record, started)
+            yield spec
+
+    def _get_result(self, position, record, started, status, outcome=None, error=None):
+        finished = self._clock()
+        fields = dict(self.defaults or {})
+        if isinstance(record, dict):
+            fields.update(record)
+        result = {
+            'position': position,
+            'status': status,
+            'subscription_id': fields.get('subscription_id'),
+            'resource_group_name': fields.get('resource_group_name'),
+            'website_name': fields.get('website_name'),
+            'started': started,
+            'finished': finished,
+            'elapsed': finished - started,
+        }
+        if outcome is not None:
+            result.update(build_definition_url=outcome.vsts_build_def_url,
+                          release_definition_url=outcome.vsts_release_def_url,
+                          account_url=outcome.vsts_account_url, account_created=outcome.vsts_account_created,
+                          unchanged=outcome.unchanged, timings=outcome.timings)
+        elif error is not None:
+            result['error'] = str(error)
+        return result
@@ -0,0 +1,121 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import random
+import time
+from email.utils import mktime_tz, parsedate_tz
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+
+class PollingStrategy(object):
+    def __init__(self, first_delay=0, initial_interval=1, multiplier=1.5, max_interval=15, jitter=0.2,
+                 timeout=1800, sleep=time.sleep, clock=_monotonic):
+        """
+        Describes how the status of a long running operation is polled.
+        The delay between two polls starts at initial_interval and grows by multiplier up to max_interval.
+        :param first_delay: seconds to wait before the first poll
+        :param initial_interval: seconds between the first and the second poll
+        :param multiplier: growth factor of the interval after every poll
+        :param max_interval: upper bound for the interval between two polls
+        :param jitter: fraction of the interval that is randomly added or removed
+        :param timeout: overall deadline in seconds, None to poll forever
+        :param sleep: method of the form func(seconds) used to wait
+        :param clock: method returning a monotonic time in seconds
+        """
+        if initial_interval < 0 or max_interval < 0 or first_delay < 0:
+            raise ValueError('Polling intervals must not be negative.')
+        if multiplier < 1:
+            raise ValueError('multiplier must be at least 1.')
+        if not 0 <= jitter < 1:
+            raise ValueError('jitter must be in the range [0, 1).')
+        self.first_delay = first_delay
+        self.initial_interval = initial_interval
+        self.multiplier = multiplier
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.timeout = timeout
+        self.sleep = sleep
+        self.clock = clock
+
+    def start(self):
+        """
+        Starts a new polling sequence. The strategy itself holds no state and can be shared.
+        :return: PollingTimer tracking the delays and the deadline of one operation
+        """
+        return PollingTimer(self)
+
+
+class PollingTimer(object):
+    def __init__(self, strategy):
+        self._strategy = strategy
+        self._started = strategy.clock()
+        self._deadline = None if strategy.timeout is None else self._started + strategy.timeout
+        self._interval = strategy.initial_interval
+        self.poll_count = 0
+
+    @property
+    def elapsed(self):
+        return self._strategy.clock() - self._started
+
+    def remaining(self):
+        """
+        :return: seconds left until the deadline, None if there is no deadline
+        """
+        if self._deadline is None:
+            return None
+        return max(0, self._deadline - self._strategy.clock())
+
+    def expired(self):
+        return self._deadline is not None and self._strategy.clock() >= self._deadline
+
+    def next_delay(self, retry_after=None):
+        """
+        Computes how long to wait before the next poll and advances the backoff.
+        :param retry_after: delay in seconds requested by the server, if any
+        :return: seconds to wait, never beyond the deadline
+        """
+        strategy = self._strategy
+        if self.poll_count == 0:
+            delay = strategy.first_delay
+        else:
+            delay = self._interval
+            if strategy.jitter:
+                delay *= random.uniform(1 - strategy.jitter, 1 + strategy.jitter)
+            self._interval = min(strategy.max_interval, self._interval * strategy.multiplier)
+        self.poll_count += 1
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        remaining = self.remaining()
+        if remaining is not None:
+            delay = min(delay, remaining)
+        return delay
+
+    def wait(self, retry_after=None):
+        """
+        Sleeps until the next poll is due.
+        """
+        delay = self.next_delay(retry_after)
+        if delay > 0:
+            self._strategy.sleep(delay)
+
+
+def get_retry_after(response):
+    """
+    Reads the Retry-After header of a response.
+    :param response: requests.Response or None
+    :return: delay in seconds or None if the header is missing or not understood
+    """
+    headers = getattr(response, 'headers', None)
+    value = headers.get('Retry-After') if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        parsed = parsedate_tz(value)
+        if parsed is None:
+            return None
+        return max(0.0, mktime_tz(parsed) - time.time())
@@ -0,0 +1,201 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import time
+from collections import deque
+
+from msrest.exceptions import HttpOperationError
+
+try:
+    from urllib.parse import urlparse
+except ImportError:
+    from urlparse import urlparse  #pylint: disable=import-error
+from .polling import get_retry_after
+
+DEFAULT_REQUESTS_PER_SECOND = 20
+DEFAULT_BURST = 40
+# Pause after a 429 or 503 without Retry-After
+DEFAULT_THROTTLE_PAUSE = 1.0
+
+_THROTTLED_STATUS_CODES = (429, 503)
+_monotonic = getattr(time, 'monotonic', time.time)
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+
+class TokenBucket(object):
+    def __init__(self, rate, burst, clock=_monotonic):
+        """
+        Token bucket giving out request slots at a steady rate. Callers reserve a slot and wait until it is due,
+        so requests queue instead of failing. Thread-safe, and usable from asyncio since it never blocks itself.
+        :param rate: requests per second
+        :param burst: requests that can be made at once after an idle period
+        :param clock: method returning a monotonic time in seconds
+        """
+        if rate <= 0:
+            raise ValueError('rate must be positive.')
+        if burst < 1:
+            raise ValueError('burst must be at least 1.')
+        self.rate = float(rate)
+        self.burst = burst
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        # Time up to which the tokens are accounted for, in the future while the bucket is paused
+        self._updated = clock()
+        # Due times of the reservations still waiting, in order
+        self._due_times = deque()
+        self.requests = 0
+        self.delayed_requests = 0
+        self.pauses = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def reserve(self, cost=1):
+        """
+        Takes the next request slot.
+        :param cost: number of requests the slot is for
+        :return: seconds to wait before sending the request
+        """
+        with self._lock:
+            now = self._clock()
+            if now > self._updated:
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+            self._tokens -= cost
+            wait = (self._updated - now) + max(0.0, -self._tokens) / self.rate
+            self.requests += cost
+            # Only the waiting reservations are kept, whether or not queue_depth is ever read
+            self._drop_due_times(now)
+            if wait > 0:
+                self.delayed_requests += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+                self._due_times.append(now + wait)
+            return wait
+
+    def pause(self, seconds):
+        """
+        Holds back the requests that have not reserved a slot yet for the given time, e.g. after the service
+        answered 429 with Retry-After. No tokens accrue during the pause, so the rate ramps up again afterwards.
+        """
+        with self._lock:
+            self.pauses += 1
+            self._tokens = min(self._tokens, 1.0)
+            self._updated = max(self._updated, self._clock() + seconds)
+
+    @property
+    def queue_depth(self):
+        """
+        :return: number of requests waiting for their slot
+        """
+        with self._lock:
+            self._drop_due_times(self._clock())
+            return len(self._due_times)
+
+    def _drop_due_times(self, now):
+        # Forgets the reservations that are due by now
+        while self._due_times and self._due_times[0] <= now:
+            self._due_times.popleft()
+
+    def get_statistics(self):
+        """
+        :return: dict with the rate, the queue depth and the request and wait counters
+        """
+        queue_depth = self.queue_depth
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'queue_depth': queue_depth,
+                'requests': self.requests,
+                'delayed_requests': self.delayed_requests,
+                'pauses': self.pauses,
+                'total_wait': self.total_wait,
+                'max_wait': self.max_wait,
+                'average_wait': self.total_wait / self.requests if self.requests else 0.0,
+            }
+
+
+class RateLimiter(object):
+    def __init__(self, rate=DEFAULT_REQUESTS_PER_SECOND, burst=DEFAULT_BURST,
+                 throttle_pause=DEFAULT_THROTTLE_PAUSE, sleep=time.sleep, clock=_monotonic):
+        """
+        Limits the request rate per host (one TokenBucket per account host), so that many setups against
+        one Team Services account stay under its limit. A 429 or 503 answer pauses the bucket of the host for
+        the Retry-After of the answer.
+        :param rate: requests per second per host
+        :param burst: requests per host that can be made at once after an idle period
+        :param throttle_pause: seconds a host is paused after a 429 or 503 answer without Retry-After
+        :param sleep: method of the form func(seconds) used to wait
+        :param clock: method returning a monotonic time in seconds
+        """
+        self.rate = rate
+        self.burst = burst
+        self.throttle_pause = throttle_pause
+        self.sleep = sleep
+        self._clock = clock
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def get_bucket(self, url):
+        """
+        :return: the TokenBucket of the host of url
+        """
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst, self._clock)
+            return bucket
+
+    def call(self, url, operation, cost=1):
+        """
+        Waits for a request slot of the host of url, then runs operation. A 429 or 503 raised by operation
+        pauses the host.
+        :param url: url of the service called by operation
+        :param operation: method of the form func() making the requests
+        :param cost: number of requests made by operation
+        :return: the result of operation
+        """
+        bucket = self.get_bucket(url)
+        wait = bucket.reserve(cost)
+        if wait > 0:
+            self.sleep(wait)
+        try:
+            return operation()
+        except HttpOperationError as ex:
+            self.on_error(bucket, ex)
+            raise
+
+    def on_error(self, bucket, error):
+        """
+        Pauses the bucket when the error is a throttling answer of the service.
+        """
+        response = getattr(error, 'response', None)
+        if getattr(response, 'status_code', None) in _THROTTLED_STATUS_CODES:
+            retry_after = get_retry_after(response)
+            bucket.pause(self.throttle_pause if retry_after is None else retry_after)
+
+    def get_statistics(self):
+        """
+        :return: dict of host to the statistics of its TokenBucket
+        """
+        with self._lock:
+            buckets = list(self._buckets.items())
+        return dict((host, bucket.get_statistics()) for host, bucket in buckets)
+
+
+def get_default_rate_limiter():
+    """
+    :return: the process wide RateLimiter used by ContinuousDeliveryManager and ProvisioningStatusPoller unless
+     another one is given
+    """
+    global _default_limiter  # pylint: disable=global-statement
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter()
+        return _default_limiter
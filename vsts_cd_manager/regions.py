@@ -0,0 +1,80 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import re
+import threading
+
+from .caching import TTLCache
+
+DEFAULT_REGIONS_TTL = 3600
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_regions(account_client, aex_url, cache, call=None):
+    """
+    Returns the AEX regions, calling the regions API at most once per aex_url while the cache entry is valid.
+    Concurrent callers share one call.
+    :param account_client: Account client used on a miss
+    :param aex_url: url of the AEX service, used as cache key
+    :param cache: TTLCache holding the Regions responses
+    :param call: method of the form func(operation) invoking operation, e.g. with retries. By default
+     operation is invoked directly.
+    :rtype: :class:`Regions<aex_accounts.models.Regions>`
+    """
+    call = call or _invoke
+    return cache.get_or_load(aex_url, lambda: check_regions(call(account_client.regions)))
+
+
+def check_regions(regions):
+    """
+    Raises a RuntimeError when the regions API returned no regions.
+    :return: the given regions
+    """
+    if not regions.count or not regions.value:
+        raise RuntimeError('Region details not found.')
+    return regions
+
+
+def select_region(regions, location=None):
+    """
+    Chooses the region for a new account without another round trip.
+    The region whose name or display name matches the location (ignoring case, spaces and punctuation)
+    wins, then the region flagged as default, then the first region.
+    :param regions: :class:`Regions<aex_accounts.models.Regions>`
+    :param location: Azure location of the web app, e.g. 'South Central US'
+    :rtype: :class:`RegionDetails<aex_accounts.models.RegionDetails>`
+    """
+    if not regions.value:
+        raise RuntimeError('Region details not found.')
+    if location:
+        wanted = _normalize(location)
+        for region in regions.value:
+            if wanted in (_normalize(region.name), _normalize(region.display_name)):
+                return region
+    for region in regions.value:
+        if str(region.is_default).lower() == 'true':
+            return region
+    return regions.value[0]
+
+
+def get_default_regions_cache():
+    """
+    :return: the process wide TTLCache of AEX regions used by ContinuousDeliveryManager unless another one is given
+    """
+    global _default_cache  # pylint: disable=global-statement
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = TTLCache(DEFAULT_REGIONS_TTL)
+        return _default_cache
+
+
+def _invoke(operation):
+    return operation()
+
+
+def _normalize(value):
+    return re.sub(r'[^a-z0-9]', '', (value or '').lower())
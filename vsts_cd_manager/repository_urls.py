@@ -0,0 +1,108 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import re
+from collections import namedtuple
+
+TFS_GIT = 'TfsGit'
+GITHUB = 'Github'
+TFVC = 'TFVC'
+EXTERNAL_GIT = 'Git'
+
+# Optional user info of an https url, e.g. https://user@account.visualstudio.com
+_USER = r'(?:[^/@]+@)?'
+# Optional .git suffix, trailing slash, query and fragment after the repository name
+_END = r'(?:\.git)?/?(?:[?#].*)?$'
+# Same, also allowing a page of the repository after its name, e.g. /pullrequest/5 or /commit/{id}
+_GIT_END = r'(?:\.git)?(?:/[^?#]*)?(?:[?#].*)?$'
+# Account of a {account}.visualstudio.com host, which may itself contain dots like the old pattern allowed
+_VS_ACCOUNT = r'[^/@?#]+?'
+
+_PATTERN = re.compile(
+    # https://{account}.visualstudio.com/[{collection}/][{project}/]_git/{repo}
+    r'https?://' + _USER + r'(?P<vs_account>' + _VS_ACCOUNT + r')\.visualstudio\.com/'
+    r'(?P<vs_path>(?:[^?#]*/)?_git/[^/?#]+?)' + _GIT_END +
+    # https://dev.azure.com/{organization}/{project}/_git/{repo}
+    r'|https?://' + _USER + r'dev\.azure\.com/(?P<az_org>[^/?#]+)/(?P<az_path>(?:[^?#]*/)?_git/[^/?#]+?)' + _GIT_END +
+    # git@ssh.dev.azure.com:v3/{organization}/{project}/{repo} and {account}@vs-ssh.visualstudio.com:v3/...
+    r'|(?:ssh://)?[^@/]+@(?P<ssh_host>ssh\.dev\.azure\.com|vs-ssh\.visualstudio\.com)[:/]v3/'
+    r'(?P<ssh_org>[^/]+)/(?P<ssh_project>[^/]+)/(?P<ssh_repo>[^/]+?)(?:\.git)?/?$'
+    # https://github.com/{owner}/{repo}, git@github.com:{owner}/{repo}.git, and https://github.com/{owner} as the
+    # old pattern took it
+    r'|(?:https?://' + _USER + r'|(?:ssh://)?git@)(?:www\.)?github\.com[:/]'
+    r'(?P<gh_owner>[^/?#]+?)(?:/(?P<gh_repo>[^/?#]+?))?(?:\.git)?(?:[/?#].*)?$'
+    # https://{account}.visualstudio.com/{path} and https://dev.azure.com/{organization}/{path}
+    r'|https?://' + _USER +
+    r'(?:(?P<tfvc_account>' + _VS_ACCOUNT + r')\.visualstudio\.com|dev\.azure\.com/(?P<tfvc_org>[^/?#]+))/(?P<tfvc_path>[^?#]+)',
+    re.IGNORECASE)
+
+
+class RepositoryUrl(namedtuple('RepositoryUrl', ['type', 'identifier', 'account_name', 'url'])):
+    """
+    Classification of a source repository url.
+    type: TFS_GIT, GITHUB, TFVC or EXTERNAL_GIT
+    identifier: owner/repo for GitHub (the owner alone for https://github.com/{owner}), the path for TFVC, the url
+     for other git repositories, and None for Team Services git repositories, which are identified by the repo id
+     of their VstsInfo
+    account_name: the Team Services account (organization) of TFS_GIT and TFVC repositories, else None
+    url: canonical https url of Team Services and GitHub repositories, the one the VstsInfo of a Team Services git
+     repository is looked up with. Other urls are kept as given.
+    """
+    __slots__ = ()
+
+
+class RepositoryUrlClassifier(object):
+    def __init__(self):
+        """
+        Classifies source repository urls with one precompiled pattern, one match per url. Knows the
+        {account}.visualstudio.com and dev.azure.com forms of Team Services git and TFVC repositories, their SSH
+        remotes, and https and SSH GitHub urls. Other urls are external git repositories.
+        """
+        self._pattern = _PATTERN
+
+    def classify(self, urls):
+        """
+        Classifies many urls, e.g. all repositories of a manifest.
+        :param urls: iterable of repository urls
+        :return: list of RepositoryUrl, in the order of urls
+        """
+        classify_url = self.classify_url
+        return [classify_url(url) for url in urls]
+
+    def classify_url(self, url):
+        """
+        :param url: url of the source repository
+        :return: RepositoryUrl
+        """
+        match = self._pattern.match(url.strip())
+        if match is None:
+            return RepositoryUrl(EXTERNAL_GIT, url, None, url)
+        groups = match.groupdict()
+        if groups['vs_account'] is not None:
+            return RepositoryUrl(TFS_GIT, None, groups['vs_account'],
+                                 'https://{}.visualstudio.com/{}'.format(groups['vs_account'], groups['vs_path']))
+        if groups['az_org'] is not None:
+            return RepositoryUrl(TFS_GIT, None, groups['az_org'],
+                                 'https://dev.azure.com/{}/{}'.format(groups['az_org'], groups['az_path']))
+        if groups['ssh_org'] is not None:
+            host = 'dev.azure.com/{}' if groups['ssh_host'].lower().startswith('ssh.') else '{}.visualstudio.com'
+            return RepositoryUrl(TFS_GIT, None, groups['ssh_org'], 'https://{}/{}/_git/{}'.format(
+                host.format(groups['ssh_org']), groups['ssh_project'], groups['ssh_repo']))
+        if groups['gh_owner'] is not None:
+            identifier = groups['gh_owner'] if groups['gh_repo'] is None else '{}/{}'.format(groups['gh_owner'],
+                                                                                             groups['gh_repo'])
+            return RepositoryUrl(GITHUB, identifier, None, 'https://github.com/' + identifier)
+        return RepositoryUrl(TFVC, groups['tfvc_path'], groups['tfvc_account'] or groups['tfvc_org'], url)
+
+
+_default_classifier = RepositoryUrlClassifier()
+
+
+def classify_repository_url(url):
+    """
+    Classifies a source repository url with a shared RepositoryUrlClassifier.
+    :return: RepositoryUrl
+    """
+    return _default_classifier.classify_url(url)
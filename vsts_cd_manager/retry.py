@@ -0,0 +1,144 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import random
+import time
+import uuid
+
+from msrest.exceptions import ClientRequestError, HttpOperationError
+from requests.exceptions import ConnectionError as RequestsConnectionError, ConnectTimeout
+from urllib3.exceptions import ConnectTimeoutError
+from .polling import get_retry_after
+
+IDEMPOTENCY_KEY_HEADER = 'X-Idempotency-Key'
+
+# The service turned the request down without processing it
+_REJECTED_STATUS_CODES = (429, 503)
+# The service may or may not have processed the request
+_AMBIGUOUS_STATUS_CODES = (408, 500, 502, 504)
+
+NOT_SENT = 'not_sent'
+REJECTED = 'rejected'
+AMBIGUOUS = 'ambiguous'
+
+
+class RetryPolicy(object):
+    def __init__(self, max_attempts=4, initial_backoff=0.5, multiplier=2, max_backoff=30, jitter=0.2,
+                 sleep=time.sleep):
+        """
+        Describes how failed REST calls are retried, with an exponential backoff that honors Retry-After.
+        Idempotent calls are retried on every transient error. Non idempotent calls (POSTs) are only retried
+        when the request did not reach the service or the service rejected it unprocessed (429, 503). After
+        an ambiguous failure (other 5xx, read errors) they are retried only if a probe shows that the failed
+        attempt had no effect, so a retry never creates a second resource.
+        The policy holds no state and can be shared.
+        :param max_attempts: maximum number of attempts of one call, including the first
+        :param initial_backoff: seconds to wait before the first retry
+        :param multiplier: growth factor of the backoff after every retry
+        :param max_backoff: upper bound for the wait between two attempts, a longer Retry-After is honored
+        :param jitter: fraction of the backoff that is randomly added or removed
+        :param sleep: method of the form func(seconds) used to wait
+        """
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be at least 1.')
+        if initial_backoff < 0 or max_backoff < 0:
+            raise ValueError('Backoffs must not be negative.')
+        if multiplier < 1:
+            raise ValueError('multiplier must be at least 1.')
+        if not 0 <= jitter < 1:
+            raise ValueError('jitter must be in the range [0, 1).')
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.multiplier = multiplier
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.sleep = sleep
+
+    def get_delay(self, error, attempt, idempotent=True, probed=False):
+        """
+        Decides whether a failed attempt is retried.
+        :param error: the exception raised by the attempt
+        :param attempt: number of attempts made so far, starting at 1
+        :param idempotent: whether repeating the call is harmless
+        :param probed: whether a probe has shown that the failed attempt had no effect
+        :return: seconds to wait before the next attempt, None if the error is raised
+        """
+        if attempt >= self.max_attempts:
+            return None
+        kind = classify_error(error)
+        if kind is None or (kind == AMBIGUOUS and not idempotent and not probed):
+            return None
+        delay = min(self.max_backoff, self.initial_backoff * self.multiplier ** (attempt - 1))
+        if self.jitter:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        retry_after = get_retry_after(getattr(error, 'response', None))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def call(self, operation, idempotent=True, probe=None):
+        """
+        Runs operation, retrying it according to the policy.
+        :param operation: method of the form func() making the call
+        :param idempotent: whether repeating the call is harmless
+        :param probe: for non idempotent calls, method of the form func() called after an ambiguous failure.
+         It returns the outcome of the failed attempt if the attempt took effect, which is then returned,
+         or None if a retry is safe.
+        :return: the result of operation
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return operation()
+            except Exception as ex:  # pylint: disable=broad-except
+                delay = self.get_delay(ex, attempt, idempotent)
+                if delay is None and probe is not None and classify_error(ex) == AMBIGUOUS:
+                    delay = self.get_delay(ex, attempt, idempotent, probed=True)
+                    if delay is not None:
+                        outcome = probe()
+                        if outcome is not None:
+                            return outcome
+                if delay is None:
+                    raise
+            if delay > 0:
+                self.sleep(delay)
+
+
+def classify_error(error):
+    """
+    Tells how a failed REST call failed.
+    :param error: the exception raised by the call
+    :return: NOT_SENT if the request did not reach the service, REJECTED if the service turned it down
+     unprocessed, AMBIGUOUS if it may have been processed, None if the error is not transient
+    """
+    if isinstance(error, HttpOperationError):
+        status_code = getattr(error.response, 'status_code', None)
+        if status_code in _REJECTED_STATUS_CODES:
+            return REJECTED
+        if status_code in _AMBIGUOUS_STATUS_CODES:
+            return AMBIGUOUS
+        return None
+    if isinstance(error, ClientRequestError):
+        inner = error.inner_exception
+        if isinstance(inner, ConnectTimeout) or _is_connect_error(inner):
+            return NOT_SENT
+        return AMBIGUOUS
+    return None
+
+
+def new_idempotency_key():
+    """
+    :return: a new key identifying one logical POST across its attempts
+    """
+    return str(uuid.uuid4())
+
+
+def _is_connect_error(error):
+    # requests wraps the urllib3 MaxRetryError, whose reason tells whether the connection was made
+    if not isinstance(error, RequestsConnectionError) or not error.args:
+        return False
+    reason = getattr(error.args[0], 'reason', error.args[0])
+    return isinstance(reason, ConnectTimeoutError)
@@ -0,0 +1,70 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import hashlib
+import json
+from collections import namedtuple
+
+_SETUP_SPEC_FIELDS = (
+    'resource_group_name',
+    'website_name',
+    'repo_url',
+    'app_type_details',
+    'cd_project_url',
+    'vsts_app_auth_token',
+    'credentials',
+    'subscription_id',
+    'subscription_name',
+    'tenant_id',
+    'webapp_location',
+    'swap_with_slot',
+    'test',
+    'branch',
+    'git_token',
+    'private_repo_username',
+    'private_repo_password',
+    'create_account',
+    'webapp_list',
+)
+
+# Secrets change between runs of the same setup, and the web app list only decides the create options
+_UNHASHED_FIELDS = frozenset(('vsts_app_auth_token', 'credentials', 'git_token', 'private_repo_password',
+                              'webapp_list'))
+# Secrets whose presence is hashed: a git token makes a github.com repository a Github one instead of an
+# external git repository, and the private repository password decides its authorization
+_PRESENCE_HASHED_FIELDS = ('git_token', 'private_repo_password')
+
+
+class ContinuousDeliverySetupSpec(namedtuple('ContinuousDeliverySetupSpec', _SETUP_SPEC_FIELDS)):
+    """
+    Immutable description of the continuous delivery setup of a single Azure web site.
+    It carries the same values that are otherwise passed to set_azure_web_info, set_repository_info
+    and setup_continuous_delivery of the ContinuousDeliveryManager.
+    """
+    __slots__ = ()
+
+    def __new__(cls, resource_group_name=None, website_name=None, repo_url=None, app_type_details=None,
+                cd_project_url=None, vsts_app_auth_token=None, credentials=None, subscription_id=None,
+                subscription_name=None, tenant_id=None, webapp_location=None, swap_with_slot=None, test=None,
+                branch=None, git_token=None, private_repo_username=None, private_repo_password=None,
+                create_account=False, webapp_list=None):
+        return super(ContinuousDeliverySetupSpec, cls).__new__(
+            cls, resource_group_name, website_name, repo_url, app_type_details, cd_project_url,
+            vsts_app_auth_token, credentials, subscription_id, subscription_name, tenant_id, webapp_location,
+            swap_with_slot, test, branch, git_token, private_repo_username, private_repo_password,
+            create_account, webapp_list)
+
+
+def get_setup_spec_hash(spec):
+    """
+    Identifies the setup of a web site across runs. Tokens, credentials and the web app list are left out,
+    only whether a git token or private repository password is given counts.
+    :param spec: ContinuousDeliverySetupSpec
+    :return: hex digest of the other fields of the spec
+    """
+    values = dict((field, getattr(spec, field)) for field in _SETUP_SPEC_FIELDS if field not in _UNHASHED_FIELDS)
+    values.update(('has_' + field, getattr(spec, field) is not None) for field in _PRESENCE_HASHED_FIELDS)
+    content = json.dumps(values, sort_keys=True, default=str)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
@@ -0,0 +1,93 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class StageGraph(object):
+    def __init__(self, executor=None, max_workers=4):
+        """
+        A small dependency graph of stages. Every stage starts as soon as the stages it depends on are done,
+        so independent stages run concurrently and the total time is the longest path through the graph.
+        The calling thread runs one of the ready stages itself, only the others are handed to the executor.
+        :param executor: concurrent.futures.Executor running the other ready stages, e.g. one shared by a batch.
+         It is not shut down. By default an executor is created when needed and shut down at the end of run.
+        :param max_workers: maximum number of stages running at the same time in the default executor
+        """
+        self._stages = OrderedDict()
+        self._executor = executor
+        self._max_workers = max_workers
+
+    def add(self, name, func, depends_on=(), inline=False):
+        """
+        Adds a stage. Stages can only depend on stages added before them, which keeps the graph acyclic.
+        :param name: unique name of the stage, also the keyword its result is passed as to dependent stages
+        :param func: method called with the results of depends_on as keyword arguments
+        :param depends_on: names of the stages that must complete first
+        :param inline: whether the stage is cheap and always runs in the calling thread, not worth a thread
+        """
+        if name in self._stages:
+            raise ValueError('Stage {} was already added.'.format(name))
+        for dependency in depends_on:
+            if dependency not in self._stages:
+                raise ValueError('Stage {} depends on unknown stage {}.'.format(name, dependency))
+        self._stages[name] = (func, tuple(depends_on), inline)
+
+    def run(self):
+        """
+        Runs all stages. If a stage fails, no further stages are started, the running ones are awaited
+        and the error of the first failing stage, in the order the stages were added, is raised.
+        :return: dict of stage name to result
+        """
+        results = {}
+        errors = {}
+        pending = OrderedDict(self._stages)
+        running = {}
+        owned_executor = None
+        try:
+            while pending or running:
+                ready = []
+                if not errors:
+                    for name, (func, depends_on, inline) in list(pending.items()):
+                        if all(dependency in results for dependency in depends_on):
+                            del pending[name]
+                            arguments = dict((dependency, results[dependency]) for dependency in depends_on)
+                            ready.append((name, func, arguments, inline))
+                # The calling thread runs the inline stages and one of the others itself
+                blocking = [stage for stage in ready if not stage[3]]
+                for name, func, arguments, _ in blocking[:-1]:
+                    if self._executor is None and owned_executor is None:
+                        owned_executor = ThreadPoolExecutor(max_workers=self._max_workers)
+                    running[(self._executor or owned_executor).submit(func, **arguments)] = name
+                for name, func, arguments, _ in [stage for stage in ready if stage[3]] + blocking[-1:]:
+                    _run_stage(name, func, arguments, results, errors)
+                if ready:
+                    continue
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    if future.exception() is not None:
+                        errors[name] = future.exception()
+                    else:
+                        results[name] = future.result()
+        finally:
+            if running:
+                wait(running)
+            if owned_executor is not None:
+                owned_executor.shutdown(wait=False)
+        for name in self._stages:
+            if name in errors:
+                raise errors[name]
+        return results
+
+
+def _run_stage(name, func, arguments, results, errors):
+    try:
+        results[name] = func(**arguments)
+    except Exception as ex:  # pylint: disable=broad-except
+        errors[name] = ex
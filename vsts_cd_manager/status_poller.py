@@ -0,0 +1,186 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from continuous_delivery.continuous_delivery import PENDING_STATUSES
+from .circuit_breaker import get_default_circuit_breaker
+from .exceptions import ProvisioningFailedError, ProvisioningTimeoutError
+from .polling import PollingStrategy, get_retry_after
+from .rate_limiter import get_default_rate_limiter
+from .retry import RetryPolicy
+from .timings import active
+
+
+class ProvisioningStatusPoller(object):
+    def __init__(self, polling_strategy=None, max_workers=4, max_polls_per_second=None, retry_policy=None,
+                 rate_limiter=None, circuit_breaker=None):
+        """
+        Watches any number of provisioning configurations from a single scheduler thread.
+        Polls are ordered by their due time in one priority queue and run on a small pool of workers.
+        :param polling_strategy: PollingStrategy giving the delays and the deadline of every watched id
+        :param max_workers: number of threads issuing the status requests
+        :param max_polls_per_second: global bound on the poll rate, None for no bound
+        :param retry_policy: RetryPolicy deciding which failed polls are repeated, and after how long
+        :param rate_limiter: RateLimiter shared with the other clients of the accounts, the process wide one if None
+        :param circuit_breaker: CircuitBreaker shared with the other clients of the accounts, the process wide one
+         if None. Watches of an account whose circuit is open fail with CircuitOpenError.
+        """
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1.')
+        if max_polls_per_second is not None and max_polls_per_second <= 0:
+            raise ValueError('max_polls_per_second must be positive.')
+        self._strategy = polling_strategy or PollingStrategy()
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._rate_limiter = rate_limiter if rate_limiter is not None else get_default_rate_limiter()
+        self._circuit_breaker = circuit_breaker if circuit_breaker is not None else get_default_circuit_breaker()
+        self._min_dispatch_interval = 1.0 / max_polls_per_second if max_polls_per_second else 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._next_dispatch = 0
+        self._watch_count = 0
+        self._closed = False
+        self._scheduler = threading.Thread(target=self._run_scheduler, name='ProvisioningStatusPoller')
+        self._scheduler.daemon = True
+        self._scheduler.start()
+
+    @property
+    def pending_count(self):
+        """
+        :return: number of provisioning configurations that have not reached a final status yet
+        """
+        with self._condition:
+            return self._watch_count
+
+    def watch(self, cd, provisioning_configuration_id, callback=None, timings=None):
+        """
+        Starts watching a provisioning configuration until it reaches a final status.
+        :param cd: ContinuousDelivery client of the account that owns the provisioning configuration
+        :param provisioning_configuration_id: id returned by the provisioning_configuration call
+        :param callback: optional method of the form func(future) called when the status is final
+        :param timings: optional SetupTimings the polls are counted and the queued and in_progress phases timed for
+        :return: Future resolved with the final ProvisioningConfiguration, or failed with the error
+        """
+        future = Future()
+        future.set_running_or_notify_cancel()
+        if callback is not None:
+            future.add_done_callback(callback)
+        watch = _Watch(cd, provisioning_configuration_id, future, self._strategy.start(), timings)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('The status poller has been closed.')
+            self._watch_count += 1
+            self._schedule(watch, self._strategy.clock() + watch.timer.next_delay())
+        return future
+
+    def close(self, wait=True):
+        """
+        Stops polling. Provisioning configurations that are still pending fail with a RuntimeError.
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            pending = [entry[2] for entry in self._queue]
+            self._queue = []
+            self._watch_count -= len(pending)
+            self._condition.notify_all()
+        for watch in pending:
+            watch.future.set_exception(_closed_error())
+        self._scheduler.join()
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_details):
+        self.close()
+
+    def _schedule(self, watch, due):
+        heapq.heappush(self._queue, (due, next(self._sequence), watch))
+        self._condition.notify()
+
+    def _run_scheduler(self):
+        clock = self._strategy.clock
+        while True:
+            with self._condition:
+                while not self._closed:
+                    now = clock()
+                    if self._queue:
+                        due = max(self._queue[0][0], self._next_dispatch)
+                        if due <= now:
+                            break
+                        self._condition.wait(due - now)
+                    else:
+                        self._condition.wait()
+                if self._closed:
+                    return
+                watch = heapq.heappop(self._queue)[2]
+                self._next_dispatch = now + self._min_dispatch_interval
+            self._executor.submit(self._poll, watch)
+
+    def _poll(self, watch):
+        try:
+            base_url = watch.cd.config.base_url
+            with active(watch.timings):
+                raw_response = self._circuit_breaker.call(base_url, lambda: self._rate_limiter.call(
+                    base_url, lambda: watch.cd.get_provisioning_configuration(watch.provisioning_configuration_id,
+                                                                              raw=True, status_only=True)))
+            config = raw_response.output
+            status = config.ci_configuration.result.status
+            if watch.timings is not None:
+                watch.timings.count_poll()
+                watch.timings.observe_status(status)
+            if status not in PENDING_STATUSES:
+                self._finish()
+                if status == 'failed':
+                    watch.future.set_exception(ProvisioningFailedError(watch.provisioning_configuration_id,
+                                                                       config.ci_configuration.result.status_message))
+                else:
+                    watch.future.set_result(config)
+                return
+            if watch.timer.expired():
+                raise ProvisioningTimeoutError(watch.provisioning_configuration_id, status, self._strategy.timeout)
+            watch.failed_polls = 0
+            delay = watch.timer.next_delay(get_retry_after(raw_response.response))
+        except Exception as ex:  # pylint: disable=broad-except
+            # A transient failure is polled again, in place of the next regular poll
+            watch.failed_polls += 1
+            delay = None
+            if not isinstance(ex, ProvisioningTimeoutError) and not watch.timer.expired():
+                delay = self._retry_policy.get_delay(ex, watch.failed_polls)
+            if delay is None:
+                self._finish()
+                watch.future.set_exception(ex)
+                return
+        with self._condition:
+            if not self._closed:
+                self._schedule(watch, self._strategy.clock() + delay)
+                return
+            self._watch_count -= 1
+        watch.future.set_exception(_closed_error())
+
+    def _finish(self):
+        with self._condition:
+            self._watch_count -= 1
+
+
+def _closed_error():
+    return RuntimeError('The status poller was closed before the provisioning configuration completed.')
+
+
+class _Watch(object):
+    def __init__(self, cd, provisioning_configuration_id, future, timer, timings=None):
+        self.cd = cd
+        self.provisioning_configuration_id = provisioning_configuration_id
+        self.future = future
+        self.timer = timer
+        self.failed_polls = 0
+        self.timings = timings
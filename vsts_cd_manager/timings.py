@@ -0,0 +1,178 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Phases of a setup, in the order they happen
+VALIDATE = 'validate'
+VSTS_INFO = 'vsts_info'
+ACCOUNT = 'account'
+SUBMIT = 'submit'
+QUEUED = 'queued'
+IN_PROGRESS = 'in_progress'
+PHASES = (VALIDATE, VSTS_INFO, ACCOUNT, SUBMIT, QUEUED, IN_PROGRESS)
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+# Timings of the setup the current thread works for, see active
+_local = threading.local()
+
+
+class SetupTimings(object):
+    def __init__(self, clock=_monotonic):
+        """
+        Monotonic timestamps of the phases of one setup (see PHASES), with the number of requests, status polls
+        and bytes transferred. Thread-safe, since the phases of a setup run on several threads.
+        :param clock: method returning a monotonic time in seconds
+        """
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.started = clock()
+        self.finished = None
+        # phase name to [start, end], end is None while the phase runs
+        self._phases = OrderedDict()
+        self.requests = 0
+        self.polls = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def start(self, phase):
+        """
+        Marks the start of a phase. A phase is only timed once, later starts are ignored.
+        """
+        with self._lock:
+            if phase not in self._phases:
+                self._phases[phase] = [self._clock(), None]
+
+    def end(self, phase):
+        """
+        Marks the end of a started phase.
+        """
+        with self._lock:
+            times = self._phases.get(phase)
+            if times is not None and times[1] is None:
+                times[1] = self._clock()
+
+    @contextmanager
+    def measure(self, phase):
+        """
+        Times a phase around a block of code, and counts the requests the block makes on this thread.
+        """
+        self.start(phase)
+        try:
+            with active(self):
+                yield self
+        finally:
+            self.end(phase)
+
+    def observe_status(self, status):
+        """
+        Times the queued and in_progress phases from the status of the provisioning configuration.
+        :param status: status of the last answer of the service
+        """
+        if status == 'queued':
+            self.start(QUEUED)
+        elif status == 'inProgress':
+            self.end(QUEUED)
+            self.start(IN_PROGRESS)
+        else:
+            self.end(QUEUED)
+            self.end(IN_PROGRESS)
+
+    def count_request(self, bytes_sent=0, bytes_received=0):
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += bytes_sent
+            self.bytes_received += bytes_received
+
+    def count_poll(self):
+        with self._lock:
+            self.polls += 1
+
+    def finish(self):
+        """
+        Marks the end of the setup and of the phases still running.
+        """
+        with self._lock:
+            now = self._clock()
+            self.finished = self.finished or now
+            for times in self._phases.values():
+                if times[1] is None:
+                    times[1] = now
+
+    def get_durations(self):
+        """
+        :return: dict of phase name to seconds, for the phases that have ended
+        """
+        with self._lock:
+            return dict((phase, end - start) for phase, (start, end) in self._phases.items() if end is not None)
+
+    def to_dict(self):
+        """
+        :return: JSON serializable dict with the total seconds, the start and end of every phase in seconds since
+         the setup started, and the request, poll and byte counters
+        """
+        with self._lock:
+            phases = OrderedDict()
+            for phase, (start, end) in self._phases.items():
+                phases[phase] = {
+                    'start': start - self.started,
+                    'end': None if end is None else end - self.started,
+                    'duration': None if end is None else end - start,
+                }
+            return {
+                'total': None if self.finished is None else self.finished - self.started,
+                'phases': phases,
+                'requests': self.requests,
+                'polls': self.polls,
+                'bytes_sent': self.bytes_sent,
+                'bytes_received': self.bytes_received,
+            }
+
+    def format(self):
+        """
+        :return: one line summary, e.g. for a progress message
+        """
+        durations = self.get_durations()
+        parts = ['{} {:.3f}s'.format(phase, durations[phase]) for phase in PHASES if phase in durations]
+        parts.append('{} requests, {} polls, {} bytes sent, {} bytes received'.format(
+            self.requests, self.polls, self.bytes_sent, self.bytes_received))
+        return ', '.join(parts)
+
+
+@contextmanager
+def active(timings):
+    """
+    Makes timings the SetupTimings the requests of the current thread are counted for, within the block.
+    :param timings: SetupTimings or None
+    """
+    previous = getattr(_local, 'timings', None)
+    _local.timings = timings
+    try:
+        yield timings
+    finally:
+        _local.timings = previous
+
+
+def get_active_timings():
+    """
+    :return: the SetupTimings made active on the current thread, or None
+    """
+    return getattr(_local, 'timings', None)
+
+
+def count_response(response, *args, **kwargs):  # pylint: disable=unused-argument
+    """
+    Response hook of the msrest clients counting a request and its bytes for the active SetupTimings.
+    """
+    timings = get_active_timings()
+    if timings is None:
+        return
+    body = getattr(response.request, 'body', None)
+    length = response.headers.get('Content-Length')
+    timings.count_request(len(body) if body else 0, int(length) if length else len(response.content))
@@ -0,0 +1,124 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+
+try:
+    from urllib.parse import urlsplit, urlunsplit
+except ImportError:
+    from urlparse import urlsplit, urlunsplit  #pylint: disable=import-error
+from vsts_info_provider import get_codecs
+from .caching import DEFAULT_MAX_SIZE, FileCacheBackend, MemoryCacheBackend, TTLCache
+
+DEFAULT_VSTS_INFO_TTL = 600
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+class VstsInfoCache(object):
+    def __init__(self, ttl=DEFAULT_VSTS_INFO_TTL, max_size=DEFAULT_MAX_SIZE, backend=None, credential_key=None):
+        """
+        Caches the VstsInfo (repository id and team project) of Team Services git repositories.
+        Entries are keyed by the normalized repository url and the identity of the credentials.
+        :param ttl: seconds a lookup stays valid
+        :param max_size: maximum number of cached repositories, ignored when backend is given
+        :param backend: storage of the entries, see create_vsts_info_file_backend for an on-disk one
+        :param credential_key: method of the form func(creds) returning a hashable identity of the credentials.
+         By default entries are keyed by the credentials object itself and keep it alive, so they are only
+         shared by callers using the same object within one process. A FileCacheBackend requires it.
+        """
+        if credential_key is None and isinstance(backend, FileCacheBackend):
+            raise ValueError('A cache kept in a file needs a credential_key that is stable across processes.')
+        self._cache = TTLCache(ttl, backend if backend is not None else MemoryCacheBackend(max_size))
+        self._credential_key = credential_key or _CredentialsIdentity
+
+    @property
+    def hits(self):
+        return self._cache.hits
+
+    @property
+    def misses(self):
+        return self._cache.misses
+
+    def get_vsts_info(self, repo_url, creds, loader):
+        """
+        Returns the VstsInfo of a repository, calling loader on a miss.
+        Concurrent misses for the same repository share one call of loader.
+        :param repo_url: url of the Team Services git repository
+        :param creds: credentials used for the lookup
+        :param loader: method of the form func(repo_url, creds) returning the VstsInfo
+        """
+        key = self.get_key(repo_url, creds)
+        return self._cache.get_or_load(key, lambda: loader(repo_url, creds))
+
+    def get_key(self, repo_url, creds):
+        """
+        :return: the cache key of a repository, for callers that load the VstsInfo themselves
+        """
+        return normalize_repo_url(repo_url), self._credential_key(creds)
+
+    def get(self, key):
+        """
+        :return: the cached VstsInfo for a key from get_key, or None
+        """
+        return self._cache.get(key)
+
+    def set(self, key, vsts_info):
+        self._cache.set(key, vsts_info)
+
+    def clear(self):
+        self._cache.clear()
+
+
+class _CredentialsIdentity(object):
+    # Key of a credentials object by identity. It holds the object, so while an entry is cached no other
+    # credentials object can get the same id and be served the entry.
+    __slots__ = ('creds',)
+
+    def __init__(self, creds):
+        self.creds = creds
+
+    def __eq__(self, other):
+        return isinstance(other, _CredentialsIdentity) and other.creds is self.creds
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return id(self.creds)
+
+
+def normalize_repo_url(repo_url):
+    """
+    Normalizes a repository url so that different spellings of the same repository share one entry:
+    user info, query and fragment are dropped, the url is lower cased (Team Services urls are case
+    insensitive) and trailing slashes are removed.
+    """
+    parts = urlsplit(repo_url.strip())
+    netloc = parts.netloc.rsplit('@', 1)[-1]
+    return urlunsplit((parts.scheme, netloc, parts.path.rstrip('/'), '', '')).lower()
+
+
+def create_vsts_info_file_backend(path, max_size=DEFAULT_MAX_SIZE):
+    """
+    Creates a cache backend that keeps the VstsInfo entries in a JSON file so they survive the process.
+    Combine it with a credential_key that is stable across processes.
+    """
+    serializer, deserializer = get_codecs()
+    return FileCacheBackend(path, max_size,
+                            encode=lambda info: serializer.body(info, 'VstsInfo'),
+                            decode=lambda data: deserializer('VstsInfo', data))
+
+
+def get_default_vsts_info_cache():
+    """
+    :return: the process wide VstsInfoCache used by ContinuousDeliveryManager unless another one is given
+    """
+    global _default_cache  # pylint: disable=global-statement
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = VstsInfoCache()
+        return _default_cache
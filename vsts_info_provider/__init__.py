@@ -5,10 +5,10 @@
 # regenerated.
 # --------------------------------------------------------------------------
 
-from .vsts_info_provider import VstsInfoProvider
+from .vsts_info_provider import VstsInfoProvider, get_codecs
 from .version import VERSION
 
-__all__ = ['VstsInfoProvider']
+__all__ = ['VstsInfoProvider', 'get_codecs']
 
 __version__ = VERSION
 
@@ -0,0 +1,95 @@
+# coding=utf-8
+# --------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+# Requires Python 3.5+ and msrest 0.6.0+
+
+from sys import stderr
+from msrest.async_client import ServiceClientAsync
+from msrest.pipeline import ClientRawResponse
+from msrest.exceptions import HttpOperationError
+from .vsts_info_provider import VstsInfoProviderConfiguration, get_codecs
+
+
+class AsyncVstsInfoProvider(object):
+    """Asynchronous counterpart of VstsInfoProvider. It shares the models,
+    the Serializer and the Deserializer with the synchronous client.
+
+    :ivar config: Configuration for client.
+    :vartype config: VstsInfoProviderConfiguration
+
+    :param api_version: Version of the API to use.  This should be set to
+     '3.2-preview' to use this version of the api.
+    :type api_version: str
+    :param str vsts_git_url: vsts git URL
+    :param Credentials creds: credentials for vsts
+    """
+
+    def __init__(
+            self, api_version, vsts_git_url, creds=None):
+        self.config = VstsInfoProviderConfiguration(api_version, vsts_git_url)
+        self.config.credentials = creds
+        self._client = ServiceClientAsync(self.config)
+
+        self.api_version = '3.2' if not api_version else api_version
+        self._serialize, self._deserialize = get_codecs()
+
+    async def get_vsts_info(
+            self, custom_headers=None, raw=False, vsts_git_url=None,
+            **operation_config):
+        """GetVstsInfo.
+
+        :param dict custom_headers: headers that will be added to the request
+        :param bool raw: returns the direct response alongside the
+         deserialized response
+        :param str vsts_git_url: vsts git URL to look up instead of the one
+         of the client, so one client can serve all repositories of a host
+        :rtype: :class:`VstsInfo<vsts_info_provider.models.VstsInfo>`
+        :rtype: :class:`ClientRawResponse<msrest.pipeline.ClientRawResponse>`
+         if raw=true
+        :raises:
+         :class:`HttpOperationError<msrest.exceptions.HttpOperationError>`
+        """
+        # Construct URL
+        url = '/vsts/info'
+        if vsts_git_url:
+            url = vsts_git_url.rstrip('/') + url
+
+        # Construct parameters
+        query_parameters = {}
+
+        # Construct headers
+        header_parameters = {}
+        header_parameters['Content-Type'] = 'application/json; charset=utf-8'
+        if custom_headers:
+            header_parameters.update(custom_headers)
+
+        # Construct and send request
+        request = self._client.get(url, query_parameters)
+        request.headers.update(header_parameters)
+        response = await self._client.async_send(request, stream=False, **operation_config)
+        if response.status_code not in [200]:
+            print("response:", response.status_code, file=stderr)
+            print(response.text(), file=stderr)
+            raise HttpOperationError(self._deserialize, response)
+
+        deserialized = self._deserialize('VstsInfo', response)
+
+        if raw:
+            client_raw_response = ClientRawResponse(deserialized, response)
+            return client_raw_response
+
+        return deserialized
+
+    async def close(self):
+        """Closes the HTTP session of the client."""
+        await self._client.__aexit__()
+
+    async def __aenter__(self):
+        await self._client.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_details):
+        await self._client.__aexit__(*exc_details)
@@ -6,6 +6,7 @@
 # --------------------------------------------------------------------------
 
 from __future__ import print_function
+import threading
 from sys import stderr
 from msrest.service_client import ServiceClient
 from msrest import Configuration, Serializer, Deserializer
@@ -15,6 +16,25 @@ from . import models
 from .version import VERSION
 
 
+_codecs = None
+_codecs_lock = threading.Lock()
+
+
+def get_codecs():
+    """Builds the model registry, Serializer and Deserializer of this package on first use and
+    shares them between all client instances. Thread-safe.
+
+    :rtype: tuple of (:class:`Serializer<msrest.Serializer>`, :class:`Deserializer<msrest.Deserializer>`)
+    """
+    global _codecs  # pylint: disable=global-statement
+    if _codecs is None:
+        with _codecs_lock:
+            if _codecs is None:
+                client_models = {k: v for k, v in models.__dict__.items() if isinstance(v, type)}
+                _codecs = (Serializer(client_models), Deserializer(client_models))
+    return _codecs
+
+
 class VstsInfoProviderConfiguration(Configuration):
     """Configuration for VstsInfoProvider
     Note that all parameters used to create this instance are saved as instance
@@ -61,18 +81,19 @@ class VstsInfoProvider(object):
         self.config = VstsInfoProviderConfiguration(api_version, vsts_git_url)
         self._client = ServiceClient(creds, self.config)
 
-        client_models = {k: v for k, v in models.__dict__.items() if isinstance(v, type)}
         self.api_version = '3.2' if not api_version else api_version
-        self._serialize = Serializer(client_models)
-        self._deserialize = Deserializer(client_models)
+        self._serialize, self._deserialize = get_codecs()
 
     def get_vsts_info(
-            self, custom_headers=None, raw=False, **operation_config):
+            self, custom_headers=None, raw=False, vsts_git_url=None,
+            **operation_config):
         """GetContinuousDeploymentOperation.
 
         :param dict custom_headers: headers that will be added to the request
         :param bool raw: returns the direct response alongside the
          deserialized response
+        :param str vsts_git_url: vsts git URL to look up instead of the one
+         of the client, so one client can serve all repositories of a host
         :param operation_config: :ref:`Operation configuration
          overrides<msrest:optionsforoperations>`.
         :rtype: :class:`ContinuousDeploymentOperation
@@ -84,6 +105,8 @@ class VstsInfoProvider(object):
         """
         # Construct URL
         url = '/vsts/info'
+        if vsts_git_url:
+            url = vsts_git_url.rstrip('/') + url
 
         # Construct parameters
         query_parameters = {}